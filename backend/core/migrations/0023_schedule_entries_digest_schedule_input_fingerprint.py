@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alter_scheduleentry_room'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='entries_digest',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='input_fingerprint',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:18
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_schedule_entries_digest_schedule_input_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='max_consecutive_hours',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)]),
+        ),
+    ]
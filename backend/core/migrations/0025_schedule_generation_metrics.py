@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_teacher_max_consecutive_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='generation_metrics',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
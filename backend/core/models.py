@@ -221,6 +221,11 @@ class Teacher(models.Model):
     max_hours_per_week = models.IntegerField(
         validators=[MinValueValidator(0), MaxValueValidator(40)]
     )
+    # Longest run of back-to-back slots this teacher may teach (HC9); blank uses SCHEDULER_MAX_CONSECUTIVE_HOURS
+    max_consecutive_hours = models.PositiveSmallIntegerField(
+        null=True, blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(10)]
+    )
     
     class Meta:
         db_table = 'teachers'
@@ -476,6 +481,12 @@ class Schedule(models.Model):
         blank=True, 
         help_text="Snapshot of the schedule layout when it was published. Used to detect changes even if underlying entries are deleted."
     )
+    # Hash of the generation inputs and solver configuration; identical runs reuse these entries
+    input_fingerprint = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # Hash of the entries as generated, so manually edited schedules are never reused
+    entries_digest = models.CharField(max_length=64, null=True, blank=True)
+    # Timings of the last generation: solve seconds and the persist stage's rows per second
+    generation_metrics = models.JSONField(null=True, blank=True)
     
     class Meta:
         db_table = 'schedules'
@@ -276,8 +276,9 @@ class ScheduleSerializer(serializers.ModelSerializer):
             "quality_score",
             "total_entries",
             "total_conflicts",
+            "generation_metrics",
         ]
-        read_only_fields = ["schedule_id", "created_at", "completed_at"]
+        read_only_fields = ["schedule_id", "created_at", "completed_at", "generation_metrics"]
         extra_kwargs = {
             "year": {"required": False, "allow_null": True},
             "name": {"required": False},
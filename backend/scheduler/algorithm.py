@@ -17,18 +17,36 @@ Author: M3 Backend Team
 """
 
 import random
+import time
+from collections import defaultdict
+from itertools import chain
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 
-from core.models import (
-    Schedule, ScheduleEntry, Section, Course, Teacher, Room,
-    TimeSlot, TeacherCourseMapping, ConflictLog
-)
+from core.models import Schedule
 from .constraints import ConstraintValidator, calculate_schedule_quality
+from .occupancy import OccupancyGrid, TEACHER, SECTION
+from .problem import load_problem, PROJECT_PHASE
+from .trail import Trail
+from .search import SearchEngine, GenerationPaused, SOLVED, PAUSED
+from .propagation import WindowTable, DomainStore
+from .rooms import RoomIndex
+from .allocation import allocate, core_demands
+from .optimizer import LocalSearch
+from .incremental import IncrementalPlan
+from .committed import CommittedOccupancy, published_schedule_ids
+from .feasibility import analyze
+from .solvers import get_solver, default_engine, DEFAULT_ENGINE
+from .fingerprint import input_fingerprint, entries_digest, find_cached, copy_entries
+from .persist import purge_entries, entry_rows, write_entries
+from .records import Task, SubTask, Entry, link_copies
 
 DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI']
-INTERVAL_AFTER_SLOT = 2
-LUNCH_AFTER_SLOT = 5
+# Backtracking budget before falling back to the greedy phase
+MAX_BACKTRACK_ITERATIONS = 5000
+# Forward checking + dynamic MRV task ordering in the exact phase
+FORWARD_CHECKING = True
 
 TYPE_PRACTICAL = 'PRACTICAL'
 TYPE_LECTURE = 'LECTURE'
@@ -47,115 +65,159 @@ PRIORITY = {
 }
 
 class TimetableScheduler:
-    def __init__(self, schedule):
+    def __init__(self, schedule, problem=None, seed=None):
         self.schedule = schedule
+        self.problem = problem  # ProblemInstance, loaded in generate() when not supplied
+        # Portfolio variants perturb every tie-break with a seeded RNG; None keeps the
+        # deterministic order
+        self.rng = random.Random(seed) if seed is not None else None
+        self.day_rank = {d: self.rng.random() for d in DAYS} if self.rng else None
+        self.slot_rank = {}
         self.validator = ConstraintValidator(schedule)
         self.conflicts = []
         self.teacher_assignments = {} 
-        self.entries = [] 
+        self.entries = []  # append-only stack, truncated by the trail on backtrack
         
-        self.faculty_busy = {}   
-        self.room_busy = {}      
-        self.section_busy = {}   
+        # Every mutation below is recorded on the trail so backtracking is a rollback
+        self.trail = Trail(self.entries)
+        # Bitset occupancy for teachers, rooms and sections
+        self.grid = OccupancyGrid(DAYS)
+        self.grid.trail = self.trail
         self.rooms_by_type = {'CLASSROOM': [], 'LAB': []}
-        self.section_day_counts = {} 
-        self.teacher_day_counts = {} 
         
         # Load Balancing Trackers
-        self.room_utilization = {} 
-        self.slot_utilization = {} 
+        self.room_utilization = defaultdict(int)
+        self.slot_utilization = defaultdict(int)
+        self.room_index = None  # RoomIndex over rooms_by_type, built by _prepare()
         
         self.iterations = 0
-        self.MAX_ITERATIONS = 1000000
+        self.MAX_ITERATIONS = MAX_BACKTRACK_ITERATIONS
+        self.forward_checking = FORWARD_CHECKING
+        self.max_consecutive_hours = getattr(settings, 'SCHEDULER_MAX_CONSECUTIVE_HOURS', 4)
+        # 'greedy' or 'flow' (see allocation.py)
+        self.allocation = getattr(settings, 'SCHEDULER_TEACHER_ALLOCATION', 'greedy')
+        self.window_table = None
+        self.domains = None  # DomainStore while the exact phase runs with forward checking
         self.in_greedy_phase = False # Tracks if we are in fallback safety mode
-
-    def generate(self):
+        self.tasks = []  # session tasks built by _prepare()
+        self.pins = None  # IncrementalPlan when re-generating from a base schedule
+        self.committed = None  # CommittedOccupancy of published schedules for scoped runs
+
+    def generate(self, checkpoint=None, pause_at=None, progress=None, time_budget=None, portfolio=None, optimize=None,
+                 base=None, changes=None, decompose=None, department=None, reserve=None, force=False, engine=None):
+        """
+        Run the full generation pipeline and persist the entries.
+
+        Args:
+            checkpoint: Search checkpoint from a previous GenerationPaused to resume from
+            pause_at: Optional time.time() deadline; the search pauses when it passes
+            progress: Optional callable receiving progress dicts during the search
+            time_budget: Seconds the exact search may run before the greedy phase
+                completes its best partial assignment (default
+                settings.SCHEDULER_TIME_BUDGET_SECONDS, 0 = iteration budget only)
+            portfolio: Number of seeded variants to race across worker processes
+                (default settings.SCHEDULER_PORTFOLIO_SIZE, 0/1 = single search).
+                Portfolio runs are not paused or resumed.
+            optimize: Seconds of local-search improvement after construction
+                (default settings.SCHEDULER_OPTIMIZE_SECONDS, 0 = off)
+            base: Schedule (or id) to re-generate incrementally from; needs `changes`
+            changes: {'teachers'|'sections'|'courses'|'rooms': [ids]} that changed since
+                `base`; sessions not touching them are copied over unchanged
+            decompose: Solve weakly coupled year/department blocks in worker processes
+                and reconcile them (default settings.SCHEDULER_DECOMPOSE). Takes
+                precedence over portfolio; not used for resumed or incremental runs.
+            department: Only schedule this department's sections; like schedule.year,
+                this scopes the run to a slice of the campus
+            reserve: Ids of PUBLISHED schedules whose teacher and room cells are
+                pre-blocked (default: every other published schedule of the semester
+                when the run is scoped, none otherwise)
+            force: Solve even when an earlier schedule was generated from identical
+                inputs and configuration (otherwise its entries are copied)
+            engine: Registered solver backend (see solvers.py; default
+                settings.SCHEDULER_ENGINE). Decomposition, portfolios and
+                pausing apply to 'backtrack' only.
+
+        Raises:
+            GenerationPaused: when pause_at is reached before the search finishes
+        """
         try:
             self.schedule.status = 'GENERATING'
+            self.schedule.generation_metrics = None
             self.schedule.save()
-            ScheduleEntry.objects.filter(schedule=self.schedule).delete()
-
-            sections = list(Section.objects.all().order_by('year', 'class_id'))
-            if not sections: return False, "No sections found"
-
-            timeslots = list(TimeSlot.objects.all().order_by('day', 'slot_number'))
-            if not timeslots: return False, "No timeslots available"
-
-            all_rooms = list(Room.objects.all())
-            for r in all_rooms:
-                self.rooms_by_type[r.room_type].append(r)
-                self.room_utilization[r.room_id] = 0
-
-            ts_by_day = {}
-            for ts in timeslots:
-                ts_by_day.setdefault(ts.day, [])
-                ts_by_day[ts.day].append(ts)
-
-            self._preallocate_teachers(sections)
-            tasks = self._build_session_tasks(sections)
-            tasks.sort(key=lambda x: x['priority'])
-
-            self.MAX_ITERATIONS = 5000
-            success = self._backtrack_place(tasks, 0, ts_by_day)
-
-            if not success:
-                # ========================================================
-                # FALLBACK GREEDY PHASE: GUARANTEED PLACEMENT
-                # ========================================================
-                self.in_greedy_phase = True
-                self.entries = []
-                self.faculty_busy.clear()
-                self.room_busy.clear()
-                self.section_busy.clear()
-                self.slot_utilization.clear()
-                for r in all_rooms: self.room_utilization[r.room_id] = 0
-                
-                for task in tasks:
-                    placed = False
-                    days = list(ts_by_day.keys())
-                    
-                    def get_day_load(d):
-                        cnt = 0
-                        task_secs = set(task.get('sections', []))
-                        if task.get('sub_tasks'):
-                            for st in task['sub_tasks']: task_secs.update(st.get('sections', []))
-                        for s in task_secs:
-                            cnt += sum(1 for (sid, day, slot), busy in self.section_busy.items() if busy and sid == s.class_id and day == d)
-                        return cnt
-                    
-                    days.sort(key=get_day_load)
-
-                    for day in days:
-                        day_slots = ts_by_day.get(day, [])
-                        windows = []
-                        for i in range(len(day_slots) - task['block_size'] + 1):
-                            windows.append(day_slots[i : i + task['block_size']])
-                        
-                        # Spread classes into empty slots (fixes empty Thu/Fri)
-                        windows.sort(key=lambda w: sum(self.slot_utilization.get((slot.day, slot.slot_number), 0) for slot in w))
-
-                        for window in windows:
-                            if task.get('is_group'):
-                                if self._can_place_group(task, window):
-                                    self._place_group(task, window)
-                                    placed = True
-                                    break
-                            else:
-                                if self._can_place_single(task, window):
-                                    self._place_single(task, window)
-                                    placed = True
-                                    break
-                        if placed: break
+            purge_entries(self.schedule)
+
+            if self.problem is None:
+                self.problem = load_problem(self.schedule.semester, year=self.schedule.year, department=department)
+            problem = self.problem
+
+            if not problem.sections: return False, "No sections found"
+
+            if not problem.timeslots: return False, "No timeslots available"
+
+            if reserve is None and (self.schedule.year is not None or department is not None):
+                reserve = published_schedule_ids(self.schedule.semester, exclude=self.schedule.schedule_id)
+            if reserve:
+                self.committed = CommittedOccupancy(reserve, problem)
+
+            if changes is not None:
+                if base is None: raise ValueError("Incremental generation needs a base schedule")
+                self.pins = IncrementalPlan(base, problem, changes)
+
+            if engine is None:
+                engine = default_engine()
+            solver = get_solver(engine)
+            if decompose is None:
+                decompose = getattr(settings, 'SCHEDULER_DECOMPOSE', False)
+            if portfolio is None:
+                portfolio = getattr(settings, 'SCHEDULER_PORTFOLIO_SIZE', 0)
+            if time_budget is None:
+                time_budget = getattr(settings, 'SCHEDULER_TIME_BUDGET_SECONDS', 0)
+            if optimize is None:
+                optimize = getattr(settings, 'SCHEDULER_OPTIMIZE_SECONDS', 0)
+
+            # Incremental results depend on their base schedule, so they are never cached
+            fingerprint = None
+            if self.pins is None:
+                fingerprint = input_fingerprint(problem, {
+                    'year': self.schedule.year, 'department': department, 'time_budget': time_budget,
+                    'portfolio': portfolio, 'optimize': optimize, 'decompose': bool(decompose),
+                    'max_iterations': self.MAX_ITERATIONS, 'forward_checking': self.forward_checking,
+                    'max_consecutive_hours': self.max_consecutive_hours, 'allocation': self.allocation,
+                    'engine': engine,
+                }, self.committed)
+                cached = None if force or checkpoint else find_cached(fingerprint, exclude=self.schedule.schedule_id)
+                if cached is not None:
+                    return self._reuse(cached, fingerprint)
+
+            started = time.perf_counter()
+            backtrack = engine == DEFAULT_ENGINE
+            if backtrack and decompose and checkpoint is None and self.pins is None:
+                from .decomposition import run_decomposed
+                success = run_decomposed(self, time_budget=time_budget, optimize=optimize, progress=progress)
+            elif backtrack and portfolio > 1 and checkpoint is None and self.pins is None:
+                from .portfolio import run_portfolio
+                success, entries = run_portfolio(self.schedule, problem, portfolio, time_budget=time_budget,
+                                                 optimize=optimize, progress=progress, committed=self.committed)
+                self.entries[:] = entries
+            else:
+                success = solver(self, checkpoint=checkpoint, pause_at=pause_at, progress=progress,
+                                 time_budget=time_budget, optimize=optimize)
+
+            solve_seconds = time.perf_counter() - started
+
+            def rows():
+                return chain(self.pins.rows() if self.pins else (), entry_rows(self.entries))
 
             with transaction.atomic():
-                entries_to_create = [
-                    ScheduleEntry(
-                        schedule=self.schedule, section=e['section'], course=e['course'], 
-                        teacher=e['teacher'], room=e['room'], timeslot=e['timeslot'],
-                        is_lab_session=e['is_lab'], session_type=e['session_type'], constraint_reason=e.get('constraint_reason')
-                    ) for e in self.entries
-                ]
-                ScheduleEntry.objects.bulk_create(entries_to_create)
+                persisted = write_entries(self.schedule, rows())
+            if progress:
+                progress({'phase': 'persist', **persisted})
+            self.schedule.generation_metrics = {'engine': engine, 'solve_seconds': round(solve_seconds, 4),
+                                                'persist': persisted}
+
+            if fingerprint is not None:
+                self.schedule.input_fingerprint = fingerprint
+                self.schedule.entries_digest = entries_digest(rows())
 
             if not success:
                 self.schedule.status = 'PARTIAL'
@@ -169,24 +231,154 @@ class TimetableScheduler:
             self.schedule.save()
             return True, f"Timetable generated successfully | Quality: {quality:.2f}"
 
+        except GenerationPaused:
+            raise
         except Exception as e:
             self.schedule.status = 'FAILED'
             self.schedule.save()
             raise e
 
+    def _reuse(self, cached, fingerprint):
+        """Fill the schedule with a bulk copy of an identical earlier generation."""
+        with transaction.atomic():
+            copied = copy_entries(cached, self.schedule)
+        self.schedule.input_fingerprint = fingerprint
+        self.schedule.entries_digest = cached.entries_digest
+        self.schedule.generation_metrics = {'reused_from': cached.schedule_id, 'rows': copied}
+        self.schedule.quality_score = cached.quality_score
+        if cached.status == 'PARTIAL':
+            self.schedule.status = 'PARTIAL'
+        else:
+            self.schedule.status = 'COMPLETED'
+            self.schedule.completed_at = timezone.now()
+        self.schedule.save()
+        return True, f"Inputs unchanged; reused {copied} entries from schedule {cached.schedule_id}"
+
+    def solve(self, checkpoint=None, pause_at=None, progress=None, time_budget=None, optimize=None):
+        """
+        Build the timetable in memory (self.entries) without touching the database.
+
+        Arguments are as for generate(); self.problem must be loaded.
+
+        Returns:
+            bool: True when the exact search placed every task, False when the
+            greedy fallback had to complete the timetable
+        """
+        tasks, ts_by_day = self._prepare()
+        root = self.trail.checkpoint()
+        search_tasks = tasks
+        if self.forward_checking:
+            self.domains = self._build_domains(search_tasks)
+            # Tasks with no legal window at all can only be placed by the relaxed
+            # greedy phase; leave them out so the search can still place the rest.
+            if any(self.domains.size(i) == 0 for i in range(len(tasks))):
+                search_tasks = [t for t in tasks if self.domains.size(t.index) > 0]
+                self.domains = self._build_domains(search_tasks)
+
+        if time_budget is None:
+            time_budget = getattr(settings, 'SCHEDULER_TIME_BUDGET_SECONDS', 0)
+        if checkpoint:
+            engine = SearchEngine.from_checkpoint(self, search_tasks, ts_by_day, self.MAX_ITERATIONS, checkpoint,
+                                                  progress=progress, time_budget=time_budget)
+        else:
+            engine = SearchEngine(self, search_tasks, ts_by_day, self.MAX_ITERATIONS, progress=progress, time_budget=time_budget)
+        outcome = engine.run(pause_at=pause_at)
+        self.iterations = engine.iterations
+        if outcome == PAUSED:
+            raise GenerationPaused(engine.checkpoint())
+        success = outcome == SOLVED and len(search_tasks) == len(tasks)
+
+        if not success:
+            # ========================================================
+            # FALLBACK GREEDY PHASE: GUARANTEED PLACEMENT
+            # ========================================================
+            # Keep the deepest partial assignment the search reached and
+            # only complete the tasks it left unplaced.
+            if outcome != SOLVED:
+                self.trail.rollback(root)
+                seeded = {id(search_tasks[i]) for i in engine.restore_best()}
+            else:
+                seeded = {id(t) for t in search_tasks}
+            self.in_greedy_phase = True
+            self.domains = None
+
+            for task in tasks:
+                if id(task) in seeded: continue
+                self._greedy_place(task, ts_by_day)
+
+        if optimize is None:
+            optimize = getattr(settings, 'SCHEDULER_OPTIMIZE_SECONDS', 0)
+        if optimize:
+            self.optimize(tasks, optimize)
+        return success
+
+    def _prepare(self):
+        """
+        Index rooms, allocate teachers and build the priority-ordered session tasks.
+
+        Teachers are only allocated when no allocation was handed in, so the
+        blocks of a decomposed run keep the campus-wide allocation.
+
+        Returns:
+            tuple: (tasks, timeslots by day); the tasks are also kept on self.tasks
+        """
+        problem = self.problem
+        sections = list(problem.sections)
+        all_rooms = list(problem.rooms)
+        for r in all_rooms:
+            self.rooms_by_type[r.room_type].append(r)
+            self.room_utilization[r.room_id] = 0
+        self.room_index = RoomIndex(self.rooms_by_type, self.grid, self.trail, self.room_utilization)
+
+        ts_by_day = problem.timeslots_by_day()
+
+        if not self.teacher_assignments:
+            self._preallocate_teachers(sections)
+        if self.pins:
+            self.pins.apply_teachers(self.teacher_assignments)
+        tasks = self._build_session_tasks(sections)
+        if self.pins:
+            # Only sessions ripped out of the base schedule are placed again
+            tasks = [t for t in tasks if not self.pins.covers(t)]
+            self.pins.occupy(self)
+        if self.committed:
+            self.committed.occupy(self)
+        if self.rng:
+            self.rng.shuffle(tasks)  # random order among equal priorities
+            self.slot_rank = {(ts.day, ts.slot_number): self.rng.random() for ts in problem.timeslots}
+        tasks.sort(key=lambda x: x.priority)
+
+        self.window_table = WindowTable(DAYS, ts_by_day, self.grid, problem.breaks_by_day())
+        for task in tasks:
+            task.intern(self.grid)
+            task.room_demand = self._room_demand(task)
+        self.tasks = tasks
+        return tasks, ts_by_day
+
+    def _greedy_place(self, task, ts_by_day):
+        """Place a task at the first window that passes _can_place, least-loaded days first."""
+        days = sorted(ts_by_day.keys(), key=lambda d: self._day_load(task, d))
+
+        windows, _, day_ids, _ = self.window_table.table(task.block_size)
+        for day in days:
+            # Spread classes into empty slots (fixes empty Thu/Fri)
+            for wid in sorted(day_ids.get(day, []), key=self._window_load(day, task.block_size)):
+                window = windows[wid]
+                if self._can_place(task, window):
+                    self._place(task, window)
+                    return True
+        return False
+
     def _preallocate_teachers(self, sections):
-        from collections import defaultdict
-        teacher_load = defaultdict(int)
+        problem = self.problem
+        # Hours already taught in published schedules count towards each teacher's load
+        teacher_load = defaultdict(int, self.committed.teacher_hours if self.committed else {})
         
         # 1. PRE-CALCULATE ELECTIVES
-        electives = Course.objects.filter(is_elective=True, semester=self.schedule.semester, is_schedulable=True).exclude(elective_group__isnull=True)
-        groups = defaultdict(list)
-        for e in electives: groups[e.elective_group].append(e)
-        
-        for g_name, courses in groups.items():
+        for g_name, courses in problem.elective_groups.items():
             if not courses: continue
             base_course = courses[0]
-            group_mappings = TeacherCourseMapping.objects.filter(course__in=courses).select_related('teacher')
+            group_mappings = problem.group_mappings[g_name]
             seen_teachers = set()
             for m in group_mappings:
                 if m.teacher.teacher_id not in seen_teachers:
@@ -195,14 +387,10 @@ class TimetableScheduler:
 
         # 2. PRE-CALCULATE PROJECTS
         for section in sections:
-            project_courses = Course.objects.filter(year=section.year, semester=self.schedule.semester, course_name__icontains="Project Phase")
-            for pc in project_courses:
-                mappings = TeacherCourseMapping.objects.filter(course=pc, section=section).select_related('teacher')
-                if not mappings.exists():
-                    mappings = TeacherCourseMapping.objects.filter(course=pc, section__isnull=True).select_related('teacher')
-                
-                if mappings.exists():
-                    m = mappings.first()
+            for pc in problem.project_courses(section.year):
+                mappings = problem.mappings_for(pc.course_id, section.class_id)
+                if mappings:
+                    m = mappings[0]
                     self.teacher_assignments[(pc.course_id, section.class_id)] = m.teacher
                     tracking_key = f"proj_{pc.course_id}_{m.teacher.teacher_id}"
                     if not hasattr(self, '_tracked_projects'): self._tracked_projects = set()
@@ -210,15 +398,17 @@ class TimetableScheduler:
                         teacher_load[m.teacher.teacher_id] += pc.weekly_slots
                         self._tracked_projects.add(tracking_key)
 
-        # 3. CORE COURSES (Most Constrained First with Safety Net)
+        # 3. CORE COURSES: one min-cost flow over every pair, or greedily below
+        if self.allocation == 'flow':
+            self.teacher_assignments.update(allocate(core_demands(problem, sections), teacher_load))
+            return
+
+        # Most Constrained First with Safety Net
         core_tasks = []
         for section in sections:
-            courses = Course.objects.filter(year=section.year, semester=self.schedule.semester, is_elective=False).exclude(course_name__icontains="Project Phase")
-            for course in courses:
-                mappings = TeacherCourseMapping.objects.filter(course=course, section=section).select_related('teacher')
-                if not mappings.exists():
-                    mappings = TeacherCourseMapping.objects.filter(course=course, section__isnull=True).select_related('teacher')
-                if mappings.exists():
+            for course in problem.core_courses(section.year):
+                mappings = problem.mappings_for(course.course_id, section.class_id)
+                if mappings:
                     core_tasks.append({ 'course': course, 'section': section, 'mappings': list(mappings) })
         
         # Sort subjects by fewest eligible teachers first to prevent flexible teachers from burning out early
@@ -247,313 +437,386 @@ class TimetableScheduler:
                 teacher_load[selected.teacher_id] += course.weekly_slots
 
     def _build_session_tasks(self, sections):
+        problem = self.problem
         tasks = []
         for (course_id, section_id), teacher in self.teacher_assignments.items():
-            course = Course.objects.get(course_id=course_id)
-            section = Section.objects.get(class_id=section_id)
-            if "Project Phase" in course.course_name: continue
+            course = problem.course(course_id)
+            section = problem.section(section_id)
+            if PROJECT_PHASE in course.course_name: continue
 
             if course.practicals > 0:
-                tasks.append({ 'type': TYPE_PRACTICAL, 'course': course, 'sections': [section], 'teacher': teacher, 'block_size': course.practicals, 'priority': PRIORITY[TYPE_PRACTICAL], 'session_type': 'PRACTICAL' })
-            for i in range(course.lectures):
-                tasks.append({ 'type': TYPE_ADM if course.is_adm else TYPE_LECTURE, 'course': course, 'sections': [section], 'teacher': teacher, 'block_size': 1, 'priority': PRIORITY[TYPE_ADM if course.is_adm else TYPE_LECTURE], 'session_type': 'ADM' if course.is_adm else 'LECTURE' })
-            for i in range(course.theory):
-                tasks.append({ 'type': TYPE_TUTORIAL, 'course': course, 'sections': [section], 'teacher': teacher, 'block_size': 1, 'priority': PRIORITY[TYPE_TUTORIAL], 'session_type': 'TUTORIAL' })
-
-        from collections import defaultdict
-        electives = Course.objects.filter(is_elective=True, semester=self.schedule.semester, is_schedulable=True).exclude(elective_group__isnull=True)
-        groups = defaultdict(list)
-        for e in electives: groups[e.elective_group].append(e)
-
-        for g_name, courses in groups.items():
+                tasks.append(Task(TYPE_PRACTICAL, course.practicals, PRIORITY[TYPE_PRACTICAL], 'PRACTICAL', course=course, sections=(section,), teacher=teacher))
+            t_type = TYPE_ADM if course.is_adm else TYPE_LECTURE
+            lectures = [Task(t_type, 1, PRIORITY[t_type], 'ADM' if course.is_adm else 'LECTURE', course=course, sections=(section,), teacher=teacher)
+                        for _ in range(course.lectures)]
+            tutorials = [Task(TYPE_TUTORIAL, 1, PRIORITY[TYPE_TUTORIAL], 'TUTORIAL', course=course, sections=(section,), teacher=teacher)
+                         for _ in range(course.theory)]
+            link_copies(lectures)
+            link_copies(tutorials)
+            tasks.extend(lectures)
+            tasks.extend(tutorials)
+
+        for g_name, courses in problem.elective_groups.items():
             year = courses[0].year
             t_type = TYPE_FE if "FREE" in g_name.upper() else TYPE_PE
             s_type = 'FE' if t_type == TYPE_FE else 'PE'
             
-            group_mappings = TeacherCourseMapping.objects.filter(course__in=courses).select_related('teacher', 'course', 'section')
+            group_mappings = problem.group_mappings[g_name]
             if not group_mappings: continue
 
-            busy_teachers = set(m.teacher for m in group_mappings)
             target_sections = sorted([s for s in sections if s.year == year], key=lambda x: x.class_id)
             if not target_sections: continue
 
             base_course = courses[0]
             session_plan = []
-            for _ in range(base_course.lectures): session_plan.append({'type': t_type, 'block_size': 1, 'session_type': s_type})
-            for _ in range(base_course.theory): session_plan.append({'type': TYPE_TUTORIAL, 'block_size': 1, 'session_type': 'TUTORIAL'})
-            if base_course.practicals > 0: session_plan.append({'type': TYPE_PRACTICAL, 'block_size': base_course.practicals, 'session_type': 'PRACTICAL'})
+            for _ in range(base_course.lectures): session_plan.append((t_type, 1, s_type))
+            for _ in range(base_course.theory): session_plan.append((TYPE_TUTORIAL, 1, 'TUTORIAL'))
+            if base_course.practicals > 0: session_plan.append((TYPE_PRACTICAL, base_course.practicals, 'PRACTICAL'))
 
-            for session in session_plan:
+            copies = defaultdict(list)
+            for session_kind, block_size, session_type in session_plan:
                 sub_tasks = []
                 task_busy_teachers = set()
                 for idx, m in enumerate(group_mappings):
-                    assigned_secs = [m.section] if m.section else [target_sections[idx % len(target_sections)]]
-                    sub_tasks.append({ 'course': m.course, 'teacher': m.teacher, 'sections': assigned_secs, 'session_type': session['session_type'], 'display_name': m.course.course_name })
+                    assigned_secs = (m.section,) if m.section else (target_sections[idx % len(target_sections)],)
+                    sub_tasks.append(SubTask(m.course, m.teacher, assigned_secs, session_type, display_name=m.course.course_name))
                     task_busy_teachers.add(m.teacher)
                 if sub_tasks:
-                    tasks.append({ 'type': session['type'], 'sub_tasks': sub_tasks, 'busy_teachers': list(task_busy_teachers), 'block_size': session['block_size'], 'priority': PRIORITY[session['type']], 'is_group': True, 'group_name': g_name })
+                    task = Task(session_kind, block_size, PRIORITY[session_kind], sub_tasks=tuple(sub_tasks),
+                                busy_teachers=tuple(task_busy_teachers), is_group=True, group_name=g_name)
+                    copies[(session_kind, block_size, session_type)].append(task)
+                    tasks.append(task)
+            for same in copies.values(): link_copies(same)
         
         phases = defaultdict(list)
         for (course_id, section_id), teacher in self.teacher_assignments.items():
-            course = Course.objects.get(course_id=course_id)
-            if "Project Phase" in course.course_name:
-                section = Section.objects.get(class_id=section_id)
+            course = problem.course(course_id)
+            if PROJECT_PHASE in course.course_name:
+                section = problem.section(section_id)
                 phases[course].append((section, teacher))
                 
         for course, assignments in phases.items():
+            copies = []
             for _ in range(course.practicals):
                 sub_tasks = []
                 task_busy_teachers = set()
                 for section, teacher in assignments:
-                    sub_tasks.append({ 'course': course, 'teacher': teacher, 'sections': [section], 'session_type': 'PRACTICAL' })
+                    sub_tasks.append(SubTask(course, teacher, (section,), 'PRACTICAL'))
                     task_busy_teachers.add(teacher)
                 if sub_tasks:
-                    tasks.append({ 'type': TYPE_PRACTICAL, 'sub_tasks': sub_tasks, 'busy_teachers': list(task_busy_teachers), 'block_size': 1, 'priority': PRIORITY[TYPE_PRACTICAL], 'is_group': True, 'group_name': course.course_name, 'is_project': True })
+                    copies.append(Task(TYPE_PRACTICAL, 1, PRIORITY[TYPE_PRACTICAL], sub_tasks=tuple(sub_tasks),
+                                       busy_teachers=tuple(task_busy_teachers), is_group=True,
+                                       group_name=course.course_name, is_project=True))
+            link_copies(copies)
+            tasks.extend(copies)
 
         return tasks
 
-    def _backtrack_place(self, tasks, index, ts_by_day):
-        if getattr(self, 'abort_backtrack', False): return False
-        self.iterations += 1
-        if self.iterations > self.MAX_ITERATIONS:
-            self.abort_backtrack = True
-            return False
-            
-        if index >= len(tasks): return True
-        task = tasks[index]
-        
-        def score_day(d):
-            score = 0
-            task_sections = set(task.get('sections', []))
-            if task.get('sub_tasks'):
-                for st in task['sub_tasks']: task_sections.update(st.get('sections', []))
-            for sec in task_sections:
-                if self.section_day_counts.get((sec.class_id, d), 0) == 0: score -= 100 
-            teachers = set()
-            if task.get('teacher'): teachers.add(task['teacher'])
-            if task.get('sub_tasks'):
-                for st in task['sub_tasks']:
-                    if st.get('teacher'): teachers.add(st['teacher'])
-            for t in teachers:
-                if self.teacher_day_counts.get((t.teacher_id, d), 0) == 0: score -= 50 
-            return score
-            
-        days = sorted(DAYS, key=score_day)
-        for day in days:
-            day_slots = ts_by_day.get(day, [])
-            windows = []
-            for i in range(len(day_slots) - task['block_size'] + 1):
-                windows.append(day_slots[i : i + task['block_size']])
-            windows.sort(key=lambda w: sum(self.slot_utilization.get((slot.day, slot.slot_number), 0) for slot in w))
-
-            for window in windows:
-                if task.get('is_group'):
-                    if self._can_place_group(task, window):
-                        added = self._place_group(task, window)
-                        if self._backtrack_place(tasks, index + 1, ts_by_day): return True
-                        if getattr(self, 'abort_backtrack', False): return False
-                        self._remove_group(task, window, added)
-                else:
-                    if self._can_place_single(task, window):
-                        added = self._place_single(task, window)
-                        if self._backtrack_place(tasks, index + 1, ts_by_day): return True
-                        if getattr(self, 'abort_backtrack', False): return False
-                        self._remove_single(task, window, added)
-        return False
+    def _candidate_windows(self, task, ts_by_day):
+        """
+        Ordered placement candidates for a task: days that are still empty for
+        its sections/teachers first, then the least-used windows of each day.
+        """
+        day_key = lambda d: self._day_score(task, d)
+        if self.rng:
+            day_key = lambda d: (self._day_score(task, d), self.day_rank[d])
+
+        windows, _, day_ids, _ = self.window_table.table(task.block_size)
+        domains = self.domains
+        candidates = []
+        for day in sorted(DAYS, key=day_key):
+            ids = day_ids.get(day, [])
+            if domains is not None:
+                ids = [wid for wid in ids if domains.contains(task.index, wid)]
+            if not ids: continue
+            window_key = self._window_load(day, task.block_size)
+            if self.rng:
+                load = window_key
+                window_key = lambda wid: (load(wid), self.slot_rank[(windows[wid][0].day, windows[wid][0].slot_number)])
+            candidates.extend(windows[wid] for wid in sorted(ids, key=window_key))
+        return candidates
+
+    def _day_load(self, task, day):
+        """Slots the task's sections already hold on a day."""
+        grid = self.grid
+        return sum(grid.day_bits(SECTION, idx, day).bit_count() for idx in task.section_ids)
+
+    def _day_score(self, task, day):
+        """
+        -100 for each of the task's sections and -50 for each of its teachers
+        with nothing on the day yet. The grid's per-day slices are the
+        running counters, looked up by the task's interned ids.
+        """
+        grid = self.grid
+        score = 0
+        for idx in task.section_ids:
+            if not grid.day_bits(SECTION, idx, day): score -= 100
+        for idx in task.teacher_ids:
+            if not grid.day_bits(TEACHER, idx, day): score -= 50
+        return score
+
+    def _window_load(self, day, block_size):
+        """
+        Sort key giving the slot_utilization total of a window id on a day.
+
+        One prefix-sum pass over the day's slots makes every window an O(1)
+        difference instead of a sum over its slots.
+        """
+        prefix = [0]
+        for ts in self.window_table.ts_by_day.get(day, ()):
+            prefix.append(prefix[-1] + self.slot_utilization.get((ts.day, ts.slot_number), 0))
+        starts = self.window_table.starts(block_size)
+        return lambda wid: prefix[starts[wid] + block_size] - prefix[starts[wid]]
+
+    def _build_domains(self, tasks):
+        """DomainStore over the exact-phase task list, re-indexing the tasks."""
+        for i, task in enumerate(tasks): task.index = i
+        return DomainStore(tasks, self.window_table, self.grid, self.trail, self.rooms_by_type, self._task_resources, self._room_demand)
+
+    def _select_task(self, depth):
+        """Index of the next task to expand: fewest remaining windows, else list order."""
+        if self.domains is None: return depth
+        return self.domains.select()
+
+    def _after_place(self, task, window, depth):
+        """Forward-check the other tasks after a placement; the conflict set on a dead end."""
+        if self.domains is None: return None
+        return self.domains.assign(task.index, self.grid.window_mask(window), depth)
+
+    def _pruners(self, task, depth):
+        """Depths that ruled out windows of a task; every shallower depth without domains."""
+        if self.domains is None: return (1 << depth) - 1
+        return self.domains.pruners(task.index)
+
+    def _blockers(self, task, window, depth):
+        """Depths that may explain a _can_place failure; every shallower depth without domains."""
+        if self.domains is None: return (1 << depth) - 1
+        return self.domains.blockers(task.index, self.grid.window_mask(window))
+
+    def _state_key(self):
+        """Resource-state key for the search's nogood cache, when domains are tracked."""
+        if self.domains is None: return None
+        return self.domains.state_key()
+
+    def _task_resources(self, task):
+        """(kind, id) pairs for the teachers and sections a task occupies."""
+        res = [(TEACHER, t) for t in task.teacher_ids]
+        res.extend((SECTION, sec) for sec in task.section_ids)
+        return res
+
+    def _room_demand(self, task):
+        """Rooms of each type a task needs at once in the exact phase."""
+        if not task.is_group:
+            return {'LAB' if task.type == TYPE_PRACTICAL else 'CLASSROOM': 1}
+        if task.is_project: return {}
+        demand = defaultdict(int)
+        for sub in task.sub_tasks:
+            demand['LAB' if sub.course.practicals > 0 else 'CLASSROOM'] += 1
+        return dict(demand)
+
+    def _can_place(self, task, window):
+        """Whether a task fits a window of self.window_table, which never straddles a break."""
+        if task.is_group: return self._can_place_group(task, window)
+        return self._can_place_single(task, window)
+
+    def _place(self, task, window):
+        if task.is_group: self._place_group(task, window)
+        else: self._place_single(task, window)
 
     def _can_place_single(self, task, window):
-        teacher = task['teacher']
-        room_type = 'LAB' if task['type'] == TYPE_PRACTICAL else 'CLASSROOM'
+        room_type = 'LAB' if task.type == TYPE_PRACTICAL else 'CLASSROOM'
         relax = self.in_greedy_phase
+        grid = self.grid
+        mask = grid.window_mask(window)
 
-        for ts in window:
-            if self.faculty_busy.get((teacher.teacher_id, ts.day, ts.slot_number)): return False
-            for section in task['sections']:
-                if self.section_busy.get((section.class_id, ts.day, ts.slot_number)): return False
-        
-        for k in range(len(window) - 1):
-            if window[k].slot_number == INTERVAL_AFTER_SLOT or window[k].slot_number == LUNCH_AFTER_SLOT: return False
+        if not grid.all_free(TEACHER, task.teacher_ids, mask): return False
+        if not grid.all_free(SECTION, task.section_ids, mask): return False
 
-        if not relax and not self._check_hc9(teacher, window): return False
+        if not relax and not self._check_hc9(task, window[0].day, mask): return False
         
-        rooms_sorted = sorted(self.rooms_by_type[room_type], key=lambda r: self.room_utilization.get(r.room_id, 0))
-        for r in rooms_sorted:
-            if not any(self.room_busy.get((r.room_id, ts.day, ts.slot_number)) for ts in window):
-                task['selected_room'] = r
-                return True
-                
+        room = self.room_index.least_used(room_type, mask)
+        if room is not None:
+            task.selected_room = room
+            return True
+
         # SAFETY NET: If campus is literally out of rooms for this slot, assign TBA so the class is not dropped
         if relax:
-            task['selected_room'] = None
+            task.selected_room = None
             return True
             
         return False
 
     def _place_single(self, task, window):
-        teacher = task['teacher']
-        room = task['selected_room']
-        added = []
-        for ts in window:
-            ent = {'section': task['sections'][0], 'course': task['course'], 'teacher': teacher, 'room': room, 'timeslot': ts, 'is_lab': (task['type'] == TYPE_PRACTICAL), 'session_type': task['session_type']}
-            self.entries.append(ent)
-            added.append(ent)
-            
-            self.faculty_busy[(teacher.teacher_id, ts.day, ts.slot_number)] = True
-            self.slot_utilization[(ts.day, ts.slot_number)] = self.slot_utilization.get((ts.day, ts.slot_number), 0) + 1
-            
-            if room:
-                self.room_busy[(room.room_id, ts.day, ts.slot_number)] = True
-                if ts == window[0]: self.room_utilization[room.room_id] = self.room_utilization.get(room.room_id, 0) + 1
-            
-            for sec in task['sections']: 
-                self.section_busy[(sec.class_id, ts.day, ts.slot_number)] = True
-                key = (sec.class_id, ts.day)
-                if ts == window[0]: self.section_day_counts[key] = self.section_day_counts.get(key, 0) + 1
-            
-            t_key = (teacher.teacher_id, ts.day)
-            if ts == window[0]: self.teacher_day_counts[t_key] = self.teacher_day_counts.get(t_key, 0) + 1
-        return added
-
-    def _remove_single(self, task, window, added):
-        teacher = task['teacher']
-        room = task['selected_room']
-        for ent in added: 
-            self.entries.remove(ent)
-            ts = ent['timeslot']
-            sec = ent['section']
-            if ts == window[0]:
-                self.section_day_counts[(sec.class_id, ts.day)] -= 1
-                self.teacher_day_counts[(teacher.teacher_id, ts.day)] -= 1
-            
+        teacher = task.teacher
+        room = task.selected_room
+        grid = self.grid
+        trail = self.trail
+        mask = grid.window_mask(window)
+        for t in task.teacher_ids: grid.occupy(TEACHER, t, mask)
+        if room: self.room_index.occupy(room.room_id, mask)
+        for sec in task.section_ids: grid.occupy(SECTION, sec, mask)
+
+        section = task.sections[0]
+        is_lab = task.type == TYPE_PRACTICAL
         for ts in window:
-            self.slot_utilization[(ts.day, ts.slot_number)] -= 1
-            self.faculty_busy[(teacher.teacher_id, ts.day, ts.slot_number)] = False
-            if room:
-                self.room_busy[(room.room_id, ts.day, ts.slot_number)] = False
-                if ts == window[0]: self.room_utilization[room.room_id] -= 1
-            for sec in task['sections']: self.section_busy[(sec.class_id, ts.day, ts.slot_number)] = False
+            self.entries.append(Entry(section, task.course, teacher, room, ts, is_lab, task.session_type))
+            trail.add(self.slot_utilization, (ts.day, ts.slot_number), 1)
+        trail.set(task, 'window', window)
 
     def _can_place_group(self, task, window):
         relax = self.in_greedy_phase
+        grid = self.grid
         
         # Bug Fix: Ensure we check ALL timeslots in the window, not just window[0]
-        for t_idx in window:
-            for t in task.get('busy_teachers', []):
-                if self.faculty_busy.get((t.teacher_id, t_idx.day, t_idx.slot_number)): return False
-            for sub in task['sub_tasks']:
-                for sec in sub['sections']:
-                    if self.section_busy.get((sec.class_id, t_idx.day, t_idx.slot_number)): return False
-                    
-        for k in range(len(window) - 1):
-            if window[k].slot_number == INTERVAL_AFTER_SLOT or window[k].slot_number == LUNCH_AFTER_SLOT: return False
-                    
-        used_rooms = []
-        for sub in task['sub_tasks']:
-            if task.get('is_project'):
-                sub['selected_room'] = None
+        mask = grid.window_mask(window)
+        if not grid.all_free(TEACHER, task.teacher_ids, mask): return False
+        if not grid.all_free(SECTION, task.section_ids, mask): return False
+
+        # Every sub-task accepts any free room of its type, so the sub-task/room graph is
+        # complete per type and Hall's condition reduces to counting free rooms
+        index = self.room_index
+        free = {}
+        for room_type, needed in task.room_demand.items():
+            free[room_type] = index.free_over(room_type, mask)
+            if not relax and free[room_type].bit_count() < needed: return False
+
+        for sub in task.sub_tasks:
+            if task.is_project:
+                sub.selected_room = None
                 continue
 
-            room_type = 'LAB' if sub['course'].practicals > 0 else 'CLASSROOM'
-            rooms_sorted = sorted(self.rooms_by_type[room_type], key=lambda r: self.room_utilization.get(r.room_id, 0))
-            found_room = False
-            
-            for r in rooms_sorted:
-                if r in used_rooms: continue
-                room_free = True
-                for t_idx in window:
-                    if self.room_busy.get((r.room_id, t_idx.day, t_idx.slot_number)):
-                        room_free = False
-                        break
-                if room_free:
-                    sub['selected_room'] = r
-                    used_rooms.append(r)
-                    found_room = True
-                    break
-                    
-            if not found_room: 
-                if relax: sub['selected_room'] = None
-                else: return False
+            room_type = 'LAB' if sub.course.practicals > 0 else 'CLASSROOM'
+            room = index.pick(room_type, free[room_type])
+            sub.selected_room = room
+            if room is not None:
+                free[room_type] &= ~index.bit(room)
         return True
 
     def _place_group(self, task, window):
-        added = []
-        processed_secs_for_day_count = set()
-        
-        for ts in window:
-            self.slot_utilization[(ts.day, ts.slot_number)] = self.slot_utilization.get((ts.day, ts.slot_number), 0) + 1
-            
-            for t in task.get('busy_teachers', []):
-                self.faculty_busy[(t.teacher_id, ts.day, ts.slot_number)] = True
-                if ts == window[0]:
-                    self.teacher_day_counts[(t.teacher_id, ts.day)] = self.teacher_day_counts.get((t.teacher_id, ts.day), 0) + 1
-            
-            for sub in task['sub_tasks']:
-                teacher = sub['teacher']
-                room = sub.get('selected_room')
-                
-                if room:
-                    self.room_busy[(room.room_id, ts.day, ts.slot_number)] = True
-                    if ts == window[0]: self.room_utilization[room.room_id] = self.room_utilization.get(room.room_id, 0) + 1
-                        
-                for sec in sub['sections']:
-                    is_lab = (sub['course'].practicals > 0)
-                    if sec.year == 4 and sub.get('session_type') in ['PE', 'FE', 'PRACTICAL']: is_lab = False
-                        
-                    ent = {'section': sec, 'course': sub['course'], 'teacher': teacher, 'room': room, 'timeslot': ts, 'is_lab': is_lab, 'session_type': sub['session_type'], 'constraint_reason': sub.get('display_name')}
-                    self.entries.append(ent)
-                    added.append(ent)
-                    self.section_busy[(sec.class_id, ts.day, ts.slot_number)] = True
-                    
-                    key = (sec.class_id, ts.day)
-                    if key not in processed_secs_for_day_count and ts == window[0]:
-                        self.section_day_counts[key] = self.section_day_counts.get(key, 0) + 1
-                        processed_secs_for_day_count.add(key)
-        return added
-
-    def _remove_group(self, task, window, added):
-        processed_secs_for_day_count = set()
-        
-        for ent in added: 
-            self.entries.remove(ent)
-            key = (ent['section'].class_id, ent['timeslot'].day)
-            if key not in processed_secs_for_day_count and ent['timeslot'] == window[0]:
-                self.section_day_counts[key] -= 1
-                processed_secs_for_day_count.add(key)
+        grid = self.grid
+        trail = self.trail
+        mask = grid.window_mask(window)
+        trail.set(task, 'window', window)
+        for t in task.teacher_ids: grid.occupy(TEACHER, t, mask)
+        for sec in task.section_ids: grid.occupy(SECTION, sec, mask)
+
+        for sub in task.sub_tasks:
+            room = sub.selected_room
+            if room: self.room_index.occupy(room.room_id, mask)
 
         for ts in window:
-            self.slot_utilization[(ts.day, ts.slot_number)] -= 1
-            
-            for t in task.get('busy_teachers', []):
-                self.faculty_busy[(t.teacher_id, ts.day, ts.slot_number)] = False
-                if ts == window[0]: self.teacher_day_counts[(t.teacher_id, ts.day)] -= 1
-                    
-            for sub in task['sub_tasks']:
-                room = sub.get('selected_room')
-                if room:
-                    self.room_busy[(room.room_id, ts.day, ts.slot_number)] = False
-                    if ts == window[0]: self.room_utilization[room.room_id] -= 1
-                for sec in sub['sections']:
-                    self.section_busy[(sec.class_id, ts.day, ts.slot_number)] = False
-
-    def _check_hc9(self, teacher, window, max_hours=4):
-        day = window[0].day
-        slots = [ts.slot_number for ts in window]
-        for s in range(1, 11):
-            if s not in slots and self.faculty_busy.get((teacher.teacher_id, day, s)): slots.append(s)
-        slots.sort()
-        count = 1
-        max_c = 1
-        for j in range(1, len(slots)):
-            if slots[j] == slots[j-1] + 1:
-                count += 1
-                max_c = max(max_c, count)
-            else: count = 1
-        return max_c <= max_hours
-
-def generate_schedule(schedule_id):
+            trail.add(self.slot_utilization, (ts.day, ts.slot_number), 1)
+            for sub in task.sub_tasks:
+                for sec in sub.sections:
+                    is_lab = (sub.course.practicals > 0)
+                    if sec.year == 4 and sub.session_type in ['PE', 'FE', 'PRACTICAL']: is_lab = False
+                    self.entries.append(Entry(sec, sub.course, sub.teacher, sub.selected_room, ts, is_lab, sub.session_type, sub.display_name))
+
+    def _release(self, task):
+        """
+        Undo a task's placement on the grid and counters (local search only).
+
+        Its entries are left in self.entries; _rebuild() regenerates them.
+        """
+        grid = self.grid
+        trail = self.trail
+        window = task.window
+        mask = grid.window_mask(window)
+        for ts in window:
+            trail.add(self.slot_utilization, (ts.day, ts.slot_number), -1)
+
+        for t in task.teacher_ids: grid.release(TEACHER, t, mask)
+        for sec in task.section_ids: grid.release(SECTION, sec, mask)
+        for room in (self._rooms_of(task) if task.is_group else (task.selected_room,)):
+            if room: self.room_index.release(room.room_id, mask)
+        trail.set(task, 'window', None)
+
+    def _rooms_of(self, task):
+        if task.is_group: return tuple(sub.selected_room for sub in task.sub_tasks)
+        return task.selected_room
+
+    def _set_rooms(self, task, rooms):
+        if task.is_group:
+            for sub, room in zip(task.sub_tasks, rooms): sub.selected_room = room
+        else:
+            task.selected_room = rooms
+
+    def _entry_count(self, task):
+        """Number of ScheduleEntry rows a task produces when placed."""
+        if task.is_group:
+            return task.block_size * sum(len(sub.sections) for sub in task.sub_tasks)
+        return task.block_size
+
+    def _tba_count(self, task):
+        """Entries of a placed task that have no room although they need one."""
+        if task.is_project: return 0
+        if task.is_group:
+            return task.block_size * sum(len(sub.sections) for sub in task.sub_tasks if sub.selected_room is None)
+        return task.block_size if task.selected_room is None else 0
+
+    def _rebuild(self, tasks, layout):
+        """Clear all placement state and re-place tasks at a (window, rooms) layout."""
+        self.trail.reset()
+        self.grid.clear()
+        del self.entries[:]
+        self.slot_utilization.clear()
+        self.room_index.clear()
+        if self.pins:
+            self.pins.occupy(self)
+        if self.committed:
+            self.committed.occupy(self)
+        for task, (window, rooms) in zip(tasks, layout):
+            task.window = None
+            if window is None: continue
+            self._set_rooms(task, rooms)
+            self._place(task, window)
+        self.trail.reset()
+
+    def optimize(self, tasks, time_budget, max_moves=None):
+        """
+        Improve the constructed timetable with local search (see optimizer.py).
+
+        Returns:
+            tuple: (penalty before, penalty after)
+        """
+        self.in_greedy_phase = False
+        self.domains = None
+        search = LocalSearch(self, tasks, self.rng or random.Random(0))
+        return search.run(time_budget, max_moves=max_moves)
+
+    def _check_hc9(self, task, day, mask):
+        """HC9: the task's teacher keeps within their consecutive-hours limit once `mask` is taught."""
+        limit = task.teacher.max_consecutive_hours or self.max_consecutive_hours
+        return self.grid.longest_run(TEACHER, task.teacher_ids[0], day, mask) <= limit
+
+def check_feasibility(semester, year=None, department=None, reserve=None, base=None, changes=None):
+    """
+    Pre-solve FeasibilityReport for a generation request (see feasibility.py).
+
+    Scoping, published-schedule reservations and incremental pins are
+    resolved as generate() resolves them, and teachers are allocated the
+    same way, so the report covers the tasks the search would get - for
+    an incremental run only the ripped sessions, around the pinned ones.
+    """
+    problem = load_problem(semester, year=year, department=department)
+    scheduler = TimetableScheduler(None, problem=problem)
+    if reserve is None and (year is not None or department is not None):
+        reserve = published_schedule_ids(semester)
+    if reserve:
+        scheduler.committed = CommittedOccupancy(reserve, problem)
+    if base is not None:
+        scheduler.pins = IncrementalPlan(base, problem, changes or {})
+    scheduler._prepare()
+    return analyze(scheduler)
+
+
+def generate_schedule(schedule_id, **options):
+    """
+    Generate a schedule by id. Keyword options are passed to TimetableScheduler.generate().
+    """
     try:
         schedule = Schedule.objects.get(schedule_id=schedule_id)
         scheduler = TimetableScheduler(schedule)
-        return scheduler.generate()
+        return scheduler.generate(**options)
     except Schedule.DoesNotExist:
         return False, f"Schedule {schedule_id} not found"
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Min-Cost-Flow Teacher Allocation
+================================
+
+The greedy allocation in TimetableScheduler._preallocate_teachers picks the
+least-loaded eligible teacher course by course and overloads someone when
+everybody is full. This module allocates all core (course, section) pairs
+at once as a min-cost flow over teaching hours:
+
+    source -> demand -> teacher -> sink
+
+- A demand node stands for the sections of one course that have the same
+  eligible teachers; it supplies count * weekly_slots hours.
+- Demand -> teacher arcs cost the mapping's preference_level per hour
+  (level 1 is free).
+- Teacher -> sink is split into load bands of the teacher's capacity
+  (min(max_hours_per_week, 40), less hours already allocated), each band
+  dearer than the last so load spreads evenly. The overload bands past
+  the capacity are priced far above any preference, so a class is never
+  dropped, a teacher only goes past their capacity when nobody eligible
+  has room, and unavoidable overload is spread rather than piled on one
+  teacher.
+
+Flow is in hours, while a section needs a single teacher. Each demand's
+flow is turned into whole sections per teacher by largest remainder. An
+optimal flow splits at most a handful of demands, so rounding moves only
+a few hours.
+
+Author: M3 Backend Team
+"""
+
+import heapq
+from collections import defaultdict
+
+# (share of capacity where the band ends, cost per hour); bands past 1.0 are overload
+LOAD_BANDS = ((0.5, 0), (0.75, 3), (1.0, 6), (1.25, 100), (1.5, 200))
+# Cost per hour beyond the last band
+OVERLOAD_COST = 400
+CAPACITY_LIMIT = 40
+
+
+class MinCostFlow:
+    """Successive shortest paths with Dijkstra over reduced costs."""
+
+    def __init__(self, nodes):
+        self.graph = [[] for _ in range(nodes)]
+
+    def add_edge(self, u, v, cap, cost):
+        """Arc u -> v; returns a handle for flow_on()."""
+        self.graph[u].append([v, cap, cost, len(self.graph[v])])
+        self.graph[v].append([u, 0, -cost, len(self.graph[u]) - 1])
+        return u, len(self.graph[u]) - 1
+
+    def flow_on(self, handle):
+        u, i = handle
+        v, _, _, rev = self.graph[u][i]
+        return self.graph[v][rev][1]
+
+    def run(self, source, sink, limit):
+        """Send up to `limit` units at minimum cost; (flow, cost). Costs must be non-negative."""
+        graph = self.graph
+        n = len(graph)
+        potential = [0] * n
+        flow = cost = 0
+        while flow < limit:
+            dist = [None] * n
+            dist[source] = 0
+            prev = [None] * n
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d != dist[u]: continue
+                for i, (v, cap, c, _) in enumerate(graph[u]):
+                    if cap <= 0: continue
+                    nd = d + c + potential[u] - potential[v]
+                    if dist[v] is None or nd < dist[v]:
+                        dist[v] = nd
+                        prev[v] = (u, i)
+                        heapq.heappush(heap, (nd, v))
+            if dist[sink] is None: break
+            for v in range(n):
+                if dist[v] is not None: potential[v] += dist[v]
+
+            push = limit - flow
+            v = sink
+            while v != source:
+                u, i = prev[v]
+                push = min(push, graph[u][i][1])
+                v = u
+            v = sink
+            while v != source:
+                u, i = prev[v]
+                edge = graph[u][i]
+                edge[1] -= push
+                graph[v][edge[3]][1] += push
+                cost += push * edge[2]
+                v = u
+            flow += push
+        return flow, cost
+
+
+def _bands(capacity, load):
+    """(hours, cost) teacher -> sink bands above an existing load."""
+    bands = []
+    start = 0
+    for share, cost in LOAD_BANDS:
+        end = int(capacity * share)
+        hours = end - max(start, load)
+        if hours > 0: bands.append((hours, cost))
+        start = end
+    return bands
+
+
+def allocate(demands, teacher_load):
+    """
+    Assign a teacher to every core (course, section) pair.
+
+    Args:
+        demands: list of (course, sections, eligible), eligible being
+            ((Teacher, preference_level), ...) in mapping order
+        teacher_load: {teacher_id: hours} allocated so far; updated in place
+
+    Returns:
+        dict: {(course_id, class_id): Teacher}
+    """
+    teachers = {}
+    for _, _, eligible in demands:
+        for teacher, _ in eligible:
+            teachers.setdefault(teacher.teacher_id, teacher)
+    teacher_node = {tid: 2 + len(demands) + i for i, tid in enumerate(teachers)}
+    source, sink = 0, 1
+    net = MinCostFlow(2 + len(demands) + len(teachers))
+
+    total = sum(course.weekly_slots * len(sections) for course, sections, _ in demands)
+    arcs = []
+    for d, (course, sections, eligible) in enumerate(demands):
+        node = 2 + d
+        net.add_edge(source, node, course.weekly_slots * len(sections), 0)
+        arcs.append([(teacher, net.add_edge(node, teacher_node[teacher.teacher_id], total, pref - 1))
+                     for teacher, pref in eligible])
+    for tid, teacher in teachers.items():
+        node = teacher_node[tid]
+        capacity = min(teacher.max_hours_per_week, CAPACITY_LIMIT)
+        for hours, cost in _bands(capacity, teacher_load[tid]):
+            net.add_edge(node, sink, hours, cost)
+        net.add_edge(node, sink, total, OVERLOAD_COST)
+    net.run(source, sink, total)
+
+    assignments = {}
+    for (course, sections, _), flows in zip(demands, arcs):
+        # Largest remainder: whole sections per teacher, summing to the section count
+        if course.weekly_slots:
+            shares = [(net.flow_on(handle) / course.weekly_slots, i, teacher) for i, (teacher, handle) in enumerate(flows)]
+        else:
+            shares = [(len(sections) if i == 0 else 0, i, teacher) for i, (teacher, _) in enumerate(flows)]
+        counts = [int(share) for share, _, _ in shares]
+        spare = len(sections) - sum(counts)
+        for _, i, _ in sorted(shares, key=lambda s: (-(s[0] - int(s[0])), s[1]))[:spare]:
+            counts[i] += 1
+        ordered = iter(sorted(sections, key=lambda s: s.class_id))
+        for (_, _, teacher), count in zip(shares, counts):
+            for _ in range(count):
+                section = next(ordered)
+                assignments[(course.course_id, section.class_id)] = teacher
+                teacher_load[teacher.teacher_id] += course.weekly_slots
+    return assignments
+
+
+def core_demands(problem, sections):
+    """Core (course, section) pairs grouped by course and eligible teachers, for allocate()."""
+    groups = defaultdict(list)
+    courses = {}
+    for section in sections:
+        for course in problem.core_courses(section.year):
+            mappings = problem.mappings_for(course.course_id, section.class_id)
+            if not mappings: continue
+            eligible = {}
+            for m in mappings:
+                tid = m.teacher.teacher_id
+                if tid not in eligible or m.preference_level < eligible[tid][1]:
+                    eligible[tid] = (m.teacher, m.preference_level)
+            key = (course.course_id, tuple((tid, pref) for tid, (_, pref) in eligible.items()))
+            courses[key] = (course, tuple(eligible.values()))
+            groups[key].append(section)
+    return [(courses[key][0], groups[key], courses[key][1]) for key in groups]
@@ -0,0 +1,74 @@
+"""
+Committed Occupancy of Published Schedules
+==========================================
+
+A year- or department-scoped generation shares its teachers and rooms with
+timetables that are already in use. This module reads the entries of
+selected PUBLISHED schedules and pre-blocks their teacher and room cells on
+the scheduler's grid before anything is placed, so the scoped run solves a
+small problem and never clashes with what is already published.
+
+Entries of sections inside the scope are skipped: those are exactly the
+sessions being regenerated. The committed weekly hours of each teacher also
+count towards their load when teachers are allocated.
+
+Author: M3 Backend Team
+"""
+
+from collections import defaultdict
+
+from core.models import Schedule, ScheduleEntry
+from .occupancy import TEACHER
+
+COMMITTED_FIELDS = ('teacher_id', 'room_id', 'timeslot_id')
+
+
+def published_schedule_ids(semester, exclude=None):
+    """Ids of every PUBLISHED schedule of a semester."""
+    schedules = Schedule.objects.filter(semester=semester, status='PUBLISHED')
+    if exclude is not None:
+        schedules = schedules.exclude(schedule_id=exclude)
+    return list(schedules.values_list('schedule_id', flat=True))
+
+
+class CommittedOccupancy:
+    """
+    Teacher and room cells held by published schedules.
+
+    Usage:
+        committed = CommittedOccupancy([4, 7], problem)
+        committed.occupy(scheduler)
+    """
+
+    def __init__(self, schedule_ids, problem):
+        scheduled = {s.class_id for s in problem.sections}
+        timeslots = {ts.slot_id: ts for ts in problem.timeslots}
+        rows = (ScheduleEntry.objects
+                .filter(schedule_id__in=list(schedule_ids), schedule__status='PUBLISHED')
+                .exclude(section_id__in=scheduled)
+                .values_list(*COMMITTED_FIELDS))
+
+        # One cell per (teacher, slot) / (room, slot): group sessions repeat them per section
+        self.teacher_cells = set()
+        self.room_cells = set()
+        for teacher_id, room_id, slot_id in rows:
+            ts = timeslots.get(slot_id)
+            if ts is None: continue
+            cell = (ts.day, ts.slot_number)
+            if teacher_id: self.teacher_cells.add((teacher_id, cell))
+            if room_id: self.room_cells.add((room_id, cell))
+
+        self.teacher_hours = defaultdict(int)
+        for teacher_id, _ in self.teacher_cells:
+            self.teacher_hours[teacher_id] += 1
+
+    def __bool__(self):
+        return bool(self.teacher_cells or self.room_cells)
+
+    def occupy(self, scheduler):
+        """Mark the committed cells busy on the scheduler's grid and counters."""
+        grid = scheduler.grid
+        for teacher_id, (day, slot_number) in self.teacher_cells:
+            grid.occupy(TEACHER, grid.intern(TEACHER, teacher_id), grid.slot_bit(day, slot_number))
+        for room_id, (day, slot_number) in self.room_cells:
+            scheduler.room_index.occupy(room_id, grid.slot_bit(day, slot_number))
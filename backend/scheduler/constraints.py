@@ -8,6 +8,8 @@ Author: Backend Team (Vamsi, Akshitha)
 Sprint: 1
 """
 
+from django.conf import settings
+
 from core.models import ScheduleEntry, TimeSlot
 from datetime import timedelta
 
@@ -117,18 +119,21 @@ class ConstraintValidator:
              
         return True, None
     
-    def validate_continuous_hours(self, teacher, timeslot, max_hours=4):
+    def validate_continuous_hours(self, teacher, timeslot, max_hours=None):
         """
         Check if assigning this slot would exceed maximum continuous teaching hours.
         
         Args:
             teacher: Teacher object
             timeslot: TimeSlot object
-            max_hours: Maximum continuous hours allowed (default: 4)
+            max_hours: Maximum continuous hours allowed (default: the teacher's
+                max_consecutive_hours, else SCHEDULER_MAX_CONSECUTIVE_HOURS)
         
         Returns:
             tuple: (is_valid, error_message)
         """
+        if max_hours is None:
+            max_hours = teacher.max_consecutive_hours or getattr(settings, 'SCHEDULER_MAX_CONSECUTIVE_HOURS', 4)
         # Get all slots for this teacher on the same day
         same_day_entries = self.existing_entries.filter(
             teacher=teacher,
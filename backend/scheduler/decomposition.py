@@ -0,0 +1,311 @@
+"""
+Year/Department Decomposition
+=============================
+
+Splits one campus-wide generation into weakly coupled blocks that are
+solved side by side in a process pool. Search cost grows much faster than
+the number of tasks, so several small exact searches usually finish (and
+succeed) where one big search runs out of budget.
+
+1. Teachers are allocated once for the whole campus, so every block works
+   with the same (course, section) -> teacher map.
+2. Sections start in one block per (year, department). Blocks that share a
+   session - an elective group or a project phase - are always merged.
+   Other block pairs are merged while their coupling is high compared to
+   the smaller block's load: the weekly slots their shared teachers teach in
+   both, plus the room slots they would need beyond the campus capacity of
+   a room type.
+3. Each block is solved by a worker process on a ProblemInstance restricted
+   to its sections; the workers send back the window of every task.
+4. Reconciliation replays the block layouts on one campus-wide grid - group
+   sessions first, then by task priority, ties going to the larger block - re-checking every session with the exact rules and
+   re-picking its rooms. A session that now clashes with another block (a
+   shared teacher, or no free room left) or that its block could only place
+   on relaxed rules is repaired: it moves to the best window that passes
+   the exact checks, else to the greedy phase's relaxed placement, else
+   it takes the window blocked by the fewest sessions of its teachers and
+   sections, which move elsewhere.
+
+Decomposed runs are not paused or resumed, like portfolio runs.
+
+Author: M3 Backend Team
+"""
+
+import os
+from collections import defaultdict
+from concurrent.futures import as_completed
+from dataclasses import replace
+
+from django.conf import settings
+
+from .incremental import task_key
+from .problem import PROJECT_PHASE
+from .workers import process_pool, shared
+
+# Merge two blocks while their coupling exceeds this share of the smaller block's load
+COUPLING_LIMIT = 0.5
+
+def task_ids(tasks):
+    """Identity of each task that is stable across campus-wide and block task lists."""
+    seen = defaultdict(int)
+    ids = []
+    for task in tasks:
+        key = (task_key(task), task.type, task.block_size)
+        ids.append(key + (seen[key],))
+        seen[key] += 1
+    return ids
+
+
+def _layout(tasks):
+    """Picklable {task id: slot ids} of the placed tasks."""
+    return {tid: tuple(ts.slot_id for ts in task.window)
+            for tid, task in zip(task_ids(tasks), tasks) if task.window is not None}
+
+
+def _solve_block(index, class_ids, assignments, time_budget):
+    """Solve one block in a worker process."""
+    from .algorithm import TimetableScheduler
+
+    block = frozenset(class_ids)
+    schedule, campus, committed = shared()
+    problem = replace(campus, sections=tuple(s for s in campus.sections if s.class_id in block))
+    scheduler = TimetableScheduler(schedule, problem=problem)
+    scheduler.committed = committed
+    scheduler.teacher_assignments = {key: campus.teachers[tid] for key, tid in assignments.items()}
+    success = scheduler.solve(time_budget=time_budget, optimize=0)
+    return index, success, _layout(scheduler.tasks)
+
+
+# ----------------------------------------------------------------------
+# Partitioning
+# ----------------------------------------------------------------------
+
+def partition(problem, teacher_assignments):
+    """
+    Group the sections into blocks.
+
+    Args:
+        problem: Loaded ProblemInstance
+        teacher_assignments: {(course_id, class_id): Teacher} for the whole campus
+
+    Returns:
+        list: sorted lists of class ids, largest block load first
+    """
+    parent = {}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b: parent[b] = a
+
+    block_of = {s.class_id: (s.year, s.department) for s in problem.sections}
+    for key in block_of.values():
+        parent[key] = key
+
+    # Sessions spanning several blocks
+    for g_name, courses in problem.elective_groups.items():
+        year = courses[0].year
+        linked = [block_of[s.class_id] for s in problem.sections if s.year == year]
+        linked += [block_of[m.section.class_id] for m in problem.group_mappings[g_name]
+                   if m.section is not None and m.section.class_id in block_of]
+        for key in linked[1:]: union(linked[0], key)
+    projects = defaultdict(list)
+    for (course_id, class_id) in teacher_assignments:
+        if PROJECT_PHASE in problem.course(course_id).course_name:
+            projects[course_id].append(block_of[class_id])
+    for linked in projects.values():
+        for key in linked[1:]: union(linked[0], key)
+
+    # Load, teacher slots and room demand per block
+    load = defaultdict(int)
+    teacher_load = defaultdict(lambda: defaultdict(int))
+    room_demand = defaultdict(lambda: defaultdict(int))
+    for (course_id, class_id), teacher in teacher_assignments.items():
+        course = problem.course(course_id)
+        block = find(block_of[class_id])
+        load[block] += course.weekly_slots
+        teacher_load[block][teacher.teacher_id] += course.weekly_slots
+        if PROJECT_PHASE in course.course_name: continue
+        room_demand[block]['LAB'] += course.practicals
+        room_demand[block]['CLASSROOM'] += course.lectures + course.theory
+    capacity = defaultdict(int)
+    for room in problem.rooms:
+        capacity[room.room_type] += len(problem.timeslots)
+
+    def coupling(a, b):
+        shared = sum(min(slots, teacher_load[b][tid]) for tid, slots in teacher_load[a].items() if tid in teacher_load[b])
+        overflow = sum(max(0, room_demand[a][t] + room_demand[b][t] - capacity[t]) for t in set(room_demand[a]) | set(room_demand[b]))
+        return (shared + overflow) / max(1, min(load[a], load[b]))
+
+    def merge(a, b):
+        union(a, b)
+        load[a] += load.pop(b)
+        for tid, slots in teacher_load.pop(b).items(): teacher_load[a][tid] += slots
+        for t, slots in room_demand.pop(b).items(): room_demand[a][t] += slots
+
+    roots = {find(key) for key in block_of.values()}
+    while len(roots) > 1:
+        ratio, a, b = max((coupling(a, b), a, b) for a in roots for b in roots if a < b)
+        if ratio <= COUPLING_LIMIT: break
+        merge(a, b)
+        roots.discard(b)
+
+    blocks = defaultdict(list)
+    for class_id, key in block_of.items():
+        blocks[find(key)].append(class_id)
+    return [sorted(blocks[root]) for root in sorted(blocks, key=lambda r: -load[r])]
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+
+def _reconcile(scheduler, tasks, ts_by_day, results):
+    """
+    Replay block layouts on the scheduler and repair cross-block clashes.
+
+    Returns:
+        int: number of sessions the exact checks could not place
+    """
+    timeslots = {ts.slot_id: ts for ts in scheduler.problem.timeslots}
+    by_id = dict(zip(task_ids(tasks), tasks))
+    pending = [task for tid, task in by_id.items() if not any(tid in layout for _, _, layout in results)]
+
+    # Sessions spanning many teachers first, then by priority as in the search; ties keep
+    # the larger block's layout
+    placed = [(not by_id[tid].is_group, by_id[tid].priority, index, tid, slots)
+              for index, _, layout in results for tid, slots in layout.items()]
+    placed.sort(key=lambda p: p[:3])
+    for *_, tid, slots in placed:
+        task = by_id[tid]
+        window = [timeslots[slot_id] for slot_id in slots]
+        # Rooms are re-picked: another block may already hold the worker's choice
+        if scheduler._can_place(task, window): scheduler._place(task, window)
+        else: pending.append(task)
+
+    pending.sort(key=lambda t: t.priority)
+    relaxed = 0
+    ejected = False
+    for task in pending:
+        placed = _repair(scheduler, task, ts_by_day)
+        if placed is None:
+            moved = _eject(scheduler, tasks, task, ts_by_day)
+            if moved is not None:
+                ejected = True
+                relaxed += moved
+        relaxed += placed != EXACT
+    if ejected:
+        # _release() leaves the moved sessions' old entries behind
+        scheduler._rebuild(tasks, [(t.window, scheduler._rooms_of(t)) for t in tasks])
+    scheduler.trail.reset()
+    return relaxed
+
+
+EXACT, RELAXED = 'exact', 'relaxed'
+
+
+def _repair(scheduler, task, ts_by_day):
+    """Place a task on the exact rules, else on the greedy phase's; EXACT, RELAXED or None."""
+    for window in scheduler._candidate_windows(task, ts_by_day):
+        if scheduler._can_place(task, window):
+            scheduler._place(task, window)
+            return EXACT
+    scheduler.in_greedy_phase = True
+    placed = scheduler._greedy_place(task, ts_by_day)
+    scheduler.in_greedy_phase = False
+    return RELAXED if placed else None
+
+
+def _eject(scheduler, tasks, task, ts_by_day):
+    """
+    Make room for a task no window is free for: move the fewest single
+    sessions that share a teacher or section with it out of one window.
+
+    The move is undone unless every moved session finds a new window.
+
+    Returns:
+        int: moved sessions that needed the relaxed rules, None if the task stays unplaced
+    """
+    grid = scheduler.grid
+    resources = set(scheduler._task_resources(task))
+    holders = [(t, grid.window_mask(t.window)) for t in tasks
+               if t.window is not None and resources.intersection(scheduler._task_resources(t))]
+
+    best = None
+    for window in scheduler.window_table.table(task.block_size)[0]:
+        mask = grid.window_mask(window)
+        blockers = [t for t, held in holders if held & mask]
+        if any(t.is_group for t in blockers): continue
+        if best is None or len(blockers) < len(best[1]):
+            best = (window, blockers)
+    if best is None: return None
+
+    window, blockers = best
+    trail = scheduler.trail
+    mark = trail.checkpoint()
+    rooms = [scheduler._rooms_of(t) for t in blockers]
+    for t in blockers: scheduler._release(t)
+    scheduler.in_greedy_phase = True
+    placed = scheduler._can_place(task, window)
+    scheduler.in_greedy_phase = False
+    if placed:
+        scheduler._place(task, window)
+        outcomes = [_repair(scheduler, t, ts_by_day) for t in blockers]
+        if None not in outcomes:
+            return outcomes.count(RELAXED)
+    trail.rollback(mark)
+    for t, saved in zip(blockers, rooms): scheduler._set_rooms(t, saved)
+    return None
+
+
+def run_decomposed(scheduler, time_budget=None, optimize=None, progress=None, workers=None):
+    """
+    Build the scheduler's timetable from concurrently solved blocks.
+
+    Args:
+        scheduler: TimetableScheduler with its problem loaded and nothing placed
+        time_budget: Search seconds per block (see TimetableScheduler.generate)
+        optimize: Local-search seconds over the reconciled campus timetable
+        progress: Optional callable receiving progress dicts
+        workers: Process count (default: one per block, at most one per CPU)
+
+    Returns:
+        bool: True when every session ended up placed on the exact rules
+    """
+    problem = scheduler.problem
+    scheduler._preallocate_teachers(list(problem.sections))
+    blocks = partition(problem, scheduler.teacher_assignments)
+    if len(blocks) < 2:
+        return scheduler.solve(time_budget=time_budget, optimize=optimize, progress=progress)
+
+    workers = workers or min(len(blocks), os.cpu_count() or 1)
+    results = []
+    with process_pool(scheduler.schedule, problem, scheduler.committed, workers) as executor:
+        futures = []
+        for index, class_ids in enumerate(blocks):
+            block = set(class_ids)
+            assignments = {key: t.teacher_id for key, t in scheduler.teacher_assignments.items() if key[1] in block}
+            futures.append(executor.submit(_solve_block, index, class_ids, assignments, time_budget))
+        for finished, future in enumerate(as_completed(futures), 1):
+            index, success, layout = future.result()
+            if progress:
+                progress({'phase': 'decomposition', 'finished': finished, 'blocks': len(blocks),
+                          'block': index, 'complete': success})
+            results.append((index, success, layout))
+    results.sort()
+
+    tasks, ts_by_day = scheduler._prepare()
+    relaxed = _reconcile(scheduler, tasks, ts_by_day, results)
+    if progress:
+        progress({'phase': 'reconciliation', 'blocks': len(blocks), 'relaxed': relaxed})
+
+    if optimize is None:
+        optimize = getattr(settings, 'SCHEDULER_OPTIMIZE_SECONDS', 0)
+    if optimize:
+        scheduler.optimize(tasks, optimize)
+    return relaxed == 0
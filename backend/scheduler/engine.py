@@ -1,336 +1,287 @@
 """
-Scheduler Engine using Google OR-Tools CP-SAT Solver.
-
-This module generates conflict-free timetables based on hard constraints:
-- Teacher Conflict: A faculty cannot teach two classes at the same time
-- Room Conflict: A room cannot host two classes at the same time
-- Section Conflict: A section cannot attend two classes at the same time
-- Session Count: Each assignment gets exactly sessions_per_week slots
+CP-SAT Solver Backend
+=====================
+
+Solves the scheduler's session tasks with Google OR-Tools CP-SAT
+(registered as engine 'cpsat', see solvers.py; needs the optional
+``ortools`` package).
+
+The model works on the tasks TimetableScheduler._prepare() builds from
+Course / TeacherCourseMapping / Section, so teacher allocation, elective
+groups, project phases, incremental pins and published-schedule cells
+are exactly those of the backtracking engine. Per task:
+
+- one start variable over the week grid's bit positions, restricted to
+  the legal windows of its block size (no break is crossed) that its
+  teachers, sections and room types still have free
+- one optional fixed-size interval of the block length; its presence
+  literal says whether the task is placed at all
+- one boolean per candidate window, channelled to the start, to state
+  the consecutive-hours limit (HC9) and to read the solution back
+
+Constraints:
+- NoOverlap over the intervals of every teacher and every section
+- rooms as pools: a Cumulative per room type whose demand is the rooms
+  of that type the task needs at once (one for a single session, one per
+  course for an elective group), with the rooms published schedules hold
+  as fixed load - no per-room booleans
+- an elective group is one interval, so its courses run linked by
+  construction
+- HC9: at most `limit` of every limit + 1 consecutive slots of a
+  teacher's day taught in single sessions or already published; group
+  slots are left to the exact check while rooms are picked (below),
+  since counting them in the rows slows the solver down many times over
+- interchangeable copies of a session (records.link_copies) are placed in
+  canonical order, the later copy only when the earlier one is
+
+The greedy placement seeds the solver as a hint. It first looks for a
+timetable that places every task with a legal window; when that is
+proven infeasible, the remaining time goes to a model maximizing the
+placed entries, so an over-full campus still gets its best partial
+timetable. With no solution in time the greedy layout itself is used.
+
+Rooms are picked afterwards in start order, as in interval colouring,
+so a pool that never exceeds its capacity finds a free room of the type
+unless published cells fragment it. Every placement passes
+TimetableScheduler._can_place on the exact rules; a task that fails is
+tried at its other windows, and only then placed by the greedy phase's
+relaxed rules, which makes the result PARTIAL.
+As for every engine, generate() writes the entries through
+persist.write_entries (COPY on PostgreSQL, batched executemany
+elsewhere).
+
+Author: M3 Backend Team
 """
 
-import django
-import os
-
-# Setup Django environment if running standalone
-if not django.apps.apps.ready:
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scheduler.settings')
-    django.setup()
+import time
 
+from django.conf import settings
 from ortools.sat.python import cp_model
-from core.models import CourseAssignment, Room, Faculty, StudentSection, GeneratedSchedule
-
-
-# Constants
-NUM_DAYS = 5  # Monday to Friday
-NUM_SLOTS = 8  # 8 slots per day (0-7)
-TOTAL_TIMESLOTS = NUM_DAYS * NUM_SLOTS  # 40 total slots
-
-DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-
 
-def get_timeslot_index(day: int, slot: int) -> int:
-    """Convert (day, slot) to a single timeslot index."""
-    return day * NUM_SLOTS + slot
+from .occupancy import TEACHER, SECTION
 
+# Solver seconds when neither time_budget nor SCHEDULER_TIME_BUDGET_SECONDS is set
+DEFAULT_SECONDS = 30
 
-def get_day_slot_from_index(timeslot_index: int) -> tuple[int, int]:
-    """Convert timeslot index back to (day, slot)."""
-    day = timeslot_index // NUM_SLOTS
-    slot = timeslot_index % NUM_SLOTS
-    return day, slot
 
+class CpSatModel:
+    """
+    CP-SAT model over a prepared scheduler's tasks.
 
-def fetch_data():
-    """Fetch all required data from Django ORM."""
-    assignments = list(CourseAssignment.objects.select_related(
-        'faculty', 'course', 'section'
-    ).all())
-    rooms = list(Room.objects.all())
-    faculties = list(Faculty.objects.all())
-    sections = list(StudentSection.objects.all())
-    
-    return {
-        'assignments': assignments,
-        'rooms': rooms,
-        'faculties': faculties,
-        'sections': sections,
-    }
-
+    Usage:
+        model = CpSatModel(scheduler, tasks, required=True)
+        model.hint(windows)
+        placed, status = model.solve(seconds)  # {task position: window}
 
-def create_variables(model: cp_model.CpModel, assignments: list, rooms: list) -> dict:
-    """
-    Create boolean decision variables.
-    
-    For each assignment and each session of that assignment,
-    create a variable for each (room, timeslot) combination.
-    
-    x[assignment_id][session_num][room_id][timeslot] = 1 
-    means session `session_num` of `assignment` is scheduled 
-    in `room` at `timeslot`.
-    """
-    x = {}
-    
-    for assignment in assignments:
-        assignment_id = assignment.id
-        x[assignment_id] = {}
-        
-        for session_num in range(assignment.sessions_per_week):
-            x[assignment_id][session_num] = {}
-            
-            for room in rooms:
-                room_id = room.id
-                x[assignment_id][session_num][room_id] = {}
-                
-                for timeslot in range(TOTAL_TIMESLOTS):
-                    var_name = f"x_{assignment_id}_{session_num}_{room_id}_{timeslot}"
-                    x[assignment_id][session_num][room_id][timeslot] = model.NewBoolVar(var_name)
-    
-    return x
-
-
-def add_session_count_constraint(model: cp_model.CpModel, x: dict, assignments: list, rooms: list):
-    """
-    Constraint: Each session must be assigned to exactly one (room, timeslot).
+    With required=True every task that has a legal window must be placed;
+    otherwise the model maximizes the placed entries.
     """
-    for assignment in assignments:
-        assignment_id = assignment.id
-        
-        for session_num in range(assignment.sessions_per_week):
-            # Sum over all rooms and timeslots for this session
-            all_options = []
-            for room in rooms:
-                for timeslot in range(TOTAL_TIMESLOTS):
-                    all_options.append(x[assignment_id][session_num][room.id][timeslot])
-            
-            # Exactly one option must be selected
-            model.Add(sum(all_options) == 1)
-
-
-def add_room_conflict_constraint(model: cp_model.CpModel, x: dict, assignments: list, rooms: list):
-    """
-    Constraint: A room cannot host more than one class at a time.
-    """
-    for room in rooms:
-        for timeslot in range(TOTAL_TIMESLOTS):
-            # Collect all sessions that could use this room at this timeslot
-            sessions_at_slot = []
-            
-            for assignment in assignments:
-                for session_num in range(assignment.sessions_per_week):
-                    sessions_at_slot.append(x[assignment.id][session_num][room.id][timeslot])
-            
-            # At most one session can use this room at this timeslot
-            model.Add(sum(sessions_at_slot) <= 1)
-
-
-def add_teacher_conflict_constraint(model: cp_model.CpModel, x: dict, assignments: list, rooms: list):
-    """
-    Constraint: A faculty cannot teach more than one class at a time.
-    """
-    # Group assignments by faculty
-    faculty_assignments = {}
-    for assignment in assignments:
-        faculty_id = assignment.faculty_id
-        if faculty_id not in faculty_assignments:
-            faculty_assignments[faculty_id] = []
-        faculty_assignments[faculty_id].append(assignment)
-    
-    for faculty_id, faculty_assign_list in faculty_assignments.items():
-        for timeslot in range(TOTAL_TIMESLOTS):
-            # Collect all sessions of this faculty at this timeslot
-            sessions_at_slot = []
-            
-            for assignment in faculty_assign_list:
-                for session_num in range(assignment.sessions_per_week):
-                    for room in rooms:
-                        sessions_at_slot.append(x[assignment.id][session_num][room.id][timeslot])
-            
-            # At most one session for this faculty at this timeslot
-            model.Add(sum(sessions_at_slot) <= 1)
-
-
-def add_section_conflict_constraint(model: cp_model.CpModel, x: dict, assignments: list, rooms: list):
-    """
-    Constraint: A student section cannot attend more than one class at a time.
-    """
-    # Group assignments by section
-    section_assignments = {}
-    for assignment in assignments:
-        section_id = assignment.section_id
-        if section_id not in section_assignments:
-            section_assignments[section_id] = []
-        section_assignments[section_id].append(assignment)
-    
-    for section_id, section_assign_list in section_assignments.items():
-        for timeslot in range(TOTAL_TIMESLOTS):
-            # Collect all sessions of this section at this timeslot
-            sessions_at_slot = []
-            
-            for assignment in section_assign_list:
-                for session_num in range(assignment.sessions_per_week):
-                    for room in rooms:
-                        sessions_at_slot.append(x[assignment.id][session_num][room.id][timeslot])
-            
-            # At most one session for this section at this timeslot
-            model.Add(sum(sessions_at_slot) <= 1)
-
-
-def extract_solution(solver: cp_model.CpSolver, x: dict, assignments: list, rooms: list) -> list:
-    """
-    Extract the solution from the solver.
-    Returns a list of (assignment, room, day, slot) tuples.
-    """
-    solution = []
-    
-    # Create lookup dictionaries
-    assignment_lookup = {a.id: a for a in assignments}
-    room_lookup = {r.id: r for r in rooms}
-    
-    for assignment in assignments:
-        for session_num in range(assignment.sessions_per_week):
-            for room in rooms:
-                for timeslot in range(TOTAL_TIMESLOTS):
-                    if solver.Value(x[assignment.id][session_num][room.id][timeslot]) == 1:
-                        day, slot = get_day_slot_from_index(timeslot)
-                        solution.append({
-                            'assignment': assignment,
-                            'room': room,
-                            'day': day,
-                            'slot': slot,
-                        })
-    
-    return solution
-
-
-def print_schedule(solution: list):
-    """Print the schedule in a readable format."""
-    print("\n" + "=" * 80)
-    print("GENERATED TIMETABLE")
-    print("=" * 80)
-    print(f"{'Day':<12} | {'Slot':<4} | {'Room':<10} | {'Course':<15} | {'Section':<12} | {'Teacher'}")
-    print("-" * 80)
-    
-    # Sort by day, then slot
-    sorted_solution = sorted(solution, key=lambda x: (x['day'], x['slot']))
-    
-    for entry in sorted_solution:
-        day_name = DAY_NAMES[entry['day']]
-        slot = entry['slot']
-        room = entry['room'].code
-        course = entry['assignment'].course.code
-        section = entry['assignment'].section.section_id
-        teacher = entry['assignment'].faculty.name
-        
-        print(f"{day_name:<12} | {slot:<4} | {room:<10} | {course:<15} | {section:<12} | {teacher}")
-    
-    print("=" * 80)
-    print(f"Total scheduled sessions: {len(solution)}")
-    print("=" * 80 + "\n")
-
-
-def save_schedule_to_db(solution: list):
-    """Save the generated schedule to the database."""
-    # Clear previous schedules
-    GeneratedSchedule.objects.all().delete()
-    
-    # Create new schedule entries
-    schedule_entries = []
-    for entry in solution:
-        schedule_entries.append(GeneratedSchedule(
-            day=entry['day'],
-            slot=entry['slot'],
-            room=entry['room'],
-            course=entry['assignment'].course,
-            section=entry['assignment'].section,
-            faculty=entry['assignment'].faculty,
-        ))
-    
-    # Bulk create for efficiency
-    GeneratedSchedule.objects.bulk_create(schedule_entries)
-    print(f"Saved {len(schedule_entries)} schedule entries to database.")
-
-
-def generate_schedule() -> bool:
+
+    def __init__(self, scheduler, tasks, required=False):
+        self.scheduler = scheduler
+        self.tasks = tasks
+        self.model = cp_model.CpModel()
+        grid = scheduler.grid
+        self.grid = grid
+        width = len(grid.days) * grid.slots_per_day
+
+        self.present = []
+        self.starts = []
+        self.choices = []  # per task: [(window, mask, bool)]
+        intervals = []
+        for pos, task in enumerate(tasks):
+            choices = self._windows(task)
+            present = self.model.NewBoolVar(f'p{pos}')
+            if not choices:
+                self.model.Add(present == 0)
+            elif required:
+                self.model.Add(present == 1)
+            starts = sorted({_start(mask) for _, mask in choices}) or [0]
+            start = self.model.NewIntVarFromDomain(cp_model.Domain.FromValues(starts), f's{pos}')
+            literals = []
+            for window, mask in choices:
+                literal = self.model.NewBoolVar('')
+                self.model.Add(start == _start(mask)).OnlyEnforceIf(literal)
+                literals.append((window, mask, literal))
+            self.model.Add(sum(lit for _, _, lit in literals) == present)
+            intervals.append(self.model.NewOptionalFixedSizeIntervalVar(start, task.block_size, present, f'i{pos}'))
+            self.present.append(present)
+            self.starts.append(start)
+            self.choices.append(literals)
+
+        by_resource = {}
+        for pos, task in enumerate(tasks):
+            for key in scheduler._task_resources(task):
+                by_resource.setdefault(key, []).append(pos)
+        for positions in by_resource.values():
+            if len(positions) > 1:
+                self.model.AddNoOverlap([intervals[p] for p in positions])
+
+        index = scheduler.room_index
+        for room_type, rooms in index.rooms.items():
+            users = [(pos, task.room_demand[room_type]) for pos, task in enumerate(tasks)
+                     if task.room_demand.get(room_type)]
+            if not users: continue
+            pool = [intervals[p] for p, _ in users]
+            demands = [d for _, d in users]
+            for bit in range(width):
+                busy = len(rooms) - index.free[room_type][bit].bit_count()
+                if busy:
+                    pool.append(self.model.NewIntervalVar(bit, 1, bit + 1, ''))
+                    demands.append(busy)
+            self.model.AddCumulative(pool, demands, len(rooms))
+
+        self._consecutive_limits(by_resource)
+
+        position = {id(task): pos for pos, task in enumerate(tasks)}
+        for pos, task in enumerate(tasks):
+            earlier = position.get(id(task.copies[task.copy_rank - 1])) if task.copy_rank else None
+            if earlier is None: continue
+            self.model.AddImplication(self.present[pos], self.present[earlier])
+            self.model.Add(self.starts[earlier] < self.starts[pos]).OnlyEnforceIf(self.present[pos])
+        if not required:
+            self.model.Maximize(sum(p * scheduler._entry_count(t) for p, t in zip(self.present, tasks)))
+
+    def _windows(self, task):
+        """(window, mask) candidates: bit-contiguous, free for the task's resources and room types."""
+        scheduler = self.scheduler
+        grid = self.grid
+        index = scheduler.room_index
+        windows, masks, _, _ = scheduler.window_table.table(task.block_size)
+        choices = []
+        for window, mask in zip(windows, masks):
+            low = mask & -mask
+            if mask != low * ((1 << task.block_size) - 1): continue
+            if not grid.all_free(TEACHER, task.teacher_ids, mask): continue
+            if not grid.all_free(SECTION, task.section_ids, mask): continue
+            if any(rt not in index.rooms or index.free_over(rt, mask).bit_count() < n
+                   for rt, n in task.room_demand.items()):
+                continue
+            choices.append((window, mask))
+        return choices
+
+    def _consecutive_limits(self, by_resource):
+        """HC9 rows: at most `limit` single-session or published slots in any limit + 1 of a teacher's day."""
+        scheduler = self.scheduler
+        grid = self.grid
+        limits = {}
+        for task in self.tasks:
+            for teacher in task.teachers():
+                limit = teacher.max_consecutive_hours or scheduler.max_consecutive_hours
+                limits[grid.intern(TEACHER, teacher.teacher_id)] = limit
+
+        for (kind, idx), positions in by_resource.items():
+            if kind != TEACHER: continue
+            positions = [p for p in positions if not self.tasks[p].is_group]
+            limit = limits[idx]
+            busy = grid.busy_mask(TEACHER, idx)
+            if sum(self.tasks[p].block_size for p in positions) + busy.bit_count() <= limit: continue
+            for day in grid.days:
+                shift = grid.day_shift(day)
+                for first in range(grid.slots_per_day - limit):
+                    span = ((1 << (limit + 1)) - 1) << (shift + first)
+                    fixed = (busy & span).bit_count()
+                    terms = [(mask & span).bit_count() * lit for p in positions
+                             for _, mask, lit in self.choices[p] if mask & span]
+                    if len(terms) + fixed > limit:
+                        self.model.Add(sum(terms) <= limit - fixed)
+
+    def hint(self, windows):
+        """Seed the search with a placement: {task position: window}."""
+        # Copies are interchangeable: hand their windows out in canonical order
+        windows = dict(windows)
+        position = {id(task): pos for pos, task in enumerate(self.tasks)}
+        groups = {id(task.copies): task.copies for task in self.tasks if len(task.copies) > 1}
+        for copies in groups.values():
+            ranks = [position[id(c)] for c in copies if id(c) in position]
+            placed = sorted((windows.pop(p) for p in ranks if p in windows),
+                            key=lambda w: _start(self.grid.window_mask(w)))
+            windows.update(zip(ranks, placed))
+
+        for pos, literals in enumerate(self.choices):
+            window = windows.get(pos)
+            self.model.AddHint(self.present[pos], window is not None)
+            for candidate, mask, literal in literals:
+                chosen = window is not None and candidate == window
+                self.model.AddHint(literal, chosen)
+                if chosen:
+                    self.model.AddHint(self.starts[pos], _start(mask))
+
+    def stats(self):
+        proto = self.model.Proto()
+        return {'variables': len(proto.variables), 'constraints': len(proto.constraints)}
+
+    def solve(self, seconds):
+        """Run CP-SAT on every core; ({task position: window}, status name)."""
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = float(seconds)
+        status = solver.Solve(self.model)
+        placed = {}
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            for pos, literals in enumerate(self.choices):
+                for window, _, literal in literals:
+                    if solver.Value(literal):
+                        placed[pos] = window
+                        break
+        return placed, solver.StatusName(status)
+
+
+def _start(mask):
+    """Bit position a window starts at."""
+    return (mask & -mask).bit_length() - 1
+
+
+def _greedy_windows(scheduler, tasks, ts_by_day):
+    """Where a greedy pass on the exact rules would put each task; the scheduler is left untouched."""
+    root = scheduler.trail.checkpoint()
+    for task in tasks:
+        scheduler._greedy_place(task, ts_by_day)
+    windows = {pos: task.window for pos, task in enumerate(tasks) if task.window is not None}
+    scheduler.trail.rollback(root)
+    return windows
+
+
+def solve(scheduler, progress=None, time_budget=None, optimize=None, **_):
     """
-    Main function to generate a conflict-free timetable.
-    
+    Build the timetable with CP-SAT (solver interface, see solvers.py).
+
     Returns:
-        True if a solution was found, False otherwise.
+        bool: True when every task was placed with a room on the exact rules
     """
-    print("Fetching data from database...")
-    data = fetch_data()
-    
-    assignments = data['assignments']
-    rooms = data['rooms']
-    
-    if not assignments:
-        print("No course assignments found. Please add course assignments first.")
-        return False
-    
-    if not rooms:
-        print("No rooms found. Please add rooms first.")
-        return False
-    
-    print(f"Found {len(assignments)} assignments and {len(rooms)} rooms.")
-    
-    # Calculate total sessions needed
-    total_sessions = sum(a.sessions_per_week for a in assignments)
-    print(f"Total sessions to schedule: {total_sessions}")
-    
-    # Create the model
-    print("Creating OR-Tools CP-SAT model...")
-    model = cp_model.CpModel()
-    
-    # Create variables
-    print("Creating decision variables...")
-    x = create_variables(model, assignments, rooms)
-    
-    # Add constraints
-    print("Adding constraints...")
-    
-    print("  - Session count constraint (each session assigned exactly once)")
-    add_session_count_constraint(model, x, assignments, rooms)
-    
-    print("  - Room conflict constraint (no double-booking of rooms)")
-    add_room_conflict_constraint(model, x, assignments, rooms)
-    
-    print("  - Teacher conflict constraint (no double-booking of faculty)")
-    add_teacher_conflict_constraint(model, x, assignments, rooms)
-    
-    print("  - Section conflict constraint (no double-booking of student sections)")
-    add_section_conflict_constraint(model, x, assignments, rooms)
-    
-    # Solve
-    print("Solving...")
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 60.0  # 1 minute timeout
-    
-    status = solver.Solve(model)
-    
-    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        print(f"Solution found! Status: {'OPTIMAL' if status == cp_model.OPTIMAL else 'FEASIBLE'}")
-        
-        # Extract and display solution
-        solution = extract_solution(solver, x, assignments, rooms)
-        print_schedule(solution)
-        
-        # Save to database
-        save_schedule_to_db(solution)
-        
-        return True
-    else:
-        print("\n" + "=" * 80)
-        print("Infeasible: Conflict detected.")
-        print("=" * 80)
-        print("The scheduler could not find a valid timetable with the given constraints.")
-        print("Possible reasons:")
-        print("  - Too many sessions for the available rooms/timeslots")
-        print("  - Faculty workload exceeds available slots")
-        print("  - Conflicting section requirements")
-        print("=" * 80 + "\n")
-        
-        return False
-
-
-if __name__ == "__main__":
-    generate_schedule()
+    tasks, ts_by_day = scheduler._prepare()
+    if time_budget is None:
+        time_budget = getattr(settings, 'SCHEDULER_TIME_BUDGET_SECONDS', 0)
+    deadline = time.monotonic() + (time_budget or DEFAULT_SECONDS)
+    hint = _greedy_windows(scheduler, tasks, ts_by_day)
+
+    placed, status = {}, 'INFEASIBLE'
+    for required in (True, False):
+        remaining = deadline - time.monotonic()
+        if status != 'INFEASIBLE' or remaining <= 0: break
+        model = CpSatModel(scheduler, tasks, required=required)
+        model.hint(hint)
+        if progress:
+            progress({'phase': 'cpsat-model', 'required': required, 'tasks': len(tasks), **model.stats()})
+        placed, status = model.solve(remaining)
+        if progress:
+            progress({'phase': 'cpsat-solved', 'status': status, 'placed': len(placed)})
+    if not placed:
+        placed = hint
+
+    # Rooms in start order; a task whose window no longer passes is placed again below
+    success = True
+    grid = scheduler.grid
+    for pos in sorted(placed, key=lambda p: _start(grid.window_mask(placed[p]))):
+        task, window = tasks[pos], placed[pos]
+        if scheduler._can_place(task, window):
+            scheduler._place(task, window)
+
+    for task in tasks:
+        if task.window is not None or scheduler._greedy_place(task, ts_by_day): continue
+        success = False
+        scheduler.in_greedy_phase = True
+        scheduler._greedy_place(task, ts_by_day)
+        scheduler.in_greedy_phase = False
+    if optimize:
+        scheduler.optimize(tasks, optimize)
+    return success
@@ -0,0 +1,241 @@
+"""
+Pre-Solve Feasibility Analysis
+==============================
+
+Generation only reports an over-full timetable after the exact search has
+spent its budget and the greedy phase has relaxed rooms and conflicts.
+Many of those failures follow from counting alone, so they are checked on
+the prepared tasks before any search runs:
+
+- sections and teachers: the slots their sessions need against the slots
+  still free for them (published schedules already block some)
+- rooms: the room-slots each room type must supply against rooms x free
+  slots, and elective groups needing more parallel rooms than exist
+- per day (pigeonhole): blocks of b slots against the disjoint b-slot
+  stretches between breaks, blocks longer than any such stretch, and a
+  teacher's consecutive-hours limit (HC9) capping each stretch
+
+Every check is a necessary condition: an issue means no exact timetable
+exists and the result will be PARTIAL, while a clean report does not
+promise one. Data gaps the scheduler skips silently (a core course nobody
+teaches, a teacher allocated past max_hours_per_week) are warnings.
+
+Author: M3 Backend Team
+"""
+
+from collections import defaultdict
+
+from .occupancy import TEACHER, ROOM, SECTION
+
+ERROR = 'error'
+WARNING = 'warning'
+
+
+class FeasibilityReport:
+    """
+    Issues found by analyze(), as JSON-ready dicts.
+
+    Each issue has a severity ('error' blocks an exact timetable, 'warning'
+    does not), a kind, the subject it is about, and the required and
+    available counts behind it.
+    """
+
+    def __init__(self):
+        self.issues = []
+        self.stats = {}
+
+    @property
+    def feasible(self):
+        return not any(issue['severity'] == ERROR for issue in self.issues)
+
+    def add(self, severity, kind, subject, required, available, message):
+        self.issues.append({'severity': severity, 'kind': kind, 'subject': subject,
+                            'required': required, 'available': available, 'message': message})
+
+    def as_dict(self):
+        return {'feasible': self.feasible, 'issues': self.issues, 'stats': self.stats}
+
+
+def _free_runs(ts_by_day, breaks, grid, busy):
+    """Lengths of the stretches of free slots between breaks, over every day."""
+    runs = []
+    for day, slots in ts_by_day.items():
+        run = 0
+        for ts in slots:
+            if busy >> grid.bit_index(day, ts.slot_number) & 1:
+                if run: runs.append(run)
+                run = 0
+            else:
+                run += 1
+            if ts.slot_number in breaks.get(day, ()):
+                if run: runs.append(run)
+                run = 0
+        if run: runs.append(run)
+    return runs
+
+
+def _blocks_fit(blocks, runs):
+    """
+    First (block size, blocks, stretches) where blocks of at least that size
+    outnumber the disjoint stretches of it, else None. Each block uses at
+    least b slots of one stretch, so a run of r slots holds r // b of them.
+    """
+    for size in sorted({b for b in blocks if b > 1}):
+        needed = sum(1 for b in blocks if b >= size)
+        available = sum(r // size for r in runs)
+        if needed > available:
+            return size, needed, available
+    return None
+
+
+def analyze(scheduler):
+    """
+    Check a prepared scheduler's tasks against capacity bounds.
+
+    Args:
+        scheduler: TimetableScheduler after _prepare(), with any committed
+            occupancy already on its grid
+
+    Returns:
+        FeasibilityReport
+    """
+    report = FeasibilityReport()
+    problem = scheduler.problem
+    grid = scheduler.grid
+    tasks = scheduler.tasks
+    ts_by_day = scheduler.window_table.ts_by_day
+    breaks = scheduler.window_table.break_after
+    all_slots = grid.window_mask(problem.timeslots)
+    committed_hours = scheduler.committed.teacher_hours if scheduler.committed else {}
+
+    if not problem.sections:
+        report.add(ERROR, 'no_sections', problem.semester, None, 0, "No sections found")
+    if not problem.timeslots:
+        report.add(ERROR, 'no_timeslots', problem.semester, None, 0, "No timeslots available")
+
+    def runs_of(kind, key):
+        busy = grid.busy_mask(kind, grid.intern(kind, key)) & all_slots
+        return _free_runs(ts_by_day, breaks, grid, busy), (all_slots & ~busy).bit_count()
+
+    longest = max(_free_runs(ts_by_day, breaks, grid, 0), default=0)
+    report.stats = {'timeslots': len(problem.timeslots), 'longest_stretch': longest, 'tasks': len(tasks),
+                    'rooms': {rt: len(rooms) for rt, rooms in scheduler.rooms_by_type.items()}}
+
+    section_blocks = defaultdict(list)
+    teacher_blocks = defaultdict(list)
+    hc9_blocks = defaultdict(list)  # HC9 is only checked for single sessions
+    teachers = {}
+    room_blocks = defaultdict(list)
+    too_long = set()
+    for task in tasks:
+        for section in task.all_sections():
+            section_blocks[section.class_id].append(task.block_size)
+        for teacher in set(task.teachers()):
+            teachers[teacher.teacher_id] = teacher
+            teacher_blocks[teacher.teacher_id].append(task.block_size)
+            if not task.is_group: hc9_blocks[teacher.teacher_id].append(task.block_size)
+        for room_type, count in task.room_demand.items():
+            room_blocks[room_type].extend([task.block_size] * count)
+        if task.block_size > longest:
+            too_long.add(task.group_name or task.course.course_id)
+    report.stats['sessions'] = sum(t.block_size for t in tasks)
+
+    for subject in sorted(too_long):
+        report.add(ERROR, 'window', subject, None, longest,
+                   f"{subject} has a block longer than the {longest} slots between any two breaks")
+
+    # Sections
+    for class_id in sorted(section_blocks):
+        blocks = section_blocks[class_id]
+        runs, free = runs_of(SECTION, class_id)
+        if sum(blocks) > free:
+            report.add(ERROR, 'section_hours', class_id, sum(blocks), free,
+                       f"Section {class_id} needs {sum(blocks)} slots but has {free}")
+            continue
+        short = _blocks_fit(blocks, runs)
+        if short:
+            size, needed, available = short
+            report.add(ERROR, 'section_blocks', class_id, needed, available,
+                       f"Section {class_id} has {needed} sessions of {size}+ slots but only {available} "
+                       f"{size}-slot stretches between breaks")
+
+    # Teachers
+    for teacher_id in sorted(teacher_blocks):
+        teacher = teachers[teacher_id]
+        blocks = teacher_blocks[teacher_id]
+        hours = sum(blocks)
+        runs, free = runs_of(TEACHER, teacher_id)
+        limit = teacher.max_consecutive_hours or scheduler.max_consecutive_hours
+        allocated = hours + committed_hours.get(teacher_id, 0)
+        if allocated > teacher.max_hours_per_week:
+            report.add(WARNING, 'teacher_max_hours', teacher_id, allocated, teacher.max_hours_per_week,
+                       f"Teacher {teacher_id} is allocated {allocated} slots, above max_hours_per_week "
+                       f"({teacher.max_hours_per_week})")
+        if hours > free:
+            report.add(ERROR, 'teacher_hours', teacher_id, hours, free,
+                       f"Teacher {teacher_id} needs {hours} slots but has {free}")
+            continue
+        single = hc9_blocks[teacher_id]
+        if single and max(single) > limit:
+            report.add(ERROR, 'teacher_consecutive', teacher_id, max(single), limit,
+                       f"Teacher {teacher_id} has a {max(single)}-slot block but may teach at most {limit} in a row")
+            continue
+        # At most `limit` of every limit + 1 slots of a stretch
+        capacity = sum(r - r // (limit + 1) for r in runs)
+        if sum(single) > capacity:
+            report.add(ERROR, 'teacher_consecutive', teacher_id, sum(single), capacity,
+                       f"Teacher {teacher_id} needs {sum(single)} slots but at most {limit} in a row leaves {capacity}")
+            continue
+        short = _blocks_fit(blocks, runs)
+        if short:
+            size, needed, available = short
+            report.add(ERROR, 'teacher_blocks', teacher_id, needed, available,
+                       f"Teacher {teacher_id} has {needed} sessions of {size}+ slots but only {available} "
+                       f"{size}-slot stretches between breaks")
+
+    # Room types
+    for room_type in sorted(room_blocks):
+        blocks = room_blocks[room_type]
+        rooms = scheduler.rooms_by_type.get(room_type, [])
+        room_runs, free = [], 0
+        for room in rooms:
+            runs, room_free = runs_of(ROOM, room.room_id)
+            room_runs.extend(runs)
+            free += room_free
+        if sum(blocks) > free:
+            report.add(ERROR, 'room_hours', room_type, sum(blocks), free,
+                       f"Sessions need {sum(blocks)} {room_type} room-slots but {len(rooms)} rooms offer {free}")
+            continue
+        short = _blocks_fit(blocks, room_runs)
+        if short:
+            size, needed, available = short
+            report.add(ERROR, 'room_blocks', room_type, needed, available,
+                       f"{needed} sessions of {size}+ slots need a {room_type} room but only {available} "
+                       f"{size}-slot room stretches exist")
+
+    # Elective groups: every course of a group runs at once, each in its own room
+    for group in sorted({t.group_name for t in tasks if t.is_group and not t.is_project}):
+        demand = defaultdict(int)
+        for task in tasks:
+            if task.group_name != group or task.is_project: continue
+            for room_type, count in task.room_demand.items():
+                demand[room_type] = max(demand[room_type], count)
+        for room_type, count in sorted(demand.items()):
+            rooms = len(scheduler.rooms_by_type.get(room_type, []))
+            if count > rooms:
+                report.add(ERROR, 'group_rooms', group, count, rooms,
+                           f"Elective group {group} runs {count} courses at once but there are {rooms} "
+                           f"{room_type} rooms")
+
+    # Data the scheduler skips without an error
+    for section in problem.sections:
+        for course in problem.core_courses(section.year):
+            if not problem.mappings_for(course.course_id, section.class_id):
+                report.add(WARNING, 'unstaffed', f"{course.course_id}/{section.class_id}", course.weekly_slots, 0,
+                           f"No teacher is mapped to {course.course_id} for section {section.class_id}; "
+                           f"it will not be scheduled")
+    for group, courses in problem.elective_groups.items():
+        if courses and not problem.group_mappings.get(group):
+            report.add(WARNING, 'unstaffed', group, courses[0].weekly_slots, 0,
+                       f"Elective group {group} has no teacher mappings; it will not be scheduled")
+    return report
@@ -0,0 +1,98 @@
+"""
+Generation Fingerprint Cache
+============================
+
+Pressing Generate again on unchanged data used to run the whole pipeline
+again. Each generation now hashes its inputs - the semester's courses,
+the scheduled sections, rooms, timeslots, teachers, mappings, the cells
+held by published schedules and the solver configuration - into an input
+fingerprint stored on the Schedule. A later run with the same fingerprint
+copies the earlier schedule's entries with one INSERT ... SELECT instead
+of solving.
+
+A schedule is only reused while its entries still hash to the digest
+recorded when they were generated, so manually edited timetables never
+leak into new generations.
+
+Author: M3 Backend Team
+"""
+
+import hashlib
+
+from django.db import connection
+
+from core.models import Schedule, ScheduleEntry
+from .incremental import ENTRY_FIELDS
+
+# Bump when a scheduler change alters the timetable produced for the same inputs
+FINGERPRINT_VERSION = 2
+
+# Statuses whose entries are a finished generation
+REUSABLE_STATUSES = ('COMPLETED', 'PARTIAL', 'PUBLISHED')
+
+
+def _rows(objects):
+    """Every concrete field of each model instance, sorted by repr so query order does not matter."""
+    rows = [tuple(getattr(obj, f.attname) for f in obj._meta.concrete_fields) for obj in objects]
+    return sorted(rows, key=repr)
+
+
+def input_fingerprint(problem, config, committed=None):
+    """
+    SHA-256 over a ProblemInstance, a committed occupancy and a solver configuration.
+
+    Args:
+        problem: Loaded ProblemInstance
+        config: Dict of solver options that influence the result
+        committed: Optional CommittedOccupancy pre-blocked for the run
+    """
+    mappings = [m for group in (problem.section_mappings, problem.year_wide_mappings)
+                for ms in group.values() for m in ms]
+    payload = [
+        FINGERPRINT_VERSION,
+        problem.semester,
+        _rows(problem.sections),
+        _rows(problem.timeslots),
+        _rows(problem.rooms),
+        _rows(problem.teachers.values()),
+        _rows(problem.courses.values()),
+        _rows(mappings),
+        sorted(committed.teacher_cells) if committed else [],
+        sorted(committed.room_cells) if committed else [],
+        sorted(config.items()),
+    ]
+    return hashlib.sha256(repr(payload).encode()).hexdigest()
+
+
+def entries_digest(rows):
+    """SHA-256 over entry value tuples in ENTRY_FIELDS order."""
+    return hashlib.sha256(repr(sorted(rows, key=repr)).encode()).hexdigest()
+
+
+def stored_digest(schedule):
+    return entries_digest(ScheduleEntry.objects.filter(schedule=schedule).values_list(*ENTRY_FIELDS))
+
+
+def find_cached(fingerprint, exclude=None):
+    """Newest finished schedule generated from this fingerprint whose entries are unedited."""
+    candidates = Schedule.objects.filter(input_fingerprint=fingerprint, status__in=REUSABLE_STATUSES)
+    if exclude is not None:
+        candidates = candidates.exclude(schedule_id=exclude)
+    for schedule in candidates.order_by('-created_at'):
+        if schedule.entries_digest and stored_digest(schedule) == schedule.entries_digest:
+            return schedule
+    return None
+
+
+def copy_entries(source, target):
+    """Copy every entry of `source` into `target` inside the database; the number of rows copied."""
+    meta = ScheduleEntry._meta
+    columns = [f.column for f in meta.concrete_fields if f.name not in ('id', 'schedule')]
+    schedule_column = meta.get_field('schedule').column
+    quote = connection.ops.quote_name
+    column_list = ', '.join(quote(c) for c in columns)
+    sql = (f"INSERT INTO {quote(meta.db_table)} ({quote(schedule_column)}, {column_list}) "
+           f"SELECT %s, {column_list} FROM {quote(meta.db_table)} WHERE {quote(schedule_column)} = %s")
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [target.schedule_id, source.schedule_id])
+        return cursor.rowcount
@@ -0,0 +1,181 @@
+"""
+Incremental Re-generation
+=========================
+
+Re-solves only the part of a timetable touched by a data change.
+
+Given a base schedule and the teachers, sections, courses and rooms that
+changed, the plan:
+1. Groups the base entries into sessions keyed the way the scheduler
+   builds its tasks - one key per (section, course), per elective group
+   and per project-phase course - so a key is always pinned or re-placed
+   as a whole.
+2. Rips out every key with an entry that touches a changed entity, plus
+   its neighbourhood: the other keys of the same section on the same day,
+   so the re-placed sessions have room to move.
+3. Pins everything else. Pinned entries are copied into the new schedule
+   unchanged and pre-occupy the grid; the search only places the tasks of
+   ripped keys (and of keys the base never placed).
+
+Ripped (section, course) keys keep their base teacher unless that teacher
+changed, so a neighbourhood re-placement never swaps who teaches a class.
+
+Author: M3 Backend Team
+"""
+
+from collections import defaultdict
+
+from core.models import ScheduleEntry
+from .occupancy import TEACHER, SECTION
+from .problem import is_project_phase
+
+CHANGE_KINDS = ('teachers', 'sections', 'courses', 'rooms')
+# Also re-place the other sessions of an affected section on the same day
+NEIGHBOURHOOD = True
+
+ENTRY_FIELDS = ('section_id', 'course_id', 'teacher_id', 'room_id', 'timeslot_id',
+                'is_lab_session', 'session_type', 'constraint_reason')
+
+
+def normalize_changes(changes):
+    """
+    Validate a {kind: [ids]} change description.
+
+    Raises:
+        ValueError: on an unknown kind or a non-list value
+    """
+    unknown = set(changes) - set(CHANGE_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown change kinds: {', '.join(sorted(unknown))}")
+    normalized = {}
+    for kind in CHANGE_KINDS:
+        ids = changes.get(kind) or []
+        if not isinstance(ids, (list, tuple, set, frozenset)):
+            raise ValueError(f"'{kind}' must be a list of ids")
+        normalized[kind] = frozenset(str(i) for i in ids)
+    return normalized
+
+
+def task_key(task):
+    """Session key of a scheduler task."""
+    if task.is_project:
+        return ('project', task.sub_tasks[0].course.course_id)
+    if task.is_group:
+        return ('group', task.group_name)
+    return ('course', task.sections[0].class_id, task.course.course_id)
+
+
+class IncrementalPlan:
+    """
+    Pinned and ripped sessions of a base schedule for one change set.
+
+    Usage:
+        plan = IncrementalPlan(base_schedule, problem, {'teachers': ['T007']})
+        tasks = [t for t in tasks if not plan.covers(t)]
+    """
+
+    def __init__(self, base, problem, changes):
+        self.problem = problem
+        self.changes = normalize_changes(changes)
+        self.timeslots = {ts.slot_id: ts for ts in problem.timeslots}
+        rows = list(ScheduleEntry.objects.filter(schedule=base).values(*ENTRY_FIELDS))
+
+        by_key = defaultdict(list)
+        for row in rows:
+            by_key[self._entry_key(row)].append(row)
+
+        ripped = set(self._changed_course_keys())
+        affected_days = set()
+        for key, key_rows in by_key.items():
+            hits = [r for r in key_rows if self._touches(r)]
+            if hits:
+                ripped.add(key)
+                affected_days.update((r['section_id'], self.timeslots[r['timeslot_id']].day) for r in hits)
+
+        if NEIGHBOURHOOD and affected_days:
+            for key, key_rows in by_key.items():
+                if key in ripped: continue
+                if any((r['section_id'], self.timeslots[r['timeslot_id']].day) in affected_days for r in key_rows):
+                    ripped.add(key)
+
+        self.ripped = ripped
+        self.pinned_keys = set(by_key) - ripped
+        self.pinned = [r for key in self.pinned_keys for r in by_key[key]]
+        self.ripped_count = sum(len(by_key[k]) for k in ripped if k in by_key)
+
+        # Teacher continuity for re-placed (section, course) sessions
+        self.base_teachers = {}
+        changed_teachers = self.changes['teachers']
+        for key in ripped:
+            if key[0] != 'course' or key not in by_key: continue
+            teacher_id = by_key[key][0]['teacher_id']
+            if teacher_id not in changed_teachers:
+                self.base_teachers[(key[2], key[1])] = teacher_id
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def _entry_key(self, row):
+        course = self.problem.courses.get(row['course_id'])
+        if course is not None:
+            if is_project_phase(course):
+                return ('project', course.course_id)
+            group = course.elective_group
+            if course in self.problem.elective_groups.get(group, ()):
+                return ('group', group)
+        return ('course', row['section_id'], row['course_id'])
+
+    def _changed_course_keys(self):
+        """Group/project keys of changed courses, even when the base never placed them."""
+        for course_id in self.changes['courses']:
+            course = self.problem.courses.get(course_id)
+            if course is None: continue
+            if is_project_phase(course):
+                yield ('project', course_id)
+            elif course in self.problem.elective_groups.get(course.elective_group, ()):
+                yield ('group', course.elective_group)
+
+    def _touches(self, row):
+        changes = self.changes
+        if row['teacher_id'] in changes['teachers'] or row['section_id'] in changes['sections'] \
+                or row['course_id'] in changes['courses']:
+            return True
+        if changes['rooms']:
+            # A room change can also free or add capacity for TBA sessions
+            return row['room_id'] in changes['rooms'] or row['room_id'] is None
+        return False
+
+    # ------------------------------------------------------------------
+    # Scheduler hooks
+    # ------------------------------------------------------------------
+
+    def covers(self, task):
+        """True if the task's session is pinned from the base schedule."""
+        return task_key(task) in self.pinned_keys
+
+    def apply_teachers(self, teacher_assignments):
+        """Keep the base teacher of re-placed sessions where still eligible."""
+        problem = self.problem
+        for (course_id, class_id), teacher_id in self.base_teachers.items():
+            if (course_id, class_id) not in teacher_assignments: continue
+            eligible = [m.teacher for m in problem.mappings_for(course_id, class_id) if m.teacher.teacher_id == teacher_id]
+            if eligible:
+                teacher_assignments[(course_id, class_id)] = eligible[0]
+
+    def occupy(self, scheduler):
+        """Mark every pinned entry busy on the scheduler's grid and counters."""
+        grid = scheduler.grid
+        for row in self.pinned:
+            ts = self.timeslots[row['timeslot_id']]
+            bit = grid.slot_bit(ts.day, ts.slot_number)
+            grid.occupy(TEACHER, grid.intern(TEACHER, row['teacher_id']), bit)
+            grid.occupy(SECTION, grid.intern(SECTION, row['section_id']), bit)
+            scheduler.slot_utilization[(ts.day, ts.slot_number)] += 1
+            if row['room_id']:
+                scheduler.room_index.occupy(row['room_id'], bit)
+
+    def rows(self):
+        """The pinned entries as value tuples in ENTRY_FIELDS order (see persist.write_entries)."""
+        for row in self.pinned:
+            yield tuple(row[f] for f in ENTRY_FIELDS)
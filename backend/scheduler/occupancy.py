@@ -0,0 +1,153 @@
+"""
+Bitset Occupancy Grid for the Timetable Scheduler
+=================================================
+
+Tracks which teachers, rooms and sections are busy during the week.
+
+Every resource is interned to a small integer and owns a single Python int
+whose bits mark its occupied slots (bit = day_index * slots_per_day +
+slot_number - 1). Asking "is this window free for all these resources" is
+then one AND per resource instead of hashing an (id, day, slot) tuple for
+every slot of the window.
+
+Author: M3 Backend Team
+"""
+
+TEACHER = 0
+ROOM = 1
+SECTION = 2
+
+# TimeSlot.slot_number is validated to 1..10
+MAX_SLOTS_PER_DAY = 10
+
+
+def _run_lengths(width):
+    """Longest run of set bits for every integer of `width` bits."""
+    runs = [0] * (1 << width)
+    for bits in range(1, 1 << width):
+        # A run either ends at bit 0 or survives the shift into bits >> 1
+        trailing = ((bits + 1) & ~bits).bit_length() - 1
+        runs[bits] = max(runs[bits >> 1], trailing)
+    return runs
+
+
+# RUN_LENGTH[day bits] = longest run of back-to-back busy slots on that day
+RUN_LENGTH = _run_lengths(MAX_SLOTS_PER_DAY)
+
+
+class OccupancyGrid:
+    """
+    Per-resource weekly bitmasks with integer interning.
+
+    Usage:
+        grid = OccupancyGrid(['MON', 'TUE', 'WED', 'THU', 'FRI'])
+        t = grid.intern(TEACHER, 'T001')
+        mask = grid.window_mask(window)
+        if grid.is_free(TEACHER, t, mask):
+            grid.occupy(TEACHER, t, mask)
+    """
+
+    def __init__(self, days, slots_per_day=MAX_SLOTS_PER_DAY):
+        self.days = list(days)
+        self.slots_per_day = slots_per_day
+        self.day_index = {day: i for i, day in enumerate(self.days)}
+        self.day_full_mask = (1 << slots_per_day) - 1
+        self._ids = ({}, {}, {})
+        self._keys = ([], [], [])
+        self._masks = ([], [], [])
+        # Optional scheduler.trail.Trail; when set, mutations are undoable
+        self.trail = None
+
+    # ------------------------------------------------------------------
+    # Interning
+    # ------------------------------------------------------------------
+
+    def intern(self, kind, key):
+        """Return the integer id for a resource key, allocating one if new."""
+        ids = self._ids[kind]
+        idx = ids.get(key)
+        if idx is None:
+            idx = len(self._keys[kind])
+            ids[key] = idx
+            self._keys[kind].append(key)
+            self._masks[kind].append(0)
+        return idx
+
+    def key_of(self, kind, idx):
+        return self._keys[kind][idx]
+
+    def size(self, kind):
+        return len(self._keys[kind])
+
+    # ------------------------------------------------------------------
+    # Slot <-> bit conversion
+    # ------------------------------------------------------------------
+
+    def bit_index(self, day, slot_number):
+        return self.day_index[day] * self.slots_per_day + slot_number - 1
+
+    def slot_bit(self, day, slot_number):
+        return 1 << self.bit_index(day, slot_number)
+
+    def window_mask(self, window):
+        """OR together the bits of every TimeSlot in a window."""
+        mask = 0
+        for ts in window:
+            mask |= 1 << self.bit_index(ts.day, ts.slot_number)
+        return mask
+
+    def day_shift(self, day):
+        return self.day_index[day] * self.slots_per_day
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def is_free(self, kind, idx, mask):
+        return not (self._masks[kind][idx] & mask)
+
+    def all_free(self, kind, idxs, mask):
+        masks = self._masks[kind]
+        for idx in idxs:
+            if masks[idx] & mask:
+                return False
+        return True
+
+    def busy_mask(self, kind, idx):
+        return self._masks[kind][idx]
+
+    def state_key(self):
+        """Hashable snapshot of every resource's occupancy."""
+        return tuple(tuple(masks) for masks in self._masks)
+
+    def day_bits(self, kind, idx, day):
+        """Occupied slots of one resource on one day, bit 0 = slot 1."""
+        return (self._masks[kind][idx] >> self.day_shift(day)) & self.day_full_mask
+
+    def longest_run(self, kind, idx, day, mask=0):
+        """Longest run of back-to-back busy slots of a resource on a day, with `mask` occupied too."""
+        return RUN_LENGTH[((self._masks[kind][idx] | mask) >> self.day_shift(day)) & self.day_full_mask]
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def occupy(self, kind, idx, mask):
+        masks = self._masks[kind]
+        if self.trail is not None:
+            self.trail.assign(masks, idx, masks[idx] | mask)
+        else:
+            masks[idx] |= mask
+
+    def release(self, kind, idx, mask):
+        masks = self._masks[kind]
+        if self.trail is not None:
+            self.trail.assign(masks, idx, masks[idx] & ~mask)
+        else:
+            masks[idx] &= ~mask
+
+    def clear(self):
+        """Free every resource while keeping the interned ids stable."""
+        for masks in self._masks:
+            for i in range(len(masks)):
+                masks[i] = 0
@@ -0,0 +1,206 @@
+"""
+Local-Search Improvement Phase
+==============================
+
+Simulated annealing over a finished timetable. Construction stops at the
+first feasible (or greedy-completed) layout; this phase keeps moving
+sessions around to lower a penalty made of:
+1. Sessions the greedy phase could not place at all.
+2. Entries left without a room ("TBA").
+3. Idle slots between a teacher's or a section's first and last class of
+   a day.
+4. Uneven daily loads of a section (sum of squared classes per day).
+
+Moves work on the scheduler's live state and reuse its own primitives:
+- relocate: release a session and place it at another window
+- swap: exchange the windows of two sessions of the same length
+- room: re-place a TBA session at its own window to pick up a freed room
+Sessions the greedy phase left out are relocated on its relaxed rules (a
+TBA room is far cheaper than a missing class); every other move must pass
+the exact phase's checks.
+
+Only the teachers and sections touched by a move, on the days it touches,
+are re-scored (delta scoring). Rejected moves are undone through the
+trail. The best layout seen is re-placed from scratch at the end, which
+also rebuilds the entry list.
+
+Author: M3 Backend Team
+"""
+
+import math
+import time
+from collections import defaultdict
+
+from .occupancy import TEACHER, SECTION
+
+# Penalty weights (lower total is better)
+W_MISSING = 1000   # per entry of a session that is not placed
+W_TBA = 50         # per entry without a room
+W_GAP = 3          # per idle slot inside a teacher's or section's day
+W_LOAD = 1         # per squared daily class count of a section
+
+START_TEMPERATURE = 20.0
+END_TEMPERATURE = 0.5
+SWAP_RATE = 0.4
+
+
+class LocalSearch:
+    """
+    Annealing driver over a TimetableScheduler after construction.
+
+    The scheduler supplies:
+        _task_resources(task), _entry_count(task), _tba_count(task)
+        _release(task), _can_place(task, window), _place(task, window)
+        _rooms_of(task) / _set_rooms(task, rooms), _rebuild(tasks, layout)
+        window_table, grid, trail
+    Each task carries its current window in task.window (None if unplaced).
+    """
+
+    def __init__(self, scheduler, tasks, rng):
+        self.scheduler = scheduler
+        self.tasks = tasks
+        self.rng = rng
+        self.grid = scheduler.grid
+        self.resources = [scheduler._task_resources(t) for t in tasks]
+        self.by_size = defaultdict(list)
+        for pos, task in enumerate(tasks):
+            self.by_size[task.block_size].append(pos)
+        self.moves = 0
+        self.accepted = 0
+        self.current = 0
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def _day_term(self, kind, idx, day):
+        bits = self.grid.day_bits(kind, idx, day)
+        if not bits: return 0
+        load = bits.bit_count()
+        gaps = bits.bit_length() - (bits & -bits).bit_length() + 1 - load
+        if kind == SECTION:
+            return W_GAP * gaps + W_LOAD * load * load
+        return W_GAP * gaps
+
+    def _task_term(self, pos):
+        task = self.tasks[pos]
+        if task.window is None:
+            return W_MISSING * self.scheduler._entry_count(task)
+        return W_TBA * self.scheduler._tba_count(task)
+
+    def score(self):
+        """Full penalty of the current layout."""
+        days = self.grid.days
+        keys = {key for res in self.resources for key in res if key[0] in (TEACHER, SECTION)}
+        total = sum(self._day_term(kind, idx, day) for kind, idx in keys for day in days)
+        return total + sum(self._task_term(pos) for pos in range(len(self.tasks)))
+
+    def _cost(self, keys, positions):
+        return sum(self._day_term(*key) for key in keys) + sum(self._task_term(pos) for pos in positions)
+
+    def _affected(self, moves):
+        """(kind, idx, day) terms a move can change."""
+        days = set()
+        for pos, window in moves:
+            days.add(window[0].day)
+            old = self.tasks[pos].window
+            if old is not None: days.add(old[0].day)
+        return {(kind, idx, day) for pos, _ in moves for kind, idx in self.resources[pos] for day in days}
+
+    # ------------------------------------------------------------------
+    # Moves
+    # ------------------------------------------------------------------
+
+    def _propose(self):
+        """A move as [(task position, target window), ...]."""
+        rng = self.rng
+        tasks = self.tasks
+        pos = rng.randrange(len(tasks))
+        task = tasks[pos]
+        window = task.window
+        if window is not None:
+            if self.scheduler._tba_count(task):
+                return [(pos, window)]
+            if rng.random() < SWAP_RATE:
+                other = rng.choice(self.by_size[task.block_size])
+                other_window = tasks[other].window
+                if other != pos and other_window is not None and other_window != window:
+                    return [(pos, other_window), (other, window)]
+        windows = self.scheduler.window_table.table(task.block_size)[0]
+        return [(pos, rng.choice(windows))]
+
+    def _apply(self, moves):
+        scheduler = self.scheduler
+        inserts = set()
+        for pos, _ in moves:
+            if self.tasks[pos].window is None: inserts.add(pos)
+            else: scheduler._release(self.tasks[pos])
+        for pos, window in moves:
+            task = self.tasks[pos]
+            # Sessions construction could not place come back on the greedy phase's relaxed rules
+            scheduler.in_greedy_phase = pos in inserts
+            feasible = scheduler._can_place(task, window)
+            scheduler.in_greedy_phase = False
+            if not feasible: return False
+            scheduler._place(task, window)
+        return True
+
+    def step(self, temperature):
+        """Propose, score and accept or undo one move; the accepted delta or None."""
+        scheduler = self.scheduler
+        trail = scheduler.trail
+        moves = self._propose()
+        positions = [pos for pos, _ in moves]
+        keys = self._affected(moves)
+        before = self._cost(keys, positions)
+        rooms = [scheduler._rooms_of(self.tasks[pos]) for pos in positions]
+        mark = trail.checkpoint()
+        self.moves += 1
+
+        if self._apply(moves):
+            delta = self._cost(keys, positions) - before
+            if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                trail.reset()
+                self.accepted += 1
+                self.current += delta
+                return delta
+
+        trail.rollback(mark)
+        for pos, saved in zip(positions, rooms):
+            scheduler._set_rooms(self.tasks[pos], saved)
+        return None
+
+    # ------------------------------------------------------------------
+    # Driver
+    # ------------------------------------------------------------------
+
+    def _layout(self):
+        scheduler = self.scheduler
+        return [(t.window, scheduler._rooms_of(t)) for t in self.tasks]
+
+    def run(self, time_budget, max_moves=None):
+        """
+        Anneal for `time_budget` seconds (or `max_moves` moves, whichever
+        ends first), then re-place the best layout found.
+
+        Returns:
+            tuple: (initial penalty, final penalty)
+        """
+        if not self.tasks or not (time_budget or max_moves): return 0, 0
+        self.current = initial = best = self.score()
+        best_layout = self._layout()
+        started = time.time()
+        ratio = END_TEMPERATURE / START_TEMPERATURE
+
+        while True:
+            progress = (time.time() - started) / time_budget if time_budget else 0.0
+            if max_moves is not None:
+                progress = max(progress, self.moves / max_moves)
+            if progress >= 1: break
+            delta = self.step(START_TEMPERATURE * ratio ** progress)
+            if delta is not None and self.current < best:
+                best = self.current
+                best_layout = self._layout()
+
+        self.scheduler._rebuild(self.tasks, best_layout)
+        return initial, best
@@ -0,0 +1,105 @@
+"""
+Entry Persistence
+=================
+
+generate() used to clear a schedule through the ORM, which loads every
+old entry to collect cascades and send signals, and to write the new
+timetable as one unbatched bulk_create of ScheduleEntry instances - a
+single INSERT that can pass SQLite's bound-parameter limit. Entries are
+now persisted by a dedicated stage:
+
+- purge_entries(): one DELETE ... WHERE schedule_id = %s; nothing
+  references a ScheduleEntry and no signal listens for one
+- entry_rows(): value tuples in ENTRY_FIELDS order, read straight off
+  the scheduler's Entry records without building model instances
+- write_entries(): COPY ... FROM STDIN on PostgreSQL, elsewhere one
+  parameterized INSERT run through executemany() per batch of
+  SCHEDULER_PERSIST_BATCH_SIZE rows
+
+write_entries() returns the stage's metrics (rows, seconds, rows per
+second), which generate() keeps in Schedule.generation_metrics.
+
+Author: M3 Backend Team
+"""
+
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from core.models import ScheduleEntry
+
+from .incremental import ENTRY_FIELDS
+
+# Rows per INSERT batch when SCHEDULER_PERSIST_BATCH_SIZE is not set
+BATCH_SIZE = 2000
+
+
+def _table():
+    """Quoted table name and column list: schedule, ENTRY_FIELDS, last_modified."""
+    meta = ScheduleEntry._meta
+    quote = connection.ops.quote_name
+    names = ('schedule_id',) + ENTRY_FIELDS + ('last_modified',)
+    return quote(meta.db_table), ', '.join(quote(meta.get_field(n).column) for n in names)
+
+
+def purge_entries(schedule):
+    """Delete every entry of a schedule with one statement; the number of rows deleted."""
+    meta = ScheduleEntry._meta
+    quote = connection.ops.quote_name
+    sql = f"DELETE FROM {quote(meta.db_table)} WHERE {quote(meta.get_field('schedule').column)} = %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [schedule.schedule_id])
+        return cursor.rowcount
+
+
+def entry_rows(entries):
+    """Value tuples in ENTRY_FIELDS order for scheduler Entry records."""
+    for e in entries:
+        yield (e.section.pk, e.course.pk, e.teacher.pk, e.room.pk if e.room else None, e.timeslot.pk,
+               e.is_lab, e.session_type, e.constraint_reason)
+
+
+def write_entries(schedule, rows, batch_size=None):
+    """
+    Insert entry rows (tuples in ENTRY_FIELDS order) for a schedule.
+
+    Args:
+        batch_size: Rows per INSERT batch (default settings.SCHEDULER_PERSIST_BATCH_SIZE);
+            COPY streams every row at once
+
+    Returns:
+        dict: rows, seconds, rows_per_second and the method used ('copy' or 'insert')
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, 'SCHEDULER_PERSIST_BATCH_SIZE', BATCH_SIZE)
+    started = time.perf_counter()
+    table, columns = _table()
+    schedule_id = schedule.schedule_id
+    now = timezone.now()
+    count = 0
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            method = 'copy'
+            with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row((schedule_id, *row, now))
+                    count += 1
+        else:
+            method = 'insert'
+            stamp = connection.ops.adapt_datetimefield_value(now)
+            placeholders = ', '.join(['%s'] * (len(ENTRY_FIELDS) + 2))
+            sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+            rows = iter(rows)
+            while True:
+                batch = [(schedule_id, *row, stamp) for row in islice(rows, batch_size)]
+                if not batch: break
+                cursor.executemany(sql, batch)
+                count += len(batch)
+
+    seconds = time.perf_counter() - started
+    return {'method': method, 'rows': count, 'seconds': round(seconds, 4),
+            'rows_per_second': round(count / seconds) if seconds > 0 else None}
@@ -0,0 +1,76 @@
+"""
+Randomized-Restart Portfolio
+============================
+
+Runs several seeded variants of the scheduler side by side in a process
+pool. Variant 0 is the plain deterministic search; the others shuffle the
+tie-breaks between equally good days, windows and tasks, so one unlucky
+early ordering no longer decides the outcome of the whole generation.
+
+The ProblemInstance is pickled once and handed to each worker process when
+it starts, so variants never touch the database: they build their
+timetable in memory and send the entries back. The parent keeps the first
+variant whose exact search placed every task, or, if none does, the best
+partial result, and persists only that one.
+
+Author: M3 Backend Team
+"""
+
+import os
+from concurrent.futures import as_completed
+
+from .workers import process_pool, shared
+
+
+def _solve_variant(seed, time_budget, optimize):
+    """Solve one seeded variant in a worker process."""
+    from .algorithm import TimetableScheduler
+
+    schedule, problem, committed = shared()
+    scheduler = TimetableScheduler(schedule, problem=problem, seed=seed or None)
+    scheduler.committed = committed
+    success = scheduler.solve(time_budget=time_budget, optimize=optimize)
+    return seed, success, list(scheduler.entries)
+
+
+def rank(success, entries):
+    """Ordering key for variant results: complete first, then most placed, then fewest TBA rooms."""
+    return (success, len(entries), -sum(1 for e in entries if e.room is None))
+
+
+def run_portfolio(schedule, problem, variants, time_budget=None, optimize=None, progress=None, workers=None,
+                  committed=None):
+    """
+    Race `variants` seeded searches and return the winner.
+
+    Args:
+        schedule: Schedule being generated (only read by the workers)
+        problem: Loaded ProblemInstance shared by every variant
+        variants: Number of variants, seeds 0..variants-1
+        time_budget: Search seconds per variant (see TimetableScheduler.generate)
+        optimize: Local-search seconds per variant (see TimetableScheduler.generate)
+        progress: Optional callable receiving progress dicts
+        workers: Process count (default: one per variant, at most one per CPU)
+        committed: Optional CommittedOccupancy pre-blocked in every variant
+
+    Returns:
+        tuple: (success, entries) of the selected variant
+    """
+    workers = workers or min(variants, os.cpu_count() or 1)
+
+    best = None
+    executor = process_pool(schedule, problem, committed, workers)
+    try:
+        futures = [executor.submit(_solve_variant, seed, time_budget, optimize) for seed in range(variants)]
+        for finished, future in enumerate(as_completed(futures), 1):
+            seed, success, entries = future.result()
+            if progress:
+                progress({'phase': 'portfolio', 'finished': finished, 'variants': variants, 'seed': seed, 'complete': success})
+            if best is None or rank(success, entries) > rank(best[0], best[1]):
+                best = (success, entries)
+            if success:
+                break
+    finally:
+        # Variants still running are bounded by their own time budget
+        executor.shutdown(wait=False, cancel_futures=True)
+    return best
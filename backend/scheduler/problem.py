@@ -0,0 +1,166 @@
+"""
+Problem Instance Snapshot for Timetable Generation
+==================================================
+
+Loads every input the scheduler needs in a constant number of queries and
+exposes it as an immutable, pre-indexed ProblemInstance. The generator reads
+only from this snapshot, so no ORM round-trips happen inside its loops.
+
+Indexes provided:
+- courses by (year) for the semester, split into core / project courses
+- teacher mappings by (course, section) with the year-wide (section=NULL) fallback
+- elective groups and their mappings ordered by (course, insertion)
+
+A snapshot can be scoped to one year and/or department: only the sections
+of that slice are scheduled, while lookups still resolve every section.
+
+Author: M3 Backend Team
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from core.models import Course, Section, Room, TimeSlot, Teacher, TeacherCourseMapping
+
+PROJECT_PHASE = "Project Phase"
+
+
+def is_project_phase(course):
+    """Case-insensitive project test, matching the old ``icontains`` filter."""
+    return PROJECT_PHASE.lower() in course.course_name.lower()
+
+
+@dataclass(frozen=True)
+class ProblemInstance:
+    """
+    Read-only snapshot of the generation inputs for one semester.
+
+    The containers are plain tuples/dicts so the snapshot stays picklable;
+    callers must treat them as immutable.
+    """
+    semester: str
+    sections: tuple
+    timeslots: tuple
+    rooms: tuple
+    teachers: dict
+    courses: dict
+    sections_by_id: dict = field(repr=False)
+    courses_by_year: dict = field(repr=False)
+    section_mappings: dict = field(repr=False)
+    year_wide_mappings: dict = field(repr=False)
+    elective_groups: dict = field(repr=False)
+    group_mappings: dict = field(repr=False)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def course(self, course_id):
+        return self.courses[course_id]
+
+    def section(self, class_id):
+        return self.sections_by_id[class_id]
+
+    def courses_for_year(self, year):
+        return self.courses_by_year.get(year, ())
+
+    def core_courses(self, year):
+        """Non-elective, non-project courses for a year (all schedulability)."""
+        return tuple(c for c in self.courses_for_year(year) if not c.is_elective and not is_project_phase(c))
+
+    def project_courses(self, year):
+        return tuple(c for c in self.courses_for_year(year) if is_project_phase(c))
+
+    def mappings_for(self, course_id, class_id):
+        """Section-specific mappings, falling back to year-wide ones."""
+        mappings = self.section_mappings.get((course_id, class_id))
+        if mappings:
+            return mappings
+        return self.year_wide_mappings.get(course_id, ())
+
+    def timeslots_by_day(self):
+        """Timeslots grouped by day, preserving the (day, slot_number) load order."""
+        ts_by_day = {}
+        for ts in self.timeslots:
+            ts_by_day.setdefault(ts.day, []).append(ts)
+        return ts_by_day
+
+    def breaks_by_day(self):
+        """
+        Slot numbers followed by a break on each day.
+
+        A break is a gap in the TimeSlot table: the next slot of the day starts
+        after this one ends. No session may run across it.
+        """
+        return {day: frozenset(a.slot_number for a, b in zip(slots, slots[1:]) if a.end_time < b.start_time)
+                for day, slots in self.timeslots_by_day().items()}
+
+
+def load_problem(semester, year=None, department=None):
+    """
+    Bulk-fetch everything generation needs for a semester.
+
+    Issues one query per table regardless of campus size. Related objects
+    on mappings are re-linked to the shared instances so identity and
+    hashing are consistent across indexes.
+
+    Args:
+        semester: 'odd' or 'even'
+        year: Only schedule the sections of this year (None = all years)
+        department: Only schedule the sections of this department (None = all)
+    """
+    all_sections = tuple(Section.objects.all().order_by('year', 'class_id'))
+    sections = tuple(s for s in all_sections
+                     if (year is None or s.year == year) and (department is None or s.department == department))
+    timeslots = tuple(TimeSlot.objects.all().order_by('day', 'slot_number'))
+    rooms = tuple(Room.objects.all())
+    teachers = {t.teacher_id: t for t in Teacher.objects.all()}
+    courses = {c.course_id: c for c in Course.objects.filter(semester=semester)}
+    sections_by_id = {s.class_id: s for s in all_sections}
+    in_scope = {s.class_id for s in sections}
+
+    courses_by_year = defaultdict(list)
+    for c in courses.values():
+        courses_by_year[c.year].append(c)
+
+    elective_groups = defaultdict(list)
+    for c in courses.values():
+        if c.is_elective and c.is_schedulable and c.elective_group is not None and (year is None or c.year == year):
+            elective_groups[c.elective_group].append(c)
+
+    section_mappings = defaultdict(list)
+    year_wide_mappings = defaultdict(list)
+    mappings_by_course = defaultdict(list)
+    for m in TeacherCourseMapping.objects.filter(course__semester=semester).order_by('id'):
+        m.course = courses[m.course_id]
+        m.teacher = teachers[m.teacher_id]
+        m.section = sections_by_id.get(m.section_id) if m.section_id else None
+        mappings_by_course[m.course_id].append(m)
+        if m.section_id:
+            section_mappings[(m.course_id, m.section_id)].append(m)
+        else:
+            year_wide_mappings[m.course_id].append(m)
+
+    group_mappings = {}
+    for g_name, group_courses in elective_groups.items():
+        # Sections outside the scope keep the sessions of their published schedule
+        merged = [m for c in group_courses for m in mappings_by_course.get(c.course_id, [])
+                  if m.section_id is None or m.section_id in in_scope]
+        # Deterministic (course, insertion) order; sub-tasks round-robin over it
+        merged.sort(key=lambda m: (m.course_id, m.id))
+        group_mappings[g_name] = tuple(merged)
+
+    return ProblemInstance(
+        semester=semester,
+        sections=sections,
+        timeslots=timeslots,
+        rooms=rooms,
+        teachers=teachers,
+        courses=courses,
+        sections_by_id=sections_by_id,
+        courses_by_year={y: tuple(cs) for y, cs in courses_by_year.items()},
+        section_mappings={k: tuple(v) for k, v in section_mappings.items()},
+        year_wide_mappings={k: tuple(v) for k, v in year_wide_mappings.items()},
+        elective_groups={g: tuple(cs) for g, cs in elective_groups.items()},
+        group_mappings=group_mappings,
+    )
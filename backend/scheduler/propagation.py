@@ -0,0 +1,319 @@
+"""
+Forward Checking over Candidate-Window Domains
+==============================================
+
+Keeps, for every unplaced task, the set of windows it could still occupy.
+Domains are bitsets over a per-block-size window table, stored in a list
+mutated through the scheduler's trail, so backtracking restores them for
+free.
+
+After each placement the affected domains shrink incrementally:
+1. Tasks sharing a teacher or section lose every window that overlaps the
+   placed window.
+2. When a room type runs short at a slot, tasks needing more rooms of that
+   type than remain lose the windows touching that slot.
+3. Interchangeable copies of the placed task (see records.link_copies)
+   lose the windows that would break their canonical order: earlier
+   copies keep only windows before it, later copies only windows after
+   it. The other orders of the same placements are never searched.
+
+An emptied domain is a dead end found immediately instead of many levels
+deeper. The search expands the task with the fewest remaining windows
+(dynamic MRV).
+
+Every removal is also attributed to the search depths that caused it
+(``pruned_by``), which gives the search driver the conflict sets it needs
+for backjumping. Depth sets are bitmasks, trailed like the domains.
+
+Author: M3 Backend Team
+"""
+
+from collections import defaultdict
+
+from .occupancy import TEACHER, ROOM
+
+LAB = 'LAB'
+CLASSROOM = 'CLASSROOM'
+
+
+class WindowTable:
+    """
+    Every legal window of each block size, in day order.
+
+    A window is legal when its slots are consecutive on one day and it does
+    not straddle one of that day's break boundaries (see
+    ProblemInstance.breaks_by_day). Tables are built once per generation, so
+    no caller re-slices the day or re-checks the breaks.
+    """
+
+    def __init__(self, days, ts_by_day, grid, break_after):
+        self.days = days
+        self.ts_by_day = ts_by_day
+        self.grid = grid
+        self.break_after = {day: frozenset(break_after.get(day, ())) for day in days}
+        self._tables = {}
+        self._starts = {}
+
+    def table(self, block_size):
+        """(windows, masks, day_ids, touch) for a block size, built on first use."""
+        table = self._tables.get(block_size)
+        if table is None:
+            table = self._build(block_size)
+            self._tables[block_size] = table
+        return table
+
+    def starts(self, block_size):
+        """Position of each window's first slot within its day, by window id."""
+        self.table(block_size)
+        return self._starts[block_size]
+
+    def _build(self, block_size):
+        windows, masks, starts = [], [], []
+        day_ids = {}
+        touch = {}
+        for day in self.days:
+            day_slots = self.ts_by_day.get(day, [])
+            breaks = self.break_after[day]
+            ids = []
+            for i in range(len(day_slots) - block_size + 1):
+                window = day_slots[i:i + block_size]
+                if any(ts.slot_number in breaks for ts in window[:-1]): continue
+                wid = len(windows)
+                mask = self.grid.window_mask(window)
+                windows.append(window)
+                masks.append(mask)
+                starts.append(i)
+                ids.append(wid)
+                bits = mask
+                while bits:
+                    low = bits & -bits
+                    touch[low] = touch.get(low, 0) | (1 << wid)
+                    bits ^= low
+            day_ids[day] = ids
+        self._starts[block_size] = starts
+        return windows, masks, day_ids, touch
+
+
+class DomainStore:
+    """
+    Per-task window domains with incremental forward checking.
+
+    Tasks are the scheduler's Task records (see records.py); each must
+    carry its position in the task list in its `index` attribute.
+    """
+
+    def __init__(self, tasks, windows, grid, trail, rooms_by_type, resources, room_demand):
+        self.tasks = tasks
+        self.windows = windows
+        self.grid = grid
+        self.trail = trail
+        self.room_idxs = {rt: [grid.intern(ROOM, r.room_id) for r in rooms] for rt, rooms in rooms_by_type.items()}
+
+        self.resources = [resources(t) for t in tasks]       # [(kind, idx), ...]
+        self.demand = [room_demand(t) for t in tasks]        # {room_type: rooms needed}
+        self.placed = [False] * len(tasks)
+        self.priority = [t.priority for t in tasks]  # MRV tie-break, fixed per task
+        self.domains = [0] * len(tasks)
+        self.placed_bits = [0]                    # one-cell list so the trail can restore it
+        self.copy_masks = [0] * len(tasks)        # window mask of each placed task that has copies
+
+        # Conflict bookkeeping, as bitmasks of search depths
+        self.pruned_by = [0] * len(tasks)         # depths that removed windows from a task
+        self.holders = defaultdict(int)           # (kind, idx) -> depths occupying the resource
+        self.room_holders = defaultdict(int)      # (room_type, slot bit) -> depths using such a room there
+
+        self.by_resource = {}
+        self.by_room_type = {}
+        for i, res in enumerate(self.resources):
+            for key in res:
+                self.by_resource.setdefault(key, []).append(i)
+            for rt in self.demand[i]:
+                self.by_room_type.setdefault(rt, []).append(i)
+        self.max_demand = {rt: max(self.demand[i][rt] for i in ids) for rt, ids in self.by_room_type.items()}
+        self._removal_cache = {}
+        self._order_cache = {}
+
+        for i, task in enumerate(tasks):
+            self.domains[i] = self._initial_domain(i, task)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def _initial_domain(self, i, task):
+        windows, masks, _, _ = self.windows.table(task.block_size)
+        grid = self.grid
+        domain = 0
+        for wid, mask in enumerate(masks):
+            if all(grid.is_free(kind, idx, mask) for kind, idx in self.resources[i]) and \
+                    all(self._free_rooms(rt, mask) >= n for rt, n in self.demand[i].items()):
+                domain |= 1 << wid
+        return domain
+
+    def _free_rooms(self, room_type, mask):
+        grid = self.grid
+        return sum(1 for idx in self.room_idxs.get(room_type, ()) if grid.is_free(ROOM, idx, mask))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def size(self, i):
+        return self.domains[i].bit_count()
+
+    def contains(self, i, wid):
+        return bool(self.domains[i] >> wid & 1)
+
+    def state_key(self):
+        """
+        The placed tasks and resource occupancy, for the nogood cache.
+
+        The tuple itself is the key, not its hash: a colliding hash would
+        prune a live branch without notice. The windows of placed copies
+        are part of it, since the copy order narrows the other copies'
+        domains by where each copy went, which occupancy alone does not tell.
+        """
+        return (self.placed_bits[0], tuple(self.copy_masks), self.grid.state_key())
+
+    def pruners(self, i):
+        """Depths whose placements removed windows from task i."""
+        return self.pruned_by[i]
+
+    def blockers(self, i, mask):
+        """
+        Depths that may make a window of task i fail the scheduler's own
+        checks although it is still in the domain: the teacher's daily load
+        (HC9) and finding one room free over the whole window.
+        """
+        culprits = 0
+        for key in self.resources[i]:
+            if key[0] == TEACHER: culprits |= self.holders[key]
+        for room_type in self.demand[i]:
+            bits = mask
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                culprits |= self.room_holders[(room_type, low)]
+        return culprits
+
+    def select(self):
+        """Index of the unplaced task with the smallest domain (MRV), or None."""
+        best, best_key = None, None
+        domains = self.domains
+        priority = self.priority
+        for i, placed in enumerate(self.placed):
+            if placed: continue
+            key = (domains[i].bit_count(), priority[i], i)
+            if best_key is None or key < best_key:
+                best, best_key = i, key
+        return best
+
+    # ------------------------------------------------------------------
+    # Propagation
+    # ------------------------------------------------------------------
+
+    def _removal(self, block_size, mask):
+        """Window ids of a block size that overlap any slot of mask."""
+        key = (block_size, mask)
+        removal = self._removal_cache.get(key)
+        if removal is None:
+            touch = self.windows.table(block_size)[3]
+            removal = 0
+            bits = mask
+            while bits:
+                low = bits & -bits
+                removal |= touch.get(low, 0)
+                bits ^= low
+            self._removal_cache[key] = removal
+        return removal
+
+    def _out_of_order(self, block_size, mask, earlier):
+        """
+        Window ids of a block size not wholly before `mask` (earlier=True)
+        or not wholly after it (earlier=False).
+        """
+        key = (block_size, mask, earlier)
+        removal = self._order_cache.get(key)
+        if removal is None:
+            low = mask & -mask
+            removal = 0
+            for wid, window_mask in enumerate(self.windows.table(block_size)[1]):
+                if (window_mask >= low) if earlier else (window_mask & -window_mask <= mask):
+                    removal |= 1 << wid
+            self._order_cache[key] = removal
+        return removal
+
+    def _shrink(self, u, removal, culprits):
+        """Remove windows from a domain, blaming `culprits`; False if it empties."""
+        domain = self.domains[u]
+        narrowed = domain & ~removal
+        if narrowed != domain:
+            trail = self.trail
+            trail.assign(self.domains, u, narrowed)
+            trail.assign(self.pruned_by, u, self.pruned_by[u] | culprits)
+            return narrowed != 0
+        return True
+
+    def assign(self, i, mask, depth=0):
+        """
+        Mark task i placed over `mask` at search depth `depth` and
+        forward-check its neighbours.
+
+        Must be called after the placement has been applied to the grid.
+
+        Returns:
+            int | None: None on success, else the depths responsible for
+            the task whose domain was wiped out
+        """
+        trail = self.trail
+        tasks = self.tasks
+        placed = self.placed
+        me = 1 << depth
+        trail.assign(placed, i, True)
+        trail.assign(self.placed_bits, 0, self.placed_bits[0] | (1 << i))
+        if tasks[i].copies:
+            trail.assign(self.copy_masks, i, mask)
+
+        holders = self.holders
+        for key in self.resources[i]:
+            trail.assign(holders, key, holders[key] | me)
+        room_holders = self.room_holders
+        for room_type in self.demand[i]:
+            bits = mask
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                key = (room_type, low)
+                trail.assign(room_holders, key, room_holders[key] | me)
+
+        seen = set()
+        for key in self.resources[i]:
+            for u in self.by_resource[key]:
+                if placed[u] or u in seen: continue
+                seen.add(u)
+                if not self._shrink(u, self._removal(tasks[u].block_size, mask), me):
+                    return self.pruned_by[u]
+
+        for room_type in self.demand[i]:
+            limit = self.max_demand[room_type]
+            bits = mask
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                free = self._free_rooms(room_type, low)
+                if free >= limit: continue
+                culprits = room_holders[(room_type, low)]
+                for u in self.by_room_type[room_type]:
+                    if placed[u] or self.demand[u][room_type] <= free: continue
+                    if not self._shrink(u, self._removal(tasks[u].block_size, low), culprits):
+                        return self.pruned_by[u]
+
+        task = tasks[i]
+        for other in task.copies:
+            u = other.index
+            # Copies left out of the search keep a stale index
+            if other is task or u is None or u >= len(tasks) or tasks[u] is not other or placed[u]: continue
+            removal = self._out_of_order(other.block_size, mask, other.copy_rank < task.copy_rank)
+            if not self._shrink(u, removal, me):
+                return self.pruned_by[u]
+        return None
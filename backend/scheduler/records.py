@@ -0,0 +1,119 @@
+"""
+Compact Task and Entry Records
+==============================
+
+Slotted record types for the scheduler's working set. A generation keeps
+one Task per session and one Entry per placed slot; as plain dicts these
+carried a per-instance hash table each, plus scratch keys such as
+'selected_room' that were added on the fly. Slotted records have a fixed
+layout, so they are several times smaller and attribute access in the
+search's hot loop is cheaper than a dict lookup.
+
+Tasks also carry their teachers and sections as interned OccupancyGrid
+ids (see Task.intern), so occupancy checks never go back through the
+grid's key -> id maps. Entries keep references to the ProblemInstance's
+shared model instances, which cost one pointer each like an integer id
+and need no lookup when the entries are persisted.
+
+Author: M3 Backend Team
+"""
+
+from .occupancy import TEACHER, SECTION
+
+
+class SubTask:
+    """One course of an elective group or one section of a project phase."""
+
+    __slots__ = ('course', 'teacher', 'sections', 'session_type', 'display_name', 'selected_room')
+
+    def __init__(self, course, teacher, sections, session_type, display_name=None):
+        self.course = course
+        self.teacher = teacher
+        self.sections = sections
+        self.session_type = session_type
+        self.display_name = display_name
+        self.selected_room = None  # chosen by _can_place_group
+
+
+class Task:
+    """
+    One schedulable session.
+
+    Single tasks have a course, sections and a teacher; group tasks (elective
+    groups and project phases) have sub_tasks and busy_teachers instead.
+    """
+
+    __slots__ = ('type', 'block_size', 'priority', 'session_type', 'course', 'sections', 'teacher',
+                 'sub_tasks', 'busy_teachers', 'is_group', 'is_project', 'group_name',
+                 'teacher_ids', 'section_ids', 'room_demand', 'window', 'selected_room', 'index',
+                 'copies', 'copy_rank')
+
+    def __init__(self, type, block_size, priority, session_type=None, course=None, sections=(), teacher=None,
+                 sub_tasks=(), busy_teachers=(), is_group=False, is_project=False, group_name=None):
+        self.type = type
+        self.block_size = block_size
+        self.priority = priority
+        self.session_type = session_type
+        self.course = course
+        self.sections = sections
+        self.teacher = teacher
+        self.sub_tasks = sub_tasks
+        self.busy_teachers = busy_teachers
+        self.is_group = is_group
+        self.is_project = is_project
+        self.group_name = group_name
+        self.teacher_ids = ()      # interned grid ids, see intern()
+        self.section_ids = ()
+        self.room_demand = {}      # {room type: rooms needed at once}, see TimetableScheduler._room_demand
+        self.window = None         # set while the task is placed
+        self.selected_room = None  # chosen by _can_place_single
+        self.index = None          # position in the exact phase's task list
+        self.copies = ()           # interchangeable sessions incl. this one, see link_copies()
+        self.copy_rank = 0
+
+    def all_sections(self):
+        """Sections the task occupies, across its sub-tasks for a group."""
+        if self.is_group:
+            return {sec for sub in self.sub_tasks for sec in sub.sections}
+        return set(self.sections)
+
+    def teachers(self):
+        """Teachers the task occupies."""
+        return self.busy_teachers if self.is_group else (self.teacher,)
+
+    def intern(self, grid):
+        """Resolve the task's teachers and sections to grid ids once."""
+        self.teacher_ids = tuple(grid.intern(TEACHER, t.teacher_id) for t in self.teachers())
+        self.section_ids = tuple(grid.intern(SECTION, cid) for cid in sorted(s.class_id for s in self.all_sections()))
+
+
+def link_copies(tasks):
+    """
+    Mark tasks as interchangeable copies of one session.
+
+    Copies differ only in where they land, so forward checking keeps them
+    in canonical order - each copy strictly after the previous one in the
+    week grid - and the exact search never tries the other permutations of
+    the same placements (see propagation.DomainStore.assign).
+    """
+    if len(tasks) < 2: return
+    copies = tuple(tasks)
+    for rank, task in enumerate(copies):
+        task.copies = copies
+        task.copy_rank = rank
+
+
+class Entry:
+    """One placed slot of a session; becomes one ScheduleEntry row."""
+
+    __slots__ = ('section', 'course', 'teacher', 'room', 'timeslot', 'is_lab', 'session_type', 'constraint_reason')
+
+    def __init__(self, section, course, teacher, room, timeslot, is_lab, session_type, constraint_reason=None):
+        self.section = section
+        self.course = course
+        self.teacher = teacher
+        self.room = room
+        self.timeslot = timeslot
+        self.is_lab = is_lab
+        self.session_type = session_type
+        self.constraint_reason = constraint_reason
@@ -0,0 +1,128 @@
+"""
+Free-Room Index
+===============
+
+Finding a room used to sort every room of the needed type by utilization
+and then probe the grid room by room, on every candidate window. The index
+keeps, per room type:
+
+- for every slot, a bitset of the rooms free at that slot; ANDing the
+  bitsets of a window's slots gives the rooms free for the whole window
+- one bitset per utilization level, holding the rooms used that often
+
+The least-used free room is then the lowest bit of the first non-empty
+(level & free) - the same room the sort picked, ties going to the room
+that comes first in load order. Both structures change only through
+occupy()/release(), in O(window) and O(1), and are written through the
+trail, so backtracking restores them along with the grid.
+
+Author: M3 Backend Team
+"""
+
+from .occupancy import ROOM
+
+
+class RoomIndex:
+    """
+    Free-room bitsets and utilization buckets over the rooms of each type.
+
+    Usage:
+        index = RoomIndex(rooms_by_type, grid, trail, room_utilization)
+        room = index.least_used('LAB', grid.window_mask(window))
+        index.occupy(room.room_id, grid.window_mask(window))
+    """
+
+    def __init__(self, rooms_by_type, grid, trail, utilization):
+        self.grid = grid
+        self.trail = trail
+        self.utilization = utilization  # room_id -> placements, shared with the scheduler
+        self.rooms = {rt: list(rooms) for rt, rooms in rooms_by_type.items()}
+        self.position = {}  # room_id -> (room type, bit)
+        for rt, rooms in self.rooms.items():
+            for i, room in enumerate(rooms):
+                self.position[room.room_id] = (rt, 1 << i)
+        self._slots = len(grid.days) * grid.slots_per_day
+        self.clear()
+
+    def clear(self):
+        """Every room free and unused; the trail must not hold index writes."""
+        self.free = {rt: [(1 << len(rooms)) - 1] * self._slots for rt, rooms in self.rooms.items()}
+        self.levels = {rt: [(1 << len(rooms)) - 1] for rt, rooms in self.rooms.items()}
+        for room_id in self.utilization:
+            self.utilization[room_id] = 0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def bit(self, room):
+        return self.position[room.room_id][1]
+
+    def free_over(self, room_type, mask):
+        """Bitset of the rooms of a type free at every slot of `mask`."""
+        free_at = self.free[room_type]
+        free = (1 << len(self.rooms[room_type])) - 1
+        while mask and free:
+            low = mask & -mask
+            free &= free_at[low.bit_length() - 1]
+            mask ^= low
+        return free
+
+    def least_used(self, room_type, mask, exclude=0):
+        """
+        The least-used room of a type that is free over `mask`, else None.
+
+        Args:
+            exclude: Bitset of rooms to skip (see bit())
+        """
+        return self.pick(room_type, self.free_over(room_type, mask) & ~exclude)
+
+    def pick(self, room_type, free):
+        """The least-used room of a type among the `free` bitset, else None."""
+        if not free: return None
+        for level in self.levels[room_type]:
+            hit = level & free
+            if hit:
+                return self.rooms[room_type][(hit & -hit).bit_length() - 1]
+        return None
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def occupy(self, room_id, mask):
+        """Book a room over `mask` and count one more use of it."""
+        grid = self.grid
+        grid.occupy(ROOM, grid.intern(ROOM, room_id), mask)
+        self._mark(room_id, mask, busy=True)
+        self._use(room_id, 1)
+
+    def release(self, room_id, mask):
+        """Undo occupy()."""
+        grid = self.grid
+        grid.release(ROOM, grid.intern(ROOM, room_id), mask)
+        self._mark(room_id, mask, busy=False)
+        self._use(room_id, -1)
+
+    def _mark(self, room_id, mask, busy):
+        if room_id not in self.position: return
+        room_type, bit = self.position[room_id]
+        free_at = self.free[room_type]
+        assign = self.trail.assign
+        while mask:
+            low = mask & -mask
+            i = low.bit_length() - 1
+            assign(free_at, i, free_at[i] & ~bit if busy else free_at[i] | bit)
+            mask ^= low
+
+    def _use(self, room_id, delta):
+        old = self.utilization[room_id]
+        self.trail.assign(self.utilization, room_id, old + delta)
+        if room_id not in self.position: return
+        room_type, bit = self.position[room_id]
+        levels = self.levels[room_type]
+        while len(levels) <= old + delta:
+            levels.append(0)  # empty buckets are harmless, so growth is not trailed
+        assign = self.trail.assign
+        assign(levels, old, levels[old] & ~bit)
+        assign(levels, old + delta, levels[old + delta] | bit)
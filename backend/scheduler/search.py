@@ -0,0 +1,320 @@
+"""
+Iterative Backtracking Search Driver
+====================================
+
+Explicit-stack replacement for the old recursive ``_backtrack_place``.
+Each stack frame holds the task chosen at that depth, its ordered candidate
+windows and a cursor into them; the placement made at that frame is undone
+through the scheduler's trail when the frame is revisited. Which task to
+expand next is asked of the scheduler at every depth, so dynamic ordering
+(e.g. fewest remaining windows first) works unchanged.
+
+Because the whole search position is data rather than Python call
+frames, the driver can:
+1. Run task lists of any length without touching the recursion limit.
+2. Pause at a wall-clock deadline and resume later in the same process.
+3. Serialize its position to a small JSON-safe dict and rebuild it in a
+   fresh process (e.g. a follow-up Celery task after a soft time limit).
+
+Failures are handled with conflict-directed backjumping: every frame keeps
+a conflict set, a bitmask of the depths whose placements ruled out some of
+its candidates. An exhausted frame jumps straight back to the deepest depth
+in that set - the most recent task competing for one of its teachers,
+sections or rooms - and hands the rest of the set to it. Resource states
+that were fully explored without success are remembered in a bounded
+nogood cache so a different path reaching the same state fails at once.
+
+The search is anytime: the deepest partial assignment reached so far is
+kept as a list of (task, cursor) decisions, and an optional budget of
+search seconds (carried across pauses) stops the search early. When it
+ends without a solution the caller can replay that best partial and only
+complete the remaining tasks, instead of starting over.
+
+Author: M3 Backend Team
+"""
+
+import time
+from collections import OrderedDict
+
+SOLVED = 'SOLVED'        # every task placed
+EXHAUSTED = 'EXHAUSTED'  # search space exhausted without a solution
+ABORTED = 'ABORTED'      # iteration or time budget spent
+PAUSED = 'PAUSED'        # deadline reached; call run() again to resume
+
+CHECKPOINT_VERSION = 4
+PROGRESS_EVERY = 500     # iterations between progress callbacks
+NOGOOD_CACHE_SIZE = 20000
+
+
+class GenerationPaused(Exception):
+    """Raised by TimetableScheduler.generate() when the search pauses."""
+
+    def __init__(self, checkpoint):
+        super().__init__("Schedule generation paused")
+        self.checkpoint = checkpoint
+
+
+class _Frame:
+    __slots__ = ('task_index', 'candidates', 'cursor', 'mark', 'conflicts', 'state')
+
+    def __init__(self, task_index, candidates, conflicts, state):
+        self.task_index = task_index
+        self.candidates = candidates
+        self.cursor = -1            # position of the candidate currently placed / last tried
+        self.mark = None            # trail checkpoint taken before placing candidates[cursor]
+        self.conflicts = conflicts  # bitmask of depths that ruled out candidates
+        self.state = state          # resource-state key on entry (nogood cache key)
+
+
+class SearchEngine:
+    """
+    Depth-first placement of tasks over a TimetableScheduler's state.
+
+    The scheduler supplies the search primitives:
+        _select_task(depth) -> index of the task to expand next
+        _candidate_windows(task, ts_by_day) -> ordered windows
+        _can_place(task, window) / _place(task, window)
+        _after_place(task, window, depth) -> None, or the conflict set of a dead end
+        _pruners(task, depth) -> conflict set explaining windows already ruled out
+        _blockers(task, window, depth) -> conflict set explaining a failed _can_place
+        _state_key() -> hashable resource state, or None to skip the nogood cache
+        trail.checkpoint() / trail.rollback(mark)
+    """
+
+    def __init__(self, scheduler, tasks, ts_by_day, max_iterations, progress=None, time_budget=None):
+        self.scheduler = scheduler
+        self.tasks = tasks
+        self.ts_by_day = ts_by_day
+        self.max_iterations = max_iterations
+        self.progress = progress
+        self.time_budget = time_budget  # seconds of search, summed over every run() call
+        self.elapsed = 0.0
+        self.iterations = 0
+        self.best = []                  # deepest partial assignment: [(task_index, cursor), ...]
+        self.backjumps = 0
+        self.nogood_hits = 0
+        self.nogoods = OrderedDict()
+        self.stack = []
+        self.status = None
+
+    # ------------------------------------------------------------------
+    # Driver
+    # ------------------------------------------------------------------
+
+    def run(self, pause_at=None):
+        """
+        Advance the search.
+
+        Args:
+            pause_at: Optional time.time() deadline after which to pause
+
+        Returns:
+            str: SOLVED, EXHAUSTED, ABORTED or PAUSED
+        """
+        started = time.time()
+        try:
+            return self._run(pause_at, started)
+        finally:
+            self.elapsed += time.time() - started
+
+    def _run(self, pause_at, started):
+        abort_at = None
+        if self.time_budget:
+            abort_at = started + self.time_budget - self.elapsed
+        if self.status is None:
+            outcome = self._enter(0)
+            if outcome: return self._finish(outcome)
+        elif self.status != PAUSED:
+            return self.status
+        self.status = None
+
+        stack = self.stack
+        trail = self.scheduler.trail
+        while stack:
+            frame = stack[-1]
+            if frame.mark is not None:
+                trail.rollback(frame.mark)
+                frame.mark = None
+
+            if not self._advance(frame):
+                if not self._backjump():
+                    return self._finish(EXHAUSTED)
+                continue
+
+            if len(stack) > len(self.best):
+                self.best = [(f.task_index, f.cursor) for f in stack]
+
+            outcome = self._enter(len(stack))
+            if outcome == EXHAUSTED:
+                # Known nogood: the reason is not recorded, so blame every frame
+                frame.conflicts |= (1 << (len(stack) - 1)) - 1
+            elif outcome:
+                return self._finish(outcome)
+
+            # Checked after a step so every run() call makes progress
+            if pause_at is not None or abort_at is not None:
+                now = time.time()
+                if abort_at is not None and now >= abort_at:
+                    return self._finish(ABORTED)
+                if pause_at is not None and now >= pause_at:
+                    self.status = PAUSED
+                    return PAUSED
+
+        return self._finish(EXHAUSTED)
+
+    def _enter(self, depth):
+        """Visit a search node; push a frame unless the node is terminal."""
+        self.iterations += 1
+        if self.iterations > self.max_iterations: return ABORTED
+        if depth >= len(self.tasks): return SOLVED
+        if self.progress and self.iterations % PROGRESS_EVERY == 0:
+            self.progress({'phase': 'search', 'iterations': self.iterations, 'depth': depth, 'tasks': len(self.tasks)})
+
+        state = self.scheduler._state_key()
+        if state is not None and state in self.nogoods:
+            self.nogoods.move_to_end(state)
+            self.nogood_hits += 1
+            return EXHAUSTED
+        self.stack.append(self._frame(self.scheduler, self.tasks, self.ts_by_day, depth, state))
+        return None
+
+    @staticmethod
+    def _frame(scheduler, tasks, ts_by_day, depth, state):
+        task_index = scheduler._select_task(depth)
+        task = tasks[task_index]
+        return _Frame(task_index, scheduler._candidate_windows(task, ts_by_day),
+                      scheduler._pruners(task, depth), state)
+
+    def _advance(self, frame):
+        """Place the next feasible candidate of a frame; False when none is left."""
+        scheduler = self.scheduler
+        trail = scheduler.trail
+        task = self.tasks[frame.task_index]
+        depth = len(self.stack) - 1
+        others = ~(1 << depth)
+        candidates = frame.candidates
+        while frame.cursor + 1 < len(candidates):
+            frame.cursor += 1
+            window = candidates[frame.cursor]
+            if not scheduler._can_place(task, window):
+                frame.conflicts |= scheduler._blockers(task, window, depth)
+                continue
+            mark = trail.checkpoint()
+            scheduler._place(task, window)
+            conflict = scheduler._after_place(task, window, depth)
+            if conflict is None:
+                frame.mark = mark
+                return True
+            frame.conflicts |= conflict & others
+            trail.rollback(mark)
+        return False
+
+    def _backjump(self):
+        """
+        Pop an exhausted frame and resume at the deepest frame it conflicts with.
+
+        Frames skipped over are discarded; their placements are undone when
+        the target frame rolls back to its own mark.
+
+        Returns:
+            bool: False when the conflict set is empty, i.e. no solution exists
+        """
+        stack = self.stack
+        frame = stack.pop()
+        if frame.state is not None:
+            self.nogoods[frame.state] = True
+            if len(self.nogoods) > NOGOOD_CACHE_SIZE:
+                self.nogoods.popitem(last=False)
+
+        conflicts = frame.conflicts
+        if not conflicts:
+            return False
+        target = conflicts.bit_length() - 1
+        if target < len(stack) - 1:
+            self.backjumps += 1
+            del stack[target + 1:]
+        stack[target].conflicts |= conflicts & ~(1 << target)
+        return True
+
+    def _finish(self, outcome):
+        self.status = outcome
+        return outcome
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+
+    def checkpoint(self):
+        """JSON-safe description of the current search position."""
+        return {
+            'version': CHECKPOINT_VERSION,
+            'task_count': len(self.tasks),
+            'iterations': self.iterations,
+            'order': [f.task_index for f in self.stack],
+            'cursors': [f.cursor for f in self.stack],
+            'placed': [f.mark is not None for f in self.stack],
+            'conflicts': [f.conflicts for f in self.stack],
+            'elapsed': self.elapsed,
+            'best': [list(decision) for decision in self.best],
+        }
+
+    def _replay(self, depth, task_index, cursor, place):
+        """Re-enter a frame with a recorded decision, optionally re-placing it."""
+        scheduler = self.scheduler
+        frame = self._frame(scheduler, self.tasks, self.ts_by_day, depth, scheduler._state_key())
+        if frame.task_index != task_index or cursor >= len(frame.candidates):
+            raise ValueError("Search checkpoint does not match the current problem")
+        frame.cursor = cursor
+        self.stack.append(frame)
+        if place:
+            task = self.tasks[task_index]
+            window = frame.candidates[cursor]
+            mark = scheduler.trail.checkpoint()
+            if not scheduler._can_place(task, window):
+                raise ValueError("Search checkpoint does not match the current problem")
+            scheduler._place(task, window)
+            if scheduler._after_place(task, window, depth) is not None:
+                raise ValueError("Search checkpoint does not match the current problem")
+            frame.mark = mark
+        return frame
+
+    def restore_best(self):
+        """
+        Re-place the deepest partial assignment found.
+
+        The caller must first roll the scheduler back to the state the
+        search started from.
+
+        Returns:
+            list: indexes of the tasks that are placed
+        """
+        self.stack = []
+        for depth, (task_index, cursor) in enumerate(self.best):
+            self._replay(depth, task_index, cursor, True)
+        return [task_index for task_index, _ in self.best]
+
+    @classmethod
+    def from_checkpoint(cls, scheduler, tasks, ts_by_day, max_iterations, data, progress=None, time_budget=None):
+        """
+        Rebuild a paused search by replaying its decisions.
+
+        Task choice and candidate ordering only depend on the state left by
+        the frames above, so re-entering each frame and re-placing its
+        cursor reproduces the original stack exactly. The nogood cache is
+        not carried over; it only saves work.
+
+        Raises:
+            ValueError: if the checkpoint does not match the task list
+        """
+        if data.get('version') != CHECKPOINT_VERSION or data.get('task_count') != len(tasks):
+            raise ValueError("Search checkpoint does not match the current problem")
+
+        engine = cls(scheduler, tasks, ts_by_day, max_iterations, progress=progress, time_budget=time_budget)
+        frames = zip(data['order'], data['cursors'], data['placed'], data['conflicts'])
+        for depth, (task_index, cursor, placed, conflicts) in enumerate(frames):
+            engine._replay(depth, task_index, cursor, placed).conflicts = conflicts
+        engine.iterations = data['iterations']
+        engine.elapsed = data['elapsed']
+        engine.best = [tuple(decision) for decision in data['best']]
+        engine.status = PAUSED
+        return engine
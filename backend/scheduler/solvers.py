@@ -0,0 +1,133 @@
+"""
+Solver Backend Registry
+=======================
+
+TimetableScheduler.generate() loads the problem, persists, fingerprints
+and scores a timetable the same way whichever engine builds it. Engines
+differ only in how they fill scheduler.entries from scheduler.problem,
+so they share one signature:
+
+    solve(scheduler, checkpoint=None, pause_at=None, progress=None,
+          time_budget=None, optimize=None) -> bool
+
+returning True when every session was placed on the exact rules (the
+schedule is COMPLETED) and False when relaxed placements were needed
+(PARTIAL). Options an engine has no use for are ignored; only
+'backtrack' pauses and resumes.
+
+Engines are registered by dotted path and imported on first use, so
+importing the registry - e.g. in a web worker validating a request -
+never pulls in a heavy dependency such as OR-Tools. An engine with an
+optional dependency ('cpsat' needs ortools) is only listed when that
+package is installed.
+
+Author: M3 Backend Team
+"""
+
+import importlib
+import importlib.util
+
+from django.conf import settings
+
+DEFAULT_ENGINE = 'backtrack'
+# Improvement seconds for 'local-search' when neither time_budget nor optimize is set
+LOCAL_SEARCH_SECONDS = 10
+
+# name -> 'module:callable'
+_registry = {
+    'backtrack': 'scheduler.solvers:solve_backtrack',
+    'greedy': 'scheduler.solvers:solve_greedy',
+    'local-search': 'scheduler.solvers:solve_local_search',
+    'cpsat': 'scheduler.engine:solve',
+}
+# name -> top-level package the engine cannot run without
+_requires = {
+    'cpsat': 'ortools',
+}
+_loaded = {}
+
+
+def register(name, path, requires=None):
+    """Register (or replace) an engine by 'module:callable' path; `requires` names its optional package."""
+    _registry[name] = path
+    _requires.pop(name, None)
+    if requires:
+        _requires[name] = requires
+    _loaded.pop(name, None)
+
+
+def available(name):
+    """Whether an engine is registered and its optional dependency installed."""
+    if name not in _registry: return False
+    package = _requires.get(name)
+    return package is None or importlib.util.find_spec(package) is not None
+
+
+def engines():
+    """Names of the engines that can run here."""
+    return sorted(name for name in _registry if available(name))
+
+
+def default_engine():
+    return getattr(settings, 'SCHEDULER_ENGINE', DEFAULT_ENGINE)
+
+
+def get_solver(name):
+    """
+    The solve callable of an engine, imported on first use.
+
+    Raises:
+        ValueError: on an unknown engine name
+        ImportError: when the engine's dependencies are not installed
+    """
+    solver = _loaded.get(name)
+    if solver is None:
+        if name not in _registry:
+            raise ValueError(f"Unknown engine '{name}' (available: {', '.join(engines())})")
+        if not available(name):
+            raise ImportError(f"Engine '{name}' needs the '{_requires[name]}' package, which is not installed")
+        module, attr = _registry[name].split(':')
+        solver = getattr(importlib.import_module(module), attr)
+        _loaded[name] = solver
+    return solver
+
+
+# ----------------------------------------------------------------------
+# Built-in engines
+# ----------------------------------------------------------------------
+
+def solve_backtrack(scheduler, checkpoint=None, pause_at=None, progress=None, time_budget=None, optimize=None):
+    """Exact backtracking search, then the greedy fallback (TimetableScheduler.solve)."""
+    return scheduler.solve(checkpoint=checkpoint, pause_at=pause_at, progress=progress,
+                           time_budget=time_budget, optimize=optimize)
+
+
+def _construct(scheduler):
+    """One pass in priority order, each task at its first fitting window; True if no rule was relaxed."""
+    tasks, ts_by_day = scheduler._prepare()
+    exact = True
+    for task in tasks:
+        if scheduler._greedy_place(task, ts_by_day): continue
+        exact = False
+        scheduler.in_greedy_phase = True
+        scheduler._greedy_place(task, ts_by_day)
+        scheduler.in_greedy_phase = False
+    return tasks, exact
+
+
+def solve_greedy(scheduler, progress=None, optimize=None, **_):
+    """Single greedy pass without backtracking; the relaxed rules only for tasks it cannot fit."""
+    tasks, exact = _construct(scheduler)
+    if optimize:
+        scheduler.optimize(tasks, optimize)
+    return exact
+
+
+def solve_local_search(scheduler, progress=None, time_budget=None, optimize=None, **_):
+    """Greedy construction improved by local search for time_budget (else optimize) seconds."""
+    tasks, exact = _construct(scheduler)
+    seconds = time_budget or optimize or LOCAL_SEARCH_SECONDS
+    before, after = scheduler.optimize(tasks, seconds)
+    if progress:
+        progress({'phase': 'local-search', 'penalty_before': before, 'penalty_after': after})
+    return exact
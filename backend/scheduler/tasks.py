@@ -1,24 +1,56 @@
+import time
 from celery import shared_task
+from django.conf import settings
 from .algorithm import generate_schedule
+from .search import GenerationPaused
 import logging
 
 logger = logging.getLogger(__name__)
 
-@shared_task
-def generate_schedule_async(schedule_id):
+@shared_task(bind=True)
+def generate_schedule_async(self, schedule_id, checkpoint=None, time_budget=None, base_schedule_id=None, changes=None,
+                            department=None, reserve=None, force=False, engine=None):
     """
     Asynchronous task to run the timetable generation algorithm.
+
+    When SCHEDULER_TASK_SLICE_SECONDS is set, the search pauses after that
+    many seconds and the task re-queues itself with the search checkpoint,
+    so long generations never run into a worker's time limit. time_budget
+    (seconds of search, default SCHEDULER_TIME_BUDGET_SECONDS) is counted
+    across those slices. base_schedule_id/changes request an incremental
+    re-generation; department/reserve scope the run and pick the published
+    schedules it must not clash with; force skips the reuse of an identical
+    earlier generation; engine names the solver backend (see
+    TimetableScheduler.generate).
     """
     logger.info(f"Starting async schedule generation for schedule ID {schedule_id}")
+
+    slice_seconds = getattr(settings, 'SCHEDULER_TASK_SLICE_SECONDS', 0)
+    pause_at = time.time() + slice_seconds if slice_seconds else None
+
+    def report_progress(progress):
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta={'schedule_id': schedule_id, **progress})
     
     try:
-        success, message = generate_schedule(schedule_id)
+        success, message = generate_schedule(schedule_id, checkpoint=checkpoint, pause_at=pause_at,
+                                             progress=report_progress, time_budget=time_budget,
+                                             base=base_schedule_id, changes=changes,
+                                             department=department, reserve=reserve, force=force, engine=engine)
         if success:
             logger.info(f"Schedule {schedule_id} generated successfully: {message}")
         else:
             logger.error(f"Failed to generate schedule {schedule_id}: {message}")
             
         return {'success': success, 'message': message}
+    except GenerationPaused as paused:
+        logger.info(f"Schedule {schedule_id} paused after {paused.checkpoint['iterations']} iterations; re-queueing")
+        generate_schedule_async.apply_async(args=[schedule_id], kwargs={
+            'checkpoint': paused.checkpoint, 'time_budget': time_budget,
+            'base_schedule_id': base_schedule_id, 'changes': changes,
+            'department': department, 'reserve': reserve, 'force': force, 'engine': engine,
+        })
+        return {'success': None, 'message': 'Generation paused and re-queued', 'iterations': paused.checkpoint['iterations']}
     except Exception as e:
         logger.exception(f"Exception during async schedule generation for {schedule_id}: {e}")
         return {'success': False, 'message': str(e)}
@@ -0,0 +1,68 @@
+"""
+Trail (Undo Log) for Backtracking Search
+========================================
+
+Every mutation the scheduler makes to its search state - occupancy masks,
+per-day counters, utilization trackers, the window of a task record -
+goes through the trail, which remembers the previous value. Placed entries
+live on an append-only stack.
+
+A checkpoint is just the current (log length, entry count) pair, so
+backtracking to it pops the log in reverse and truncates the entry stack:
+cost is proportional to the work being undone, never to the size of the
+timetable.
+
+Author: M3 Backend Team
+"""
+
+from operator import setitem
+
+
+class Trail:
+    """
+    Undo log over index-assignable containers (lists and defaultdicts) and
+    object attributes.
+
+    Usage:
+        mark = trail.checkpoint()
+        trail.add(counts, key, 1)
+        entries.append(entry)
+        ...
+        trail.rollback(mark)    # counts and entries are back to `mark`
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._log = []
+
+    def __len__(self):
+        return len(self._log)
+
+    def checkpoint(self):
+        return (len(self._log), len(self.entries))
+
+    def assign(self, container, key, value):
+        """Set container[key] = value, remembering the previous value."""
+        self._log.append((setitem, container, key, container[key]))
+        container[key] = value
+
+    def set(self, obj, name, value):
+        """Set obj.name = value, remembering the previous value."""
+        self._log.append((setattr, obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    def add(self, container, key, delta):
+        self.assign(container, key, container[key] + delta)
+
+    def rollback(self, mark):
+        """Undo every mutation and entry recorded after `mark`."""
+        log_len, entry_count = mark
+        log = self._log
+        while len(log) > log_len:
+            restore, target, key, old = log.pop()
+            restore(target, key, old)
+        del self.entries[entry_count:]
+
+    def reset(self):
+        """Forget the history; the current state becomes the new baseline."""
+        self._log.clear()
@@ -17,10 +17,17 @@ from django.db.models import Count, Avg
 from core.models import Schedule, ScheduleEntry, Teacher, Room, Section, TimeSlot, Course
 from core.serializers import ScheduleSerializer, ScheduleDetailSerializer
 from .tasks import generate_schedule_async
+from .incremental import normalize_changes
+from .solvers import engines
 from .email_utils import send_publish_notifications, send_deadline_reminders
 from accounts.permissions import IsHODOrAdmin, IsFacultyOrAbove
 
 
+def _flag(value):
+    """Boolean request option: JSON true or the strings '1' / 'true' / 'yes' (form posts send 'false' as text)."""
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
 @api_view(['POST'])
 @permission_classes([IsHODOrAdmin])
 def trigger_generation(request):
@@ -31,6 +38,40 @@ def trigger_generation(request):
     name = request.data.get('name', 'Untitled Schedule')
     semester = request.data.get('semester')
     year = request.data.get('year')  # Optional — None means all years
+    # Optional incremental re-generation: re-place only what `changes` touches in the base schedule
+    base_schedule_id = request.data.get('base_schedule_id')
+    changes = request.data.get('changes')
+    # Optional scoping: only this department's sections; published schedules to keep clear of
+    department = request.data.get('department')
+    reserve = request.data.get('reserve_schedule_ids')
+    # Solve again even if an earlier generation had identical inputs
+    force = _flag(request.data.get('force', False))
+    # Pre-solve feasibility report: return it without generating, or refuse to solve on errors
+    check_only = _flag(request.data.get('check_only', False))
+    skip_if_infeasible = _flag(request.data.get('skip_if_infeasible', False))
+    # Optional solver backend and its time budget in seconds (defaults from settings)
+    engine = request.data.get('engine')
+    time_budget = request.data.get('time_budget')
+
+    if base_schedule_id is not None:
+        base = Schedule.objects.filter(schedule_id=base_schedule_id).first()
+        if base is None:
+            return Response(
+                {"error": f"Base schedule {base_schedule_id} not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            normalize_changes(changes or {})
+        except (TypeError, ValueError, AttributeError) as e:
+            return Response({"error": f"Invalid changes: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        semester = semester or base.semester
+        year = year if year is not None else base.year
+        changes = changes or {}
+    elif changes is not None:
+        return Response(
+            {"error": "changes require base_schedule_id"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
     if not semester:
         return Response(
@@ -38,6 +79,55 @@ def trigger_generation(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    if reserve is not None:
+        if not isinstance(reserve, list):
+            return Response({"error": "reserve_schedule_ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            reserve = [int(sid) for sid in reserve]
+        except (TypeError, ValueError):
+            return Response({"error": "reserve_schedule_ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        published = set(Schedule.objects.filter(schedule_id__in=reserve, status='PUBLISHED')
+                        .values_list('schedule_id', flat=True))
+        missing = [sid for sid in reserve if sid not in published]
+        if missing:
+            return Response(
+                {"error": f"Not published schedules: {', '.join(map(str, missing))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    try:
+        year = int(year) if year is not None else None
+    except (TypeError, ValueError):
+        return Response({"error": "year must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if engine is not None and engine not in engines():
+        return Response(
+            {"error": f"Unknown engine '{engine}' (available: {', '.join(engines())})"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if time_budget is not None:
+        try:
+            time_budget = float(time_budget)
+        except (TypeError, ValueError):
+            time_budget = -1
+        if time_budget < 0:
+            return Response({"error": "time_budget must be a non-negative number of seconds"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    # Only on request: the report repeats the problem load and task build the generation does
+    feasibility = None
+    if check_only or skip_if_infeasible:
+        from .algorithm import check_feasibility
+        feasibility = check_feasibility(semester, year=year, department=department, reserve=reserve,
+                                        base=base_schedule_id, changes=changes).as_dict()
+    if check_only:
+        return Response({"feasibility": feasibility}, status=status.HTTP_200_OK)
+    if skip_if_infeasible and not feasibility['feasible']:
+        return Response(
+            {"error": "Inputs cannot yield a complete timetable; generation skipped", "feasibility": feasibility},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
     # Create schedule object
     schedule = Schedule.objects.create(
         name=name,
@@ -48,13 +138,17 @@ def trigger_generation(request):
 
     # Try Celery async; fall back to synchronous on broker errors
     try:
-        generate_schedule_async.delay(schedule.schedule_id)
+        generate_schedule_async.delay(schedule.schedule_id, base_schedule_id=base_schedule_id, changes=changes,
+                                      department=department, reserve=reserve, force=force,
+                                      engine=engine, time_budget=time_budget)
         async_mode = True
     except Exception:
         # Celery broker not available — run synchronously
         from .algorithm import generate_schedule as run_sync
         try:
-            run_sync(schedule.schedule_id)
+            run_sync(schedule.schedule_id, base=base_schedule_id, changes=changes,
+                     department=department, reserve=reserve, force=force,
+                     engine=engine, time_budget=time_budget)
         except Exception as e:
             schedule.status = 'FAILED'
             schedule.save()
@@ -74,7 +168,8 @@ def trigger_generation(request):
             if async_mode else
             "Schedule generated synchronously (Celery not running)."
         ),
-        "data": serializer.data
+        "data": serializer.data,
+        "feasibility": feasibility
     }, status=status.HTTP_202_ACCEPTED)
 
 
@@ -0,0 +1,42 @@
+"""
+Generation Worker Pools
+=======================
+
+Portfolio and decomposed runs solve in a process pool. The generation's
+Schedule, ProblemInstance and CommittedOccupancy are pickled once and
+unpickled by each worker process when it starts, so workers never touch
+the database for their inputs.
+
+Usage:
+    with process_pool(schedule, problem, committed, workers) as executor:
+        executor.submit(solve_something, ...)
+
+    # in the submitted function, inside the worker
+    schedule, problem, committed = shared()
+
+Author: M3 Backend Team
+"""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+# Set in each worker process by _init_worker
+_shared = None
+
+
+def _init_worker(payload):
+    global _shared
+    import django
+    django.setup()
+    _shared = pickle.loads(payload)
+
+
+def shared():
+    """(schedule, problem, committed) handed to this worker process."""
+    return _shared
+
+
+def process_pool(schedule, problem, committed, workers):
+    """ProcessPoolExecutor whose workers start with the generation's shared inputs."""
+    payload = pickle.dumps((schedule, problem, committed), protocol=pickle.HIGHEST_PROTOCOL)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(payload,))
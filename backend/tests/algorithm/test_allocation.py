@@ -0,0 +1,57 @@
+"""
+Unit Tests for Min-Cost-Flow Teacher Allocation
+
+Author: M3 Backend Team
+"""
+
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+from scheduler.allocation import MinCostFlow, allocate
+
+
+def teacher(tid, max_hours):
+    return SimpleNamespace(teacher_id=tid, max_hours_per_week=max_hours)
+
+
+def course(cid, weekly_slots=4):
+    return SimpleNamespace(course_id=cid, weekly_slots=weekly_slots)
+
+
+def sections(n):
+    return [SimpleNamespace(class_id=f'CSE1{chr(65 + i)}') for i in range(n)]
+
+
+class TestMinCostFlow:
+    """Test cases for the flow solver"""
+
+    def test_cheapest_routes_first(self):
+        net = MinCostFlow(4)
+        cheap = net.add_edge(0, 1, 3, 1)
+        dear = net.add_edge(0, 2, 5, 4)
+        net.add_edge(1, 3, 5, 0)
+        net.add_edge(2, 3, 5, 0)
+
+        assert net.run(0, 3, 5) == (5, 3 * 1 + 2 * 4)
+        assert net.flow_on(cheap) == 3
+        assert net.flow_on(dear) == 2
+
+
+class TestAllocate:
+    """Test cases for capacity- and preference-aware allocation"""
+
+    def test_preference_within_capacity(self):
+        t1, t2 = teacher('T001', 8), teacher('T002', 8)
+        # T001 is strongly preferred but can only take two of the three sections
+        assignments = allocate([(course('CS101'), sections(3), ((t2, 5), (t1, 1)))], defaultdict(int))
+
+        assert Counter(t.teacher_id for t in assignments.values()) == {'T001': 2, 'T002': 1}
+
+    def test_counts_existing_load_and_spreads_overload(self):
+        t1, t2 = teacher('T001', 8), teacher('T002', 8)
+        load = defaultdict(int, {'T001': 8})
+        assignments = allocate([(course('CS101'), sections(4), ((t1, 3), (t2, 3)))], load)
+
+        # T001 is already full, so T002 takes up to its capacity before anyone overloads
+        assert Counter(t.teacher_id for t in assignments.values()) == {'T001': 1, 'T002': 3}
+        assert load == {'T001': 12, 'T002': 12}
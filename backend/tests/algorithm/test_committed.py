@@ -0,0 +1,53 @@
+"""
+Unit Tests for Scoped Generation Around Published Schedules
+
+Author: M3 Backend Team
+"""
+
+import pytest
+
+from core.models import Schedule, ScheduleEntry
+from scheduler.algorithm import TimetableScheduler
+from scheduler.committed import CommittedOccupancy
+from scheduler.problem import load_problem
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestCommittedOccupancy:
+    """Test cases for pre-blocking the cells of published schedules"""
+
+    @pytest.fixture
+    def published(self, campus_builder):
+        campus_builder.week()
+        campus_builder.rooms(classrooms=['A-101', 'A-102'], labs=[])
+        teacher = campus_builder.teacher('T001', max_hours_per_week=30)
+        for year in (1, 2):
+            campus_builder.sections(f'CSE{year}A', year=year)
+            campus_builder.course(f'CS{year}01', teacher, year=year, lectures=3)
+
+        campus = Schedule.objects.create(name='campus', semester='odd', status='PENDING')
+        assert TimetableScheduler(campus).generate(portfolio=0, optimize=0)[0]
+        campus.status = 'PUBLISHED'
+        campus.save()
+        return campus
+
+    def test_skips_sessions_being_regenerated(self, published):
+        committed = CommittedOccupancy([published.schedule_id], load_problem('odd', year=2))
+
+        year1 = ScheduleEntry.objects.filter(schedule=published, section_id='CSE1A')
+        assert committed.teacher_cells == {('T001', (e.timeslot.day, e.timeslot.slot_number)) for e in year1}
+        assert committed.teacher_hours['T001'] == year1.count()
+
+    def test_scoped_run_keeps_clear_of_published_cells(self, published):
+        scoped = Schedule.objects.create(name='year 2', semester='odd', year=2, status='PENDING')
+        success, _ = TimetableScheduler(scoped).generate(portfolio=0, optimize=0)
+        assert success
+
+        rows = ScheduleEntry.objects.filter(schedule=scoped)
+        assert set(rows.values_list('section_id', flat=True)) == {'CSE2A'}
+        held = set(ScheduleEntry.objects.filter(schedule=published, section_id='CSE1A')
+                   .values_list('teacher_id', 'timeslot_id'))
+        assert not held & set(rows.values_list('teacher_id', 'timeslot_id'))
+        held_rooms = set(ScheduleEntry.objects.filter(schedule=published, section_id='CSE1A')
+                         .values_list('room_id', 'timeslot_id'))
+        assert not held_rooms & set(rows.values_list('room_id', 'timeslot_id'))
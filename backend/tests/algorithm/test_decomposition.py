@@ -0,0 +1,77 @@
+"""
+Unit Tests for Year/Department Decomposition
+
+Author: M3 Backend Team
+"""
+
+from collections import Counter
+
+import pytest
+
+from core.models import Schedule, ScheduleEntry
+from scheduler.algorithm import TimetableScheduler
+from scheduler.decomposition import partition, task_ids, _reconcile
+from scheduler.problem import load_problem
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestDecomposition:
+    """Test cases for block partitioning, reconciliation and the decomposed pipeline"""
+
+    @pytest.fixture
+    def campus(self, campus_builder):
+        campus_builder.week()
+        campus_builder.rooms(classrooms=['A-101', 'A-102'], labs=[])
+        teachers = {tid: campus_builder.teacher(tid, max_hours_per_week=30) for tid in ['T001', 'T002', 'T003']}
+        # T001 teaches in both years; each year otherwise has its own teacher
+        for year, cls, courses in [(1, 'CSE1A', [('CS101', 'T001'), ('CS102', 'T002'), ('CS103', 'T002')]),
+                                   (2, 'CSE2A', [('CS201', 'T001'), ('CS202', 'T003'), ('CS203', 'T003')])]:
+            campus_builder.sections(cls, year=year)
+            for cid, tid in courses:
+                campus_builder.course(cid, teachers[tid], year=year)
+        return Schedule.objects.create(name='decompose', semester='odd', status='PENDING')
+
+    def allocated(self, campus):
+        problem = load_problem('odd')
+        scheduler = TimetableScheduler(campus, problem=problem)
+        scheduler._preallocate_teachers(list(problem.sections))
+        return problem, scheduler
+
+    def test_partition_splits_weakly_coupled_years(self, campus):
+        problem, scheduler = self.allocated(campus)
+        assert partition(problem, scheduler.teacher_assignments) == [['CSE1A'], ['CSE2A']]
+
+        # One teacher for everything couples the years into a single block
+        shared = {key: problem.teachers['T001'] for key in scheduler.teacher_assignments}
+        assert partition(problem, shared) == [['CSE1A', 'CSE2A']]
+
+    def test_reconcile_repairs_cross_block_teacher_clash(self, campus):
+        problem, scheduler = self.allocated(campus)
+        tasks, ts_by_day = scheduler._prepare()
+        ids = dict(zip(task_ids(tasks), tasks))
+        first = next(tid for tid in ids if tid[0] == ('course', 'CSE1A', 'CS101'))
+        second = next(tid for tid in ids if tid[0] == ('course', 'CSE2A', 'CS201'))
+
+        # Both blocks put their T001 lecture at MON1
+        relaxed = _reconcile(scheduler, tasks, ts_by_day, [(0, True, {first: ('MON1',)}), (1, True, {second: ('MON1',)})])
+
+        assert relaxed == 0
+        assert all(task.window is not None for task in tasks)
+        assert [ts.slot_id for ts in ids[first].window] == ['MON1']
+        assert [ts.slot_id for ts in ids[second].window] != ['MON1']
+        booked = Counter((e.teacher.teacher_id, e.timeslot.slot_id) for e in scheduler.entries)
+        assert max(booked.values()) == 1
+
+    def test_decomposed_generation_persists_complete_schedule(self, campus):
+        single = TimetableScheduler(campus, problem=load_problem('odd'))
+        assert single.solve()
+
+        success, _ = TimetableScheduler(campus).generate(decompose=True, portfolio=0, optimize=0)
+        assert success
+
+        campus.refresh_from_db()
+        assert campus.status == 'COMPLETED'
+        rows = ScheduleEntry.objects.filter(schedule=campus)
+        assert rows.count() == len(single.entries)
+        assert rows.values('teacher', 'timeslot').distinct().count() == rows.count()
+        assert rows.values('section', 'timeslot').distinct().count() == rows.count()
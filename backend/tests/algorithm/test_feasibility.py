@@ -0,0 +1,68 @@
+"""
+Unit Tests for the Pre-Solve Feasibility Analysis
+
+Author: M3 Backend Team
+"""
+
+import pytest
+
+from core.models import Course
+from scheduler.algorithm import check_feasibility
+
+
+def kinds(report):
+    return sorted((issue['severity'], issue['kind'], issue['subject']) for issue in report.issues)
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestFeasibility:
+    """Test cases for the capacity bounds reported before a solve"""
+
+    @pytest.fixture
+    def campus(self, campus_builder):
+        # Three slots a day with a break after slot 2
+        campus_builder.week(hours=[9, 10, 12])
+        campus_builder.rooms()
+        campus_builder.sections('CSE1A')
+        teacher = campus_builder.teacher('T001')
+        campus_builder.course('CS101', teacher, practicals=2)
+        return teacher
+
+    def test_clean_inputs(self, campus):
+        report = check_feasibility('odd')
+        assert report.feasible
+        assert report.issues == []
+        assert report.stats['sessions'] == 5
+        assert report.stats['longest_stretch'] == 2
+
+    def test_section_and_teacher_hours(self, campus):
+        Course.objects.filter(course_id='CS101').update(lectures=13)
+        report = check_feasibility('odd')
+        assert not report.feasible
+        assert ('error', 'section_hours', 'CSE1A') in kinds(report)
+        assert ('error', 'teacher_hours', 'T001') in kinds(report)
+        issue = next(i for i in report.issues if i['kind'] == 'section_hours')
+        assert (issue['required'], issue['available']) == (16, 15)
+
+    def test_blocks_per_day_and_lab_rooms(self, campus, campus_builder):
+        # Each day has one 2-slot stretch before its break; slot 3 stands alone
+        campus_builder.course('CS102', campus, lectures=0, theory=0, practicals=2)
+        assert check_feasibility('odd').feasible
+
+        for cid in ['CS103', 'CS104', 'CS105', 'CS106']:
+            campus_builder.course(cid, campus, lectures=0, theory=0, practicals=2)
+        report = check_feasibility('odd')
+        # 6 lab blocks, 12 slots: the hours fit but only 5 two-slot stretches exist
+        assert ('error', 'section_blocks', 'CSE1A') in kinds(report)
+        assert ('error', 'room_blocks', 'LAB') in kinds(report)
+        assert not any(i['kind'] == 'section_hours' for i in report.issues)
+
+    def test_consecutive_limit_and_warnings(self, campus, campus_builder):
+        campus.max_consecutive_hours = 1
+        campus.max_hours_per_week = 4
+        campus.save()
+        campus_builder.course('CS107', lectures=1, theory=0)
+        report = check_feasibility('odd')
+        assert kinds(report) == [('error', 'teacher_consecutive', 'T001'),
+                                 ('warning', 'teacher_max_hours', 'T001'),
+                                 ('warning', 'unstaffed', 'CS107/CSE1A')]
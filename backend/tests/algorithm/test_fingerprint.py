@@ -0,0 +1,67 @@
+"""
+Unit Tests for the Generation Fingerprint Cache
+
+Author: M3 Backend Team
+"""
+
+import pytest
+
+from core.models import Teacher, Schedule, ScheduleEntry
+from scheduler.algorithm import TimetableScheduler
+from scheduler.fingerprint import ENTRY_FIELDS
+
+
+def entry_rows(schedule):
+    return sorted(ScheduleEntry.objects.filter(schedule=schedule).values_list(*ENTRY_FIELDS), key=repr)
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestFingerprintCache:
+    """Test cases for reusing identical generations"""
+
+    @pytest.fixture
+    def generated(self, campus_builder):
+        campus_builder.week()
+        campus_builder.rooms(labs=[])
+        teacher = campus_builder.teacher('T001', max_hours_per_week=30)
+        campus_builder.sections('CSE1A')
+        for cid in ['CS101', 'CS102']:
+            campus_builder.course(cid, teacher)
+
+        first = Schedule.objects.create(name='first', semester='odd', status='PENDING')
+        assert TimetableScheduler(first).generate(portfolio=0, optimize=0)[0]
+        first.refresh_from_db()
+        return first
+
+    def generate(self, **options):
+        schedule = Schedule.objects.create(name='again', semester='odd', status='PENDING')
+        scheduler = TimetableScheduler(schedule)
+        scheduler.solve = lambda **kwargs: pytest.fail('identical inputs must not be solved again')
+        success, message = scheduler.generate(portfolio=0, optimize=0, **options)
+        schedule.refresh_from_db()
+        return schedule, message
+
+    def test_identical_inputs_copy_entries(self, generated):
+        schedule, message = self.generate()
+
+        assert 'reused' in message
+        assert schedule.status == generated.status
+        assert schedule.input_fingerprint == generated.input_fingerprint
+        assert entry_rows(schedule) == entry_rows(generated)
+
+    def test_changed_inputs_or_force_solve_again(self, generated):
+        Teacher.objects.filter(teacher_id='T001').update(max_hours_per_week=29)
+        with pytest.raises(pytest.fail.Exception):
+            self.generate()
+
+        Teacher.objects.filter(teacher_id='T001').update(max_hours_per_week=30)
+        with pytest.raises(pytest.fail.Exception):
+            self.generate(force=True)
+
+    def test_edited_schedule_is_not_reused(self, generated):
+        entry = ScheduleEntry.objects.filter(schedule=generated).first()
+        entry.timeslot_id = 'FRI6'
+        entry.save()
+
+        with pytest.raises(pytest.fail.Exception):
+            self.generate()
@@ -0,0 +1,86 @@
+"""
+Unit Tests for Incremental Re-generation
+
+Author: M3 Backend Team
+"""
+
+from collections import Counter
+
+import pytest
+
+from core.models import Schedule, ScheduleEntry
+from scheduler.algorithm import TimetableScheduler, check_feasibility
+from scheduler.incremental import IncrementalPlan, normalize_changes
+from scheduler.problem import load_problem
+
+ROW = ('section_id', 'course_id', 'teacher_id', 'room_id', 'timeslot_id', 'session_type')
+
+
+def rows(schedule, **filters):
+    return Counter(ScheduleEntry.objects.filter(schedule=schedule, **filters).values_list(*ROW))
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestIncrementalPlan:
+    """Test cases for ripping, pinning and re-placing a changed teacher's sessions"""
+
+    @pytest.fixture
+    def base(self, campus_builder):
+        campus_builder.week()
+        campus_builder.rooms(classrooms=['A-101', 'A-102'], labs=[])
+        teachers = [campus_builder.teacher(f'T00{i}', max_hours_per_week=30) for i in (1, 2)]
+        campus_builder.sections('CSE1A', 'CSE1B')
+        for cid, teacher in [('CS101', teachers[0]), ('CS102', teachers[1]), ('CS103', teachers[0])]:
+            campus_builder.course(cid, teacher)
+
+        schedule = Schedule.objects.create(name='base', semester='odd', status='PENDING')
+        success, _ = TimetableScheduler(schedule).generate(portfolio=0, optimize=0)
+        assert success
+        return schedule
+
+    def test_rips_only_changed_teacher_and_neighbourhood(self, base):
+        plan = IncrementalPlan(base, load_problem('odd'), {'teachers': ['T002']})
+
+        touched = {('course', r['section_id'], r['course_id'])
+                   for r in ScheduleEntry.objects.filter(schedule=base, teacher_id='T002').values('section_id', 'course_id')}
+        assert touched <= plan.ripped
+        # Neighbours share a (section, day) with a ripped T002 session
+        days = set(ScheduleEntry.objects.filter(schedule=base, teacher_id='T002')
+                   .values_list('section_id', 'timeslot__day'))
+        for key in plan.ripped - touched:
+            assert ScheduleEntry.objects.filter(schedule=base, section_id=key[1], course_id=key[2]) \
+                .filter(timeslot__day__in=[d for s, d in days if s == key[1]]).exists()
+        assert len(plan.pinned) + plan.ripped_count == ScheduleEntry.objects.filter(schedule=base).count()
+        # Unchanged teachers keep their ripped sessions
+        assert all(t == 'T001' for t in plan.base_teachers.values())
+
+    def test_regenerate_keeps_pinned_entries(self, base):
+        plan = IncrementalPlan(base, load_problem('odd'), {'teachers': ['T002']})
+        pinned = Counter(tuple(r[f] for f in ROW) for r in plan.pinned)
+
+        schedule = Schedule.objects.create(name='incremental', semester='odd', status='PENDING')
+        success, _ = TimetableScheduler(schedule).generate(portfolio=0, optimize=0, base=base,
+                                                           changes={'teachers': ['T002']})
+        assert success
+
+        after = rows(schedule)
+        assert not pinned - after
+        assert sum(after.values()) == ScheduleEntry.objects.filter(schedule=base).count()
+        # The base schedule is left untouched
+        assert ScheduleEntry.objects.filter(schedule=base).exists()
+
+        entries = ScheduleEntry.objects.filter(schedule=schedule)
+        for field in ('teacher_id', 'section_id', 'room_id'):
+            booked = Counter(entries.exclude(**{field: None}).values_list(field, 'timeslot_id'))
+            assert max(booked.values()) == 1
+
+    def test_feasibility_covers_ripped_sessions(self, base):
+        full = check_feasibility('odd')
+        # Nothing changed: every session stays pinned and none is left to place
+        report = check_feasibility('odd', base=base.schedule_id, changes={})
+        assert report.feasible
+        assert (report.stats['tasks'], full.stats['tasks']) == (0, 18)
+
+    def test_rejects_unknown_change_kind(self):
+        with pytest.raises(ValueError):
+            normalize_changes({'buildings': ['A']})
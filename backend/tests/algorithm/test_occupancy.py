@@ -0,0 +1,99 @@
+"""
+Unit Tests for the Bitset Occupancy Grid
+
+Author: M3 Backend Team
+"""
+
+from types import SimpleNamespace
+
+from scheduler.occupancy import OccupancyGrid, TEACHER, ROOM, SECTION
+
+DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI']
+
+
+def slot(day, number):
+    return SimpleNamespace(day=day, slot_number=number)
+
+
+class TestOccupancyGrid:
+    """Test cases for the per-resource weekly bitmasks"""
+
+    def test_intern_is_stable_per_kind(self):
+        grid = OccupancyGrid(DAYS)
+        t = grid.intern(TEACHER, 'T001')
+        assert grid.intern(TEACHER, 'T001') == t
+        assert grid.intern(TEACHER, 'T002') != t
+        # Each kind has its own id space
+        assert grid.intern(ROOM, 'T001') == 0
+        assert grid.key_of(TEACHER, t) == 'T001'
+
+    def test_window_overlap_detection(self):
+        grid = OccupancyGrid(DAYS)
+        t = grid.intern(TEACHER, 'T001')
+        grid.occupy(TEACHER, t, grid.window_mask([slot('MON', 2), slot('MON', 3)]))
+
+        assert not grid.is_free(TEACHER, t, grid.window_mask([slot('MON', 3), slot('MON', 4)]))
+        assert grid.is_free(TEACHER, t, grid.window_mask([slot('MON', 4), slot('MON', 5)]))
+        # Same slot number on another day does not collide
+        assert grid.is_free(TEACHER, t, grid.window_mask([slot('TUE', 2)]))
+
+    def test_release_and_day_bits(self):
+        grid = OccupancyGrid(DAYS)
+        s = grid.intern(SECTION, 'CSE1A')
+        lab = grid.window_mask([slot('WED', 1), slot('WED', 2)])
+        grid.occupy(SECTION, s, lab)
+        grid.occupy(SECTION, s, grid.slot_bit('WED', 6))
+
+        assert grid.day_bits(SECTION, s, 'WED') == 0b100011
+        assert grid.day_bits(SECTION, s, 'THU') == 0
+
+        grid.release(SECTION, s, lab)
+        assert grid.day_bits(SECTION, s, 'WED') == 0b100000
+
+        grid.clear()
+        assert grid.busy_mask(SECTION, s) == 0
+        assert grid.intern(SECTION, 'CSE1A') == s
+
+    def test_longest_run(self):
+        grid = OccupancyGrid(DAYS)
+        t = grid.intern(TEACHER, 'T001')
+        grid.occupy(TEACHER, t, grid.window_mask([slot('MON', n) for n in (1, 2, 3, 6)]))
+
+        assert grid.longest_run(TEACHER, t, 'MON') == 3
+        assert grid.longest_run(TEACHER, t, 'TUE') == 0
+        # Slot 4 joins the morning run, slot 5 then bridges it to slot 6
+        assert grid.longest_run(TEACHER, t, 'MON', grid.slot_bit('MON', 4)) == 4
+        assert grid.longest_run(TEACHER, t, 'MON', grid.window_mask([slot('MON', 4), slot('MON', 5)])) == 6
+
+
+class TestTrailRollback:
+    """Test cases for undoing grid, counter and entry mutations"""
+
+    def test_rollback_restores_state(self):
+        from collections import defaultdict
+        from scheduler.trail import Trail
+
+        entries = []
+        trail = Trail(entries)
+        grid = OccupancyGrid(DAYS)
+        grid.trail = trail
+        counts = defaultdict(int)
+        t = grid.intern(TEACHER, 'T001')
+
+        grid.occupy(TEACHER, t, grid.slot_bit('MON', 1))
+        outer = trail.checkpoint()
+        grid.occupy(TEACHER, t, grid.slot_bit('MON', 2))
+        trail.add(counts, ('T001', 'MON'), 1)
+        entries.append('placed')
+        inner = trail.checkpoint()
+        trail.add(counts, ('T001', 'MON'), 1)
+        entries.append('placed again')
+
+        trail.rollback(inner)
+        assert counts[('T001', 'MON')] == 1
+        assert entries == ['placed']
+
+        trail.rollback(outer)
+        assert grid.day_bits(TEACHER, t, 'MON') == 0b1
+        assert counts[('T001', 'MON')] == 0
+        assert entries == []
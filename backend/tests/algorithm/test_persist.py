@@ -0,0 +1,63 @@
+"""
+Unit Tests for Entry Persistence
+
+Author: M3 Backend Team
+"""
+
+import pytest
+
+from core.models import Schedule, ScheduleEntry
+from scheduler.algorithm import TimetableScheduler
+from scheduler.fingerprint import stored_digest
+from scheduler.incremental import ENTRY_FIELDS
+from scheduler.persist import purge_entries, write_entries
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestPersist:
+    """Test cases for the raw purge and the batched entry writer"""
+
+    @pytest.fixture
+    def campus(self, campus_builder):
+        campus_builder.week(slots=4)
+        campus_builder.rooms()
+        campus_builder.sections('CSE1A')
+        campus_builder.course('CS101', campus_builder.teacher('T001'), lectures=3, practicals=2)
+
+    def rows(self, count):
+        return [('CSE1A', 'CS101', 'T001', 'A-101' if n % 2 else None, f'MON{n + 1}', False, 'LECTURE', None)
+                for n in range(count)]
+
+    def test_batches_write_every_row(self, campus):
+        schedule = Schedule.objects.create(name='s', semester='odd', status='PENDING')
+        metrics = write_entries(schedule, iter(self.rows(4)), batch_size=3)
+        assert (metrics['method'], metrics['rows']) == ('insert', 4)
+        assert metrics['rows_per_second'] > 0
+
+        stored = ScheduleEntry.objects.filter(schedule=schedule).order_by('timeslot_id')
+        assert list(stored.values_list(*ENTRY_FIELDS)) == self.rows(4)
+        assert all(e.last_modified is not None for e in stored)
+
+    def test_purge_only_touches_its_schedule(self, campus):
+        first = Schedule.objects.create(name='first', semester='odd', status='PENDING')
+        second = Schedule.objects.create(name='second', semester='odd', status='PENDING')
+        write_entries(first, self.rows(3))
+        write_entries(second, self.rows(2))
+
+        assert purge_entries(first) == 3
+        assert not ScheduleEntry.objects.filter(schedule=first).exists()
+        assert ScheduleEntry.objects.filter(schedule=second).count() == 2
+
+    def test_generate_records_metrics(self, campus, settings):
+        settings.SCHEDULER_PERSIST_BATCH_SIZE = 2
+        schedule = Schedule.objects.create(name='s', semester='odd', status='PENDING')
+        write_entries(schedule, self.rows(3))  # left over from an earlier run
+
+        TimetableScheduler(schedule).generate()
+        schedule.refresh_from_db()
+        metrics = schedule.generation_metrics
+        assert metrics['engine'] == 'backtrack'
+        assert metrics['persist']['rows'] == ScheduleEntry.objects.filter(schedule=schedule).count() == 6
+        assert metrics['solve_seconds'] >= 0
+        # The digest of the streamed rows matches what was stored
+        assert stored_digest(schedule) == schedule.entries_digest
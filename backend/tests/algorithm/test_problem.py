@@ -0,0 +1,86 @@
+"""
+Unit Tests for the ProblemInstance Loader
+
+Author: M3 Backend Team
+"""
+
+from datetime import time
+
+import pytest
+
+from core.models import Teacher, Course, Section, TeacherCourseMapping, TimeSlot
+from scheduler.problem import load_problem
+
+
+def make_course(course_id, name, year=1, **kwargs):
+    defaults = dict(semester='odd', lectures=3, theory=1, practicals=0, credits=3, weekly_slots=4)
+    defaults.update(kwargs)
+    return Course.objects.create(course_id=course_id, course_name=name, year=year, **defaults)
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestLoadProblem:
+    """Test cases for the bulk-loaded generation snapshot"""
+
+    @pytest.fixture
+    def problem_data(self):
+        t1 = Teacher.objects.create(teacher_id='T001', teacher_name='A', email='a@x.com', department='CSE', max_hours_per_week=18)
+        t2 = Teacher.objects.create(teacher_id='T002', teacher_name='B', email='b@x.com', department='CSE', max_hours_per_week=18)
+        sa = Section.objects.create(class_id='CSE1A', year=1, section='A', department='CSE')
+        sb = Section.objects.create(class_id='CSE1B', year=1, section='B', department='CSE')
+        core = make_course('CS101', 'Programming')
+        project = make_course('CS199', 'Project Phase I', practicals=2)
+        make_course('CS201', 'Even Course', semester='even')
+        e1 = make_course('EL1', 'Elective One', is_elective=True, elective_group='PE1')
+        e2 = make_course('EL2', 'Elective Two', is_elective=True, elective_group='PE1')
+
+        TeacherCourseMapping.objects.create(teacher=t1, course=core, section=sa)
+        TeacherCourseMapping.objects.create(teacher=t2, course=core)
+        TeacherCourseMapping.objects.create(teacher=t1, course=project)
+        TeacherCourseMapping.objects.create(teacher=t2, course=e2)
+        TeacherCourseMapping.objects.create(teacher=t1, course=e1)
+        return {'sa': sa, 'sb': sb}
+
+    def test_constant_query_count(self, problem_data, django_assert_max_num_queries):
+        with django_assert_max_num_queries(6):
+            problem = load_problem('odd')
+        # Lookups afterwards never touch the database
+        with django_assert_max_num_queries(0):
+            problem.mappings_for('CS101', 'CSE1A')[0].teacher.teacher_name
+            problem.core_courses(1)
+
+    def test_indexes(self, problem_data):
+        problem = load_problem('odd')
+
+        assert [c.course_id for c in problem.core_courses(1)] == ['CS101']
+        assert [c.course_id for c in problem.project_courses(1)] == ['CS199']
+        assert 'CS201' not in problem.courses
+
+        # Section-specific mapping wins, otherwise the year-wide one is used
+        assert [m.teacher_id for m in problem.mappings_for('CS101', 'CSE1A')] == ['T001']
+        assert [m.teacher_id for m in problem.mappings_for('CS101', 'CSE1B')] == ['T002']
+
+        assert [c.course_id for c in problem.elective_groups['PE1']] == ['EL1', 'EL2']
+        assert [m.course_id for m in problem.group_mappings['PE1']] == ['EL1', 'EL2']
+        # Related objects are shared with the snapshot's own indexes
+        assert problem.group_mappings['PE1'][0].teacher is problem.teachers['T001']
+
+    def test_scoped_snapshot(self, problem_data):
+        Section.objects.create(class_id='ECE2A', year=2, section='A', department='ECE')
+
+        problem = load_problem('odd', year=1)
+        assert [s.class_id for s in problem.sections] == ['CSE1A', 'CSE1B']
+        # Out-of-scope sections still resolve for lookups
+        assert problem.section('ECE2A').department == 'ECE'
+        assert 'PE1' in problem.elective_groups
+
+        problem = load_problem('odd', department='ECE')
+        assert [s.class_id for s in problem.sections] == ['ECE2A']
+
+    def test_breaks_follow_slot_times(self, problem_data):
+        # MON has a gap before slot 3; TUE runs straight through
+        for n, start, end in [(1, time(9), time(10)), (2, time(10), time(11)), (3, time(11, 15), time(12)), (4, time(12), time(13))]:
+            TimeSlot.objects.create(slot_id=f'MON{n}', day='MON', slot_number=n, start_time=start, end_time=end)
+            TimeSlot.objects.create(slot_id=f'TUE{n}', day='TUE', slot_number=n, start_time=time(8 + n), end_time=time(9 + n))
+
+        assert load_problem('odd').breaks_by_day() == {'MON': {2}, 'TUE': set()}
@@ -0,0 +1,130 @@
+"""
+Unit Tests for Forward Checking over Window Domains
+
+Author: M3 Backend Team
+"""
+
+from types import SimpleNamespace
+
+from scheduler.occupancy import OccupancyGrid, TEACHER, SECTION, ROOM
+from scheduler.propagation import WindowTable, DomainStore
+from scheduler.trail import Trail
+
+DAYS = ['MON', 'TUE']
+
+
+def build(tasks, rooms_by_type, slots_per_day=4, break_after=(2,)):
+    entries = []
+    trail = Trail(entries)
+    grid = OccupancyGrid(DAYS)
+    grid.trail = trail
+    ts_by_day = {d: [SimpleNamespace(day=d, slot_number=n) for n in range(1, slots_per_day + 1)] for d in DAYS}
+    table = WindowTable(DAYS, ts_by_day, grid, {d: break_after for d in DAYS})
+    for i, t in enumerate(tasks): t.index = i
+    store = DomainStore(
+        tasks, table, grid, trail, rooms_by_type,
+        resources=lambda t: [(TEACHER, grid.intern(TEACHER, t.teacher)), (SECTION, grid.intern(SECTION, t.section))],
+        room_demand=lambda t: t.rooms,
+    )
+    return store, table, grid, trail
+
+
+def task(teacher, section, block_size=1, rooms=None, priority=4):
+    return SimpleNamespace(teacher=teacher, section=section, block_size=block_size, priority=priority,
+                           rooms=rooms if rooms is not None else {'CLASSROOM': 1}, copies=(), copy_rank=0)
+
+
+ROOMS = {'CLASSROOM': [SimpleNamespace(room_id='A-101')], 'LAB': []}
+
+
+class TestWindowTable:
+    def test_break_crossing_windows_are_excluded(self):
+        _, table, _, _ = build([], ROOMS)
+        windows, _, day_ids, _ = table.table(2)
+        starts = [windows[w][0].slot_number for w in day_ids['MON']]
+        # Slots 2-3 straddle the break after slot 2
+        assert starts == [1, 3]
+
+
+class TestDomainStore:
+    def test_shared_section_loses_overlapping_windows(self):
+        tasks = [task('T1', 'S1'), task('T2', 'S1'), task('T3', 'S2')]
+        store, table, grid, trail = build(tasks, ROOMS)
+        assert store.size(1) == 8
+
+        windows, masks, _, _ = table.table(1)
+        mark = trail.checkpoint()
+        grid.occupy(ROOM, grid.intern(ROOM, 'A-101'), masks[0])
+        assert store.assign(0, masks[0], 0) is None
+        # Same section: window taken away. Different section: only the room is gone.
+        assert store.size(1) == 7
+        assert store.size(2) == 7
+
+        trail.rollback(mark)
+        assert store.size(1) == 8 and not store.placed[0]
+
+    def test_room_shortage_empties_domain(self):
+        # Needs two labs at once but the campus has none
+        tasks = [task('T1', 'S1', rooms={'LAB': 2})]
+        store, _, _, _ = build(tasks, ROOMS)
+        assert store.size(0) == 0
+
+    def test_mrv_prefers_smallest_domain(self):
+        tasks = [task('T1', 'S1', priority=0), task('T2', 'S2', block_size=2, priority=4)]
+        store, _, _, _ = build(tasks, ROOMS)
+        # The two-slot block has 4 windows against 8, so it goes first despite priority
+        assert store.select() == 1
+
+    def test_copies_keep_canonical_order(self):
+        from scheduler.records import link_copies
+        tasks = [task('T1', 'S1'), task('T1', 'S1'), task('T1', 'S1')]
+        link_copies(tasks)
+        rooms = {'CLASSROOM': [SimpleNamespace(room_id=r) for r in ['A-101', 'A-102', 'A-103']], 'LAB': []}
+        store, table, grid, trail = build(tasks, rooms)
+        _, masks, day_ids, _ = table.table(1)
+
+        # The middle copy at MON 3: the first copy must come before it, the last after it
+        mon3 = masks[day_ids['MON'][2]]
+        assert store.assign(1, mon3, 0) is None
+        assert store.size(0) == 2
+        assert store.size(2) == 5
+
+        # The last copy at MON 4 leaves the first copy's domain alone
+        assert store.assign(2, masks[day_ids['MON'][3]], 1) is None
+        assert store.size(0) == 2
+
+    def test_first_copy_at_week_end_is_a_dead_end(self):
+        from scheduler.records import link_copies
+        tasks = [task('T1', 'S1'), task('T1', 'S1')]
+        link_copies(tasks)
+        store, table, grid, trail = build(tasks, ROOMS)
+        _, masks, _, _ = table.table(1)
+        # A first copy at the last slot of the week leaves the second copy nowhere,
+        # and the conflict set blames that placement
+        assert store.assign(0, masks[-1], 0) == 1
+
+    def test_state_key_tells_copy_placements_apart(self):
+        from scheduler.records import link_copies
+        copies = [task('T1', 'S1'), task('T1', 'S1'), task('T1', 'S1')]
+        link_copies(copies)
+        rooms = {'CLASSROOM': [SimpleNamespace(room_id=r) for r in ['A-101', 'A-102', 'A-103']], 'LAB': []}
+        store, table, grid, trail = build(copies + [task('T1', 'S1')], rooms)
+        _, masks, day_ids, _ = table.table(1)
+        mon1, mon3, tue1 = (masks[day_ids[d][n]] for d, n in [('MON', 0), ('MON', 2), ('TUE', 0)])
+
+        def place(path):
+            mark = trail.checkpoint()
+            for depth, (i, mask) in enumerate(path):
+                for kind, name in [(TEACHER, 'T1'), (SECTION, 'S1')]:
+                    grid.occupy(kind, grid.intern(kind, name), mask)
+                assert store.assign(i, mask, depth) is None
+            key, size = store.state_key(), store.size(1)
+            trail.rollback(mark)
+            return key, size
+
+        # Same tasks placed and same cells taken, but the last copy went to a
+        # different window: the middle copy's domain differs, so must the key
+        first = place([(0, mon1), (2, mon3), (3, tue1)])
+        second = place([(0, mon1), (2, tue1), (3, mon3)])
+        assert (first[1], second[1]) == (1, 2)
+        assert first[0] != second[0]
@@ -0,0 +1,93 @@
+"""
+Unit Tests for the Free-Room Index
+
+Author: M3 Backend Team
+"""
+
+from collections import defaultdict, namedtuple
+from types import SimpleNamespace
+
+from scheduler.algorithm import TimetableScheduler, TYPE_PE
+from scheduler.occupancy import OccupancyGrid, ROOM
+from scheduler.records import Task, SubTask
+from scheduler.rooms import RoomIndex
+from scheduler.trail import Trail
+
+DAYS = ['MON', 'TUE']
+Section = namedtuple('Section', 'class_id')
+
+
+def slot(day, number):
+    return SimpleNamespace(day=day, slot_number=number)
+
+
+def build():
+    trail = Trail([])
+    grid = OccupancyGrid(DAYS)
+    grid.trail = trail
+    rooms = {'CLASSROOM': [SimpleNamespace(room_id=r) for r in ['A-101', 'A-102', 'A-103']], 'LAB': []}
+    return RoomIndex(rooms, grid, trail, defaultdict(int)), grid, trail
+
+
+class TestRoomIndex:
+    """Test cases for free-room bitsets and utilization buckets"""
+
+    def test_least_used_free_room(self):
+        index, grid, trail = build()
+        mon = grid.window_mask([slot('MON', 1), slot('MON', 2)])
+
+        # Ties go to the first room in load order
+        assert index.least_used('CLASSROOM', mon).room_id == 'A-101'
+        index.occupy('A-101', grid.slot_bit('TUE', 1))
+        assert index.least_used('CLASSROOM', mon).room_id == 'A-102'
+
+        # A room busy at one slot of the window is not free for it
+        index.occupy('A-102', grid.slot_bit('MON', 2))
+        assert index.least_used('CLASSROOM', mon).room_id == 'A-103'
+        assert index.least_used('CLASSROOM', mon, exclude=index.bit(index.rooms['CLASSROOM'][2])).room_id == 'A-101'
+        assert index.least_used('LAB', mon) is None
+        assert not grid.is_free(ROOM, grid.intern(ROOM, 'A-102'), mon)
+
+    def test_rollback_restores_index(self):
+        index, grid, trail = build()
+        mon = grid.slot_bit('MON', 1)
+        mark = trail.checkpoint()
+        index.occupy('A-101', mon)
+        index.occupy('A-102', mon)
+        assert index.least_used('CLASSROOM', mon).room_id == 'A-103'
+
+        trail.rollback(mark)
+        assert index.least_used('CLASSROOM', mon).room_id == 'A-101'
+        assert index.utilization['A-101'] == 0
+
+        index.occupy('A-101', mon)
+        index.release('A-101', mon)
+        assert index.free_over('CLASSROOM', mon) == 0b111
+
+
+class TestGroupRooms:
+    """Test cases for room assignment across the sub-tasks of an elective group"""
+
+    def group(self, scheduler, courses):
+        subs = tuple(SubTask(SimpleNamespace(practicals=0), SimpleNamespace(teacher_id=f'T{i}'),
+                             (Section(f'CSE1{i}'),), 'PE') for i in range(courses))
+        task = Task(TYPE_PE, 1, 1, sub_tasks=subs, busy_teachers=tuple(sub.teacher for sub in subs), is_group=True)
+        task.intern(scheduler.grid)
+        task.room_demand = scheduler._room_demand(task)
+        return task
+
+    def test_group_needs_a_room_per_course(self):
+        scheduler = TimetableScheduler(None)
+        scheduler.rooms_by_type['CLASSROOM'] = [SimpleNamespace(room_id=r) for r in ['A-101', 'A-102']]
+        scheduler.room_index = RoomIndex(scheduler.rooms_by_type, scheduler.grid, scheduler.trail, scheduler.room_utilization)
+        scheduler.room_index.occupy('A-101', scheduler.grid.slot_bit('MON', 1))
+        task = self.group(scheduler, 2)
+
+        assert scheduler._can_place_group(task, [slot('MON', 2)])
+        assert sorted(sub.selected_room.room_id for sub in task.sub_tasks) == ['A-101', 'A-102']
+
+        # One free room for two parallel courses fails fast; the relaxed phase leaves one TBA
+        assert not scheduler._can_place_group(task, [slot('MON', 1)])
+        scheduler.in_greedy_phase = True
+        assert scheduler._can_place_group(task, [slot('MON', 1)])
+        assert [sub.selected_room and sub.selected_room.room_id for sub in task.sub_tasks] == ['A-102', None]
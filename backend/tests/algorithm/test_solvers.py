@@ -0,0 +1,85 @@
+"""
+Unit Tests for the Solver Backend Registry
+
+Author: M3 Backend Team
+"""
+
+import importlib.util
+import sys
+
+import pytest
+
+from core.models import Schedule, ScheduleEntry
+from scheduler import solvers
+from scheduler.algorithm import TimetableScheduler
+
+
+def fake_solver(scheduler, **options):
+    scheduler.fake_options = options
+    scheduler._prepare()
+    return True
+
+
+class TestRegistry:
+    """Test cases for engine lookup and lazy imports"""
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError, match="Unknown engine 'simplex'.*backtrack, .*greedy, local-search"):
+            solvers.get_solver('simplex')
+
+    def test_optional_dependency(self, monkeypatch):
+        find_spec = importlib.util.find_spec
+        monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None if name == 'ortools' else find_spec(name))
+        monkeypatch.setattr(solvers, '_loaded', {})
+        assert solvers.engines() == ['backtrack', 'greedy', 'local-search']
+        with pytest.raises(ImportError, match="'cpsat' needs the 'ortools' package"):
+            solvers.get_solver('cpsat')
+
+    def test_engines_import_on_first_use(self, monkeypatch):
+        monkeypatch.setattr(solvers, '_registry', dict(solvers._registry))
+        monkeypatch.setattr(solvers, '_loaded', {})
+        monkeypatch.delitem(sys.modules, 'tests.algorithm.test_solvers', raising=False)
+        solvers.register('fake', 'tests.algorithm.test_solvers:fake_solver')
+        assert 'fake' in solvers.engines()
+        assert 'tests.algorithm.test_solvers' not in sys.modules
+
+        solver = solvers.get_solver('fake')
+        assert solver.__name__ == 'fake_solver'
+        assert 'tests.algorithm.test_solvers' in sys.modules
+        assert solvers.get_solver('fake') is solver
+
+
+@pytest.mark.django_db(databases=['default', 'audit_db'])
+class TestEngines:
+    """Test cases for generating through each built-in engine"""
+
+    @pytest.fixture
+    def small_campus(self, campus_builder):
+        campus_builder.week(slots=4)
+        campus_builder.rooms()
+        teacher = campus_builder.teacher('T001')
+        campus_builder.sections('CSE1A', 'CSE1B')
+        for cid, practicals in [('CS101', 0), ('CS102', 2)]:
+            campus_builder.course(cid, teacher, practicals=practicals)
+
+    @pytest.mark.parametrize('engine', ['backtrack', 'greedy', 'local-search'])
+    def test_engine_completes_small_campus(self, small_campus, engine):
+        schedule = Schedule.objects.create(name=engine, semester='odd', status='PENDING')
+        assert TimetableScheduler(schedule).generate(engine=engine, time_budget=0.2)[0]
+        schedule.refresh_from_db()
+        assert schedule.status == 'COMPLETED'
+        assert ScheduleEntry.objects.filter(schedule=schedule).count() == 16
+
+    def test_engine_is_part_of_the_fingerprint(self, small_campus, monkeypatch):
+        monkeypatch.setattr(solvers, '_registry', dict(solvers._registry))
+        monkeypatch.setattr(solvers, '_loaded', {})
+        solvers.register('fake', 'tests.algorithm.test_solvers:fake_solver')
+
+        first = Schedule.objects.create(name='first', semester='odd', status='PENDING')
+        TimetableScheduler(first).generate(engine='backtrack')
+        second = Schedule.objects.create(name='second', semester='odd', status='PENDING')
+        scheduler = TimetableScheduler(second)
+        scheduler.generate(engine='fake', time_budget=5)
+        # Not served from the backtracking run's cache
+        assert scheduler.fake_options['time_budget'] == 5
+        assert ScheduleEntry.objects.filter(schedule=second).count() == 0
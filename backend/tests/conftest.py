@@ -1,7 +1,9 @@
+from datetime import time
+
 import pytest
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
-from core.models import Teacher, Room, Course, Section, TimeSlot, Schedule
+from core.models import Teacher, Room, Course, Section, TimeSlot, Schedule, TeacherCourseMapping
 from django.conf import settings
 
 User = get_user_model()
@@ -98,6 +100,53 @@ def sample_data(db):
         'section': section
     }
 
+class CampusBuilder:
+    """
+    Creates the small campuses the scheduler tests generate on.
+
+    Fields the scheduler does not read (names, emails, credits, ...) get
+    fixed defaults, so a test only spells out the shape it depends on.
+    """
+
+    DAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI']
+
+    def week(self, slots=6, hours=None):
+        """One-hour slots on every weekday, back to back from 9:00 unless start `hours` are given."""
+        for day in self.DAYS:
+            for n, hour in enumerate(hours or range(9, 9 + slots), 1):
+                TimeSlot.objects.create(slot_id=f'{day}{n}', day=day, slot_number=n,
+                                        start_time=time(hour), end_time=time(hour + 1))
+
+    def rooms(self, classrooms=('A-101',), labs=('A-103',)):
+        for room_id in classrooms:
+            Room.objects.create(room_id=room_id, block='A', floor=1, room_type='CLASSROOM')
+        for room_id in labs:
+            Room.objects.create(room_id=room_id, block='A', floor=1, room_type='LAB')
+
+    def sections(self, *class_ids, year=1):
+        for class_id in class_ids:
+            Section.objects.create(class_id=class_id, year=year, section=class_id[-1], department='CSE')
+
+    def teacher(self, teacher_id, **fields):
+        defaults = dict(teacher_name=teacher_id, email=f'{teacher_id.lower()}@x.com', department='CSE',
+                        max_hours_per_week=20)
+        return Teacher.objects.create(teacher_id=teacher_id, **{**defaults, **fields})
+
+    def course(self, course_id, teacher=None, **fields):
+        """A course (weekly_slots = lectures + theory + practicals), mapped to `teacher` when given."""
+        defaults = dict(course_name=course_id, year=1, semester='odd', lectures=2, theory=1, practicals=0, credits=3)
+        fields = {**defaults, **fields}
+        fields.setdefault('weekly_slots', fields['lectures'] + fields['theory'] + fields['practicals'])
+        course = Course.objects.create(course_id=course_id, **fields)
+        if teacher is not None:
+            TeacherCourseMapping.objects.create(teacher=teacher, course=course)
+        return course
+
+
+@pytest.fixture
+def campus_builder(db):
+    return CampusBuilder()
+
 @pytest.fixture
 def generated_schedule(db):
     schedule = Schedule.objects.create(
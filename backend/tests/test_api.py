@@ -71,3 +71,72 @@ class TestSchedulerAPI:
         response = api_client.post(url, payload)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert 'error' in response.data
+
+    def test_generate_schedule_feasibility_report(self, api_client, admin_user, sample_data):
+        """
+        Ensure the pre-solve report is returned, and can stop an infeasible run before it starts.
+        """
+        from core.models import TeacherCourseMapping
+        TeacherCourseMapping.objects.create(teacher=sample_data['teacher'], course=sample_data['course'])
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('generate-schedule')
+
+        # Six weekly sessions but a single timeslot
+        response = api_client.post(url, {'name': 'Check', 'semester': 'odd', 'year': 1, 'check_only': True},
+                                   format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['feasibility']['feasible'] is False
+        assert {i['kind'] for i in response.data['feasibility']['issues']} >= {'section_hours', 'teacher_hours'}
+        assert not Schedule.objects.filter(name='Check').exists()
+
+        response = api_client.post(url, {'name': 'Skipped', 'semester': 'odd', 'year': 1, 'skip_if_infeasible': True},
+                                   format='json')
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert not Schedule.objects.filter(name='Skipped').exists()
+
+    def test_generate_schedule_skips_report_unless_asked(self, api_client, admin_user, sample_data, monkeypatch):
+        """
+        Ensure a plain generation request does not build the feasibility report in the web worker.
+        """
+        def fail(*args, **kwargs):
+            raise AssertionError("check_feasibility should not run")
+        monkeypatch.setattr('scheduler.algorithm.check_feasibility', fail)
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.post(reverse('generate-schedule'), {'name': 'Plain', 'semester': 'odd', 'year': 1},
+                                   format='json')
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['feasibility'] is None
+
+    def test_generate_schedule_engine_validation(self, api_client, admin_user, sample_data):
+        """
+        Ensure unknown engines and negative time budgets are rejected before a schedule is created.
+        """
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('generate-schedule')
+        response = api_client.post(url, {'name': 'Bad', 'semester': 'odd', 'engine': 'simplex'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'backtrack' in response.data['error']
+
+        response = api_client.post(url, {'name': 'Bad', 'semester': 'odd', 'time_budget': -1}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Schedule.objects.filter(name='Bad').exists()
+
+    def test_generate_schedule_option_parsing(self, api_client, admin_user, sample_data, monkeypatch):
+        """
+        Ensure form-encoded 'false' flags stay off and non-integer reserve ids are rejected.
+        """
+        def fail(*args, **kwargs):
+            raise AssertionError("check_feasibility should not run")
+        monkeypatch.setattr('scheduler.algorithm.check_feasibility', fail)
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('generate-schedule')
+        response = api_client.post(url, {'name': 'Flags', 'semester': 'odd', 'year': 1, 'force': 'false',
+                                         'check_only': 'false', 'skip_if_infeasible': 'false'})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['feasibility'] is None
+
+        response = api_client.post(url, {'name': 'Bad', 'semester': 'odd', 'reserve_schedule_ids': ['x']},
+                                   format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'integers' in response.data['error']
+        assert not Schedule.objects.filter(name='Bad').exists()
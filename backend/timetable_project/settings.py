@@ -218,3 +218,24 @@ DEFAULT_FROM_EMAIL = 'm3amrita+admin@gmail.com'
 # Google OAuth Configuration
 # Get your Client ID from https://console.cloud.google.com/
 GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
+
+# Scheduler Configuration
+# Seconds a Celery generation task searches before checkpointing and re-queueing itself (0 = never)
+SCHEDULER_TASK_SLICE_SECONDS = config('SCHEDULER_TASK_SLICE_SECONDS', default=0, cast=int)
+# Seconds the exact search may run before the greedy phase completes its best partial result (0 = no limit)
+SCHEDULER_TIME_BUDGET_SECONDS = config('SCHEDULER_TIME_BUDGET_SECONDS', default=0, cast=int)
+# Seeded search variants raced across worker processes per generation (0 = single search)
+SCHEDULER_PORTFOLIO_SIZE = config('SCHEDULER_PORTFOLIO_SIZE', default=0, cast=int)
+# Solve year/department blocks in parallel worker processes and reconcile them
+SCHEDULER_DECOMPOSE = config('SCHEDULER_DECOMPOSE', default=False, cast=bool)
+# Seconds of local-search improvement after a timetable is constructed (0 = off)
+SCHEDULER_OPTIMIZE_SECONDS = config('SCHEDULER_OPTIMIZE_SECONDS', default=0, cast=int)
+# Longest run of back-to-back slots a teacher may teach (HC9) unless Teacher.max_consecutive_hours is set
+SCHEDULER_MAX_CONSECUTIVE_HOURS = config('SCHEDULER_MAX_CONSECUTIVE_HOURS', default=4, cast=int)
+# Teacher allocation for core courses: 'greedy' (least-loaded first) or 'flow' (min-cost flow with preferences)
+SCHEDULER_TEACHER_ALLOCATION = config('SCHEDULER_TEACHER_ALLOCATION', default='greedy')
+# Solver backend used when a request names none: 'backtrack', 'greedy', 'local-search' or 'cpsat' (needs ortools;
+# see scheduler/solvers.py)
+SCHEDULER_ENGINE = config('SCHEDULER_ENGINE', default='backtrack')
+# Rows per INSERT when generated entries are written (PostgreSQL streams them with COPY instead)
+SCHEDULER_PERSIST_BATCH_SIZE = config('SCHEDULER_PERSIST_BATCH_SIZE', default=2000, cast=int)